@@ -10,6 +10,7 @@ setup(
         'nextcord',
         'python-dotenv',
         'requests',
+        'aiohttp',
     ],
     entry_points={
         'console_scripts': [
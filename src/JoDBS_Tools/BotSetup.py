@@ -1,97 +1,388 @@
-import os
-from datetime import datetime
+import asyncio, logging, os
+from datetime import datetime, timezone
 from nextcord import Game
-from .Database import BotNetworkConnection
-from .DataFetching import DataFetching
+from .CogLoader import CogLoader
+from .Database import BotNetworkConnection, AsyncBotNetworkConnection
+from .DataFetching import DataFetching, ScopeRefresher
+from .LogPipeline import setup_logging
+from .Metrics import Metrics, get_metrics, set_metrics
+from .ScopeStore import ScopeStore
+from .StartupProfiler import StartupProfiler, set_profiler
 from .utils import Get_ENV, Load_ENV, Get_ENV_Bool, load_json
 
+logger = logging.getLogger(__name__)
+
+STARTUP_PHASES = ("scopes", "cogs", "login", "ready")
+
 class BotSetup:
-    def __init__(self, bot, debug=False, env_path=None, NodeConnection=True):
+    """
+    Environment, logging, BNC, cog loading and startup for a nextcord bot.
+
+    Background BNC scope refreshing is opt-in: scopes are fetched once at
+    startup and only polled again when `refresh_interval` or
+    BNC_REFRESH_INTERVAL sets an interval in seconds.
+    """
+    def __init__(self, bot, debug=False, env_path=None, NodeConnection=True, refresh_interval=None, profiler=None, metrics=None, configure_logging=True):
         self.start_time = datetime.timestamp(datetime.now())
         self.debug = debug
         self.bot = bot
 
+        # Startup spans, pass StartupProfiler(profile=True, imports=True) for cProfile / import timing
+        self.profiler = profiler if profiler is not None else StartupProfiler()
+        set_profiler(self.profiler.start())
+        self.bot.add_listener(self._profile_on_connect, "on_connect")
+        self.bot.add_listener(self._profile_on_ready, "on_ready")
+
         # If no env_path is provided, look for .env in the current working directory
         if env_path is None:
             env_path = os.path.join(os.getcwd(), '.env')
             
-        Load_ENV(env_path)  # Ensure environment variables are loaded before accessing them
+        with self.profiler.span("env"):
+            Load_ENV(env_path)  # Ensure environment variables are loaded before accessing them
+
+        # Library logs go through a background writer thread to stdout, and to a rotating file
+        # only when LOG_FILE is set; pass configure_logging=False to handle the JoDBS_Tools logger yourself
+        if configure_logging:
+            setup_logging(
+                level=Get_ENV("LOG_LEVEL", default="DEBUG" if debug else "INFO"),
+                file_path=Get_ENV("LOG_FILE", default="") or None,
+                format=Get_ENV("LOG_FORMAT", default="text"),
+                console=Get_ENV_Bool("LOG_CONSOLE", default=True),
+                levels=Get_ENV("LOG_LEVELS", default="")
+            )
         self.NodeConnection = Get_ENV_Bool("NODE_CONNECTION", default=NodeConnection)
         self.token = Get_ENV(key="TOKEN")
         self.cogs_directory = "./cogs"
+        self.cog_loader = None
+        self.profile_path = Get_ENV("STARTUP_PROFILE", default="") or None
+        self.profile_format = Get_ENV("STARTUP_PROFILE_FORMAT", default="chrome")
+
+        # Runtime metrics, off unless METRICS_PORT / METRICS_FILE is set or a Metrics registry is passed
+        self.metrics_port = int(Get_ENV("METRICS_PORT", default="0"))
+        self.metrics_host = Get_ENV("METRICS_HOST", default="127.0.0.1")
+        self.metrics_file = Get_ENV("METRICS_FILE", default="") or None
+        self.metrics_interval = float(Get_ENV("METRICS_INTERVAL", default="60"))
+        if metrics is None:
+            metrics = get_metrics()
+            metrics.enabled = metrics.enabled or bool(self.metrics_port or self.metrics_file)
+        self.metrics = metrics
+        set_metrics(self.metrics)
+        self.bot.add_listener(self._start_metrics, "on_ready")
+        self.bot.add_listener(self._metrics_on_command_completion, "on_application_command_completion")
+        self.bot.add_listener(self._metrics_on_command_error, "on_application_command_error")
+        self._readiness = {}  # phase -> future on the running loop, created by wait_for() or start()
+        self._phase_results = {}  # phase -> (result, exception) of phases done so far
+        self.bot.add_listener(self._readiness_on_connect, "on_connect")
+        self.bot.add_listener(self._readiness_on_ready, "on_ready")
         self.BNC = BotNetworkConnection() if self.NodeConnection else None
+        self.async_BNC = None
         self.version = "N/A"
+        ScopeStore.subscribe("version", self._on_version_update)
+
+        # Background scope hot-reload, off unless BNC_REFRESH_INTERVAL / refresh_interval is set
+        self.refresh_interval = float(refresh_interval if refresh_interval is not None else Get_ENV("BNC_REFRESH_INTERVAL", default="0") or 0)
+        self.scope_refresher = None
+        if self.NodeConnection and self.refresh_interval > 0:
+            self.bot.add_listener(self._start_scope_refresher, "on_ready")
 
         # Debug logs
         if self.debug:
-            print("BotSetup: Debug Mode Enabled")
-            print(f"BotSetup: NodeConnection: {self.NodeConnection}")
-            print(f"BotSetup: BNC: {self.BNC}")
+            logger.debug("BotSetup: Debug Mode Enabled")
+            logger.debug("BotSetup: NodeConnection: %s", self.NodeConnection)
+            logger.debug("BotSetup: BNC: %s", self.BNC)
+
+    def _on_version_update(self, scope, version):
+        self.version = version or "N/A"
+
+    async def _profile_on_connect(self):
+        self.profiler.end("gateway")
+
+    async def _profile_on_ready(self):
+        if self.profiler.finished:
+            return
+        await asyncio.sleep(0)  # Let start() close its "ready" span first
+        self.profiler.end("ready")
+        self.profiler.mark("on_ready")
+        self.profiler.finish()
+        self.profiler.print_summary()
+        if self.profile_path:
+            try:
+                await asyncio.to_thread(self.profiler.export, self.profile_path, self.profile_format)
+                logger.info("BotSetup: Startup profile saved to %s", self.profile_path)
+            except Exception as e:
+                logger.error("BotSetup: Failed to save startup profile: %s", e)
+
+    async def _start_metrics(self):
+        try:
+            if self.metrics_port:
+                await self.metrics.serve(host=self.metrics_host, port=self.metrics_port)
+            if self.metrics_file:
+                self.metrics.start_json_dump(self.metrics_file, self.metrics_interval)
+        except Exception as e:
+            logger.error("BotSetup: Failed to start metrics export: %s", e)
+
+    @staticmethod
+    def _command_name(interaction):
+        command = interaction.application_command
+        return getattr(command, "qualified_name", None) or getattr(command, "name", "unknown")
+
+    async def _metrics_on_command_completion(self, interaction):
+        # Measured from the interaction's snowflake, so gateway delivery and checks are included
+        if self.metrics.enabled:
+            latency = (datetime.now(timezone.utc) - interaction.created_at).total_seconds()
+            self.metrics.observe("command_latency_seconds", latency, command=self._command_name(interaction))
+
+    async def _metrics_on_command_error(self, interaction, error):
+        self.metrics.inc("command_errors_total", command=self._command_name(interaction))
+
+    async def _start_scope_refresher(self):
+        """Start the background BNC refresh once the bot's event loop is running"""
+        if self.scope_refresher is None:
+            if self.async_BNC is None:
+                self.async_BNC = AsyncBotNetworkConnection()
+            data_fetching = DataFetching(debug=self.debug, async_client=self.async_BNC)
+            self.scope_refresher = ScopeRefresher(data_fetching, interval=self.refresh_interval, debug=self.debug)
+        if not self.scope_refresher.running:
+            self.scope_refresher.start()
+            logger.info("BotSetup: Refreshing BNC scopes every %ss", self.refresh_interval)
 
     def run_bot(self):
         try:
             if not self.token or self.token == "NO_TOKEN_ADDED":
-                print("NO_TOKEN_ADDED. Please add a valid token in environment secrets")
+                logger.error("NO_TOKEN_ADDED. Please add a valid token in environment secrets")
                 return
             self.bot.run(self.token)
         except Exception as e:
-            print("ERROR: bot.py | bot.run() failed to run the bot. Possible wrong token or invalid token?!")
-            print(e)
+            logger.error("bot.py | bot.run() failed to run the bot. Possible wrong token or invalid token?! %s", e)
             raise Exception(e)
 
     def add_cogs(self):
+        """
+        Load every cog in ./cogs in dependency order, see CogLoader.
+
+        A cog that fails to load is reported and skipped instead of stopping the bot.
+        Returns the load report.
+        """
         try:
             if not os.path.exists(self.cogs_directory):
-                print(f"ERROR: bot.py | Cog directory '{self.cogs_directory}' does not exist.")
-                return
+                logger.error("bot.py | Cog directory '%s' does not exist.", self.cogs_directory)
+                return None
 
-            for filename in os.listdir(self.cogs_directory):
-                if filename.endswith(".py"):
-                    try:
-                        self.bot.load_extension(f"cogs.{filename[:-3]}")
-                        print(">", filename)
-                    except Exception as e:
-                        print(f"ERROR: bot.py | Failed to load cog '{filename}'. Error: {e}")
-                        raise Exception(e)
+            self.cog_loader = CogLoader(self.bot, self.cogs_directory, debug=self.debug)
+            return self.cog_loader.load()
         except Exception as e:
-            print(f"ERROR: bot.py | Cog Support failed to load. Possible /cogs does not exist?! or Duplicate?! Error: \n{e}")
+            logger.error("bot.py | Cog Support failed to load. Possible /cogs does not exist?! or Duplicate?! Error: \n%s", e)
             raise Exception(e)
 
     def setup_bot(self):
         try:
-            print("==================================================")
+            logger.info("==================================================")
             if self.NodeConnection:
                 # Check if bot can connect to BotNetwork
-                status = self.BNC.check_status()
+                with self.profiler.span("bnc.status"):
+                    status = self.BNC.check_status()
                 if status is None:
-                    print("Bot Setup failed to run;\n BotNetworkConnection failed. Check ENV variables.")
+                    logger.error("Bot Setup failed to run;\n BotNetworkConnection failed. Check ENV variables.")
                     return
-                print(status)
+                logger.info("%s", status)
                 # print("BotNetworkConnection is enabled.") Put this in status message in bot-database
 
                 # Fetch data from BNC
                 data_fetching = DataFetching(debug=self.debug)
-                print("Fetching Data:")
-                data_fetching.get_all_available_scopes()
-                version_data = load_json("./data/version.json")
-                self.version = version_data.get("version", "N/A")
+                logger.info("Fetching Data:")
+                with self.profiler.span("bnc.scopes"):
+                    data_fetching.get_all_available_scopes()
+                self.version = ScopeStore.get("version") or "N/A"
+                self._resolve("scopes", status)
 
             else:
-                print("BotNetworkConnection is disabled.\n Some features might not work if cogs rely on BNC functions.")
+                logger.warning("BotNetworkConnection is disabled.\n Some features might not work if cogs rely on BNC functions.")
+                self._resolve("scopes")
 
 
-            print("=====BOT=====")
-            print("Loading Cogs:")
-            self.add_cogs()
-            print("=======================DONE=======================")
+            logger.info("=====BOT=====")
+            logger.info("Loading Cogs:")
+            with self.profiler.span("cogs"):
+                self._resolve("cogs", self.add_cogs())
+            logger.info("=======================DONE=======================")
+            self.profiler.begin("gateway")
+            self.profiler.begin("ready")
             self.run_bot()
         except Exception as e:
             # print(f"ERROR: bot.py | Bot Setup failed to run; BotNetworkConnection failed, or cogs failed to run. Check ENV variables.")
             if not self.debug:
-                print(f"Bot Setup failed to run, enable debug for more info.")
+                logger.error("Bot Setup failed to run, enable debug for more info.")
             
-            print(f"Bot Setup failed to run; BotNetworkConnection failed, or cogs failed to run. Check ENV variables.")
-            print(f"Error: {e}")
+            logger.error("Bot Setup failed to run; BotNetworkConnection failed, or cogs failed to run. Check ENV variables.")
+            logger.error("Error: %s", e)
+
+    async def fetch_bnc_data(self):
+        """
+        Check BNC and fetch all scopes from the bot's event loop without blocking it.
+
+        The status check and the data fetch run concurrently. Scopes that can't be
+        fetched keep their cached data. Returns the BNC status, or None if BNC is
+        disabled or unreachable.
+        """
+        if not self.NodeConnection:
+            return None
+        if self.async_BNC is None:
+            self.async_BNC = AsyncBotNetworkConnection()
+
+        data_fetching = DataFetching(debug=self.debug, async_client=self.async_BNC)
+        status, fetched = await asyncio.gather(
+            self._timed("bnc.status", self.async_BNC.check_status()),
+            self._timed("bnc.scopes", data_fetching.async_get_all_available_scopes()),
+            return_exceptions=True
+        )
+        if isinstance(fetched, Exception):
+            logger.error("Fetching Data failed: %s", fetched)
+        self.version = ScopeStore.get("version") or "N/A"
+
+        if status is None or isinstance(status, Exception):
+            logger.error("BotNetworkConnection failed. Check ENV variables.")
+            return None
+        return status
+
+    # Async startup
+
+    async def _timed(self, name, awaitable):
+        with self.profiler.span(name):
+            return await awaitable
+
+    @staticmethod
+    def _settle(future, result, error):
+        if future.done():
+            return
+        if isinstance(error, asyncio.CancelledError):
+            future.cancel()
+        elif error is not None:
+            future.set_exception(error)
+            future.exception()  # Nobody has to be waiting for it
+        else:
+            future.set_result(result)
+
+    def _resolve(self, phase, result=None, error=None):
+        """Mark a startup phase as done, waking wait_for() callers"""
+        if phase in self._phase_results:
+            return  # Reconnects fire on_connect/on_ready again
+        self._phase_results[phase] = (result, error)
+        future = self._readiness.get(phase)
+        if future is not None:
+            self._settle(future, result, error)
+
+    async def _readiness_on_connect(self):
+        self._resolve("login")
+
+    async def _readiness_on_ready(self):
+        self._resolve("ready")
+
+    async def _phase(self, name, awaitable):
+        """Run one startup phase, record it as a span and resolve its readiness future"""
+        try:
+            result = await self._timed(name, awaitable)
+        except BaseException as e:
+            self._resolve(name, error=e)
+            raise
+        self._resolve(name, result)
+        return result
+
+    @staticmethod
+    def _log_scopes_failure(task):
+        """Nothing awaits the scopes phase, so retrieve and log its exception here"""
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("BotSetup: Fetching BNC scopes failed, using the scopes cached on disk: %s", task.exception())
+
+    async def _start_bnc(self):
+        if not self.NodeConnection:
+            logger.warning("BotNetworkConnection is disabled.\n Some features might not work if cogs rely on BNC functions.")
+            return None
+        status = await self.fetch_bnc_data()
+        if status is not None:
+            logger.info("%s", status)
+        return status
+
+    async def _start_cogs(self):
+        if not os.path.exists(self.cogs_directory):
+            logger.error("bot.py | Cog directory '%s' does not exist.", self.cogs_directory)
+            return None
+        logger.info("Loading Cogs:")
+        self.cog_loader = CogLoader(self.bot, self.cogs_directory, debug=self.debug)
+        return await self.cog_loader.aload()
+
+    async def wait_for(self, *phases):
+        """
+        Wait until startup phases are done: 'scopes', 'cogs', 'login' and 'ready'.
+
+        Cogs that need BNC data should `await bot_setup.wait_for("scopes")`; until
+        then ScopeStore serves the data cached on disk. Waits for every phase if none are given.
+        Works with start() and setup_bot(); with setup_bot() 'scopes' and 'cogs'
+        are already done once the bot's loop runs.
+
+        Raises:
+            ValueError: For an unknown phase.
+        """
+        loop = asyncio.get_running_loop()
+        for phase in phases or STARTUP_PHASES:
+            if phase not in STARTUP_PHASES:
+                raise ValueError(f"Unknown startup phase '{phase}', expected one of {', '.join(STARTUP_PHASES)}")
+            future = self._readiness.get(phase)
+            if future is None or future.get_loop() is not loop:
+                future = self._readiness[phase] = loop.create_future()
+                if phase in self._phase_results:
+                    self._settle(future, *self._phase_results[phase])
+            await asyncio.shield(future)
+
+    @property
+    def timeline(self):
+        """{span name: (start, end)} in seconds since the BotSetup was created"""
+        return {span["name"]: (span["start"], span["end"]) for span in self.profiler.summary("startup")}
+
+    async def start(self, reconnect=True):
+        """
+        Async entrypoint, overlaps the BNC fetch, cog loading and the Discord login.
+
+        The BNC status check and scope fetch, cog loading and the gateway login
+        all start at once. The gateway connection opens as soon as the cogs and
+        the login are done, so application commands are registered in time,
+        while the scope fetch may still be running. Prints the startup timeline
+        once the bot is ready (see StartupProfiler).
+
+        Example:
+            asyncio.run(bot_setup.start())
+        """
+        if not self.token or self.token == "NO_TOKEN_ADDED":
+            logger.error("NO_TOKEN_ADDED. Please add a valid token in environment secrets")
+            return
+
+        loop = asyncio.get_running_loop()
+        self._phase_results = {}
+        self._readiness = {phase: future for phase, future in self._readiness.items() if not future.done()}
+        logger.info("==================================================")
+        tasks = [
+            loop.create_task(self._phase("scopes", self._start_bnc())),
+            loop.create_task(self._phase("cogs", self._start_cogs())),
+            loop.create_task(self._phase("login", self.bot.login(self.token))),
+            loop.create_task(self._phase("ready", self.bot.wait_until_ready()))
+        ]
+        tasks[0].add_done_callback(self._log_scopes_failure)
+
+        try:
+            await asyncio.gather(tasks[1], tasks[2])
+            logger.info("=======================DONE=======================")
+            self.profiler.begin("gateway")
+            await self.bot.connect(reconnect=reconnect)
+        except Exception as e:
+            logger.error("bot.py | Bot startup failed. Possible wrong token or invalid token?! %s", e)
+            raise
+        finally:
+            for task in tasks:
+                task.cancel()
+            if not self.bot.is_closed():
+                await self.bot.close()
+            if self.async_BNC is not None:
+                await self.async_BNC.close()
+            await self.metrics.close()
 
     async def getBotStartupInfo(self):
         try:
@@ -114,5 +405,5 @@ class BotSetup:
 
             return True
         except:
-            print("Failed to set Bot Status.")
+            logger.error("Failed to set Bot Status.")
             return False
\ No newline at end of file
@@ -0,0 +1,326 @@
+import ast, asyncio, importlib, logging, os, sys, time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from .LogPipeline import UNSAMPLED
+from .StartupProfiler import get_profiler
+
+logger = logging.getLogger(__name__)
+
+
+class CogSpec:
+    """
+    A cog file and what it declares at module level, read without importing it.
+
+    Cogs can declare:
+        DEPENDENCIES = ["economy", "levels"]  # Cogs that must load first
+        LAZY = True                           # Load in the background after on_ready
+    """
+    __slots__ = ('name', 'path', 'extension', 'dependencies', 'lazy', 'imports')
+
+    def __init__(self, name: str, path: str, extension: str, dependencies=(), lazy=False, imports=()):
+        self.name = name
+        self.path = path
+        self.extension = extension
+        self.dependencies = tuple(dependencies)
+        self.lazy = lazy
+        self.imports = tuple(imports)
+
+    @classmethod
+    def parse(cls, path: str, package: str) -> "CogSpec":
+        name = os.path.splitext(os.path.basename(path))[0]
+        with open(path, 'rb') as f:
+            tree = ast.parse(f.read(), filename=path)
+
+        dependencies, lazy, imports = [], False, []
+        for node in tree.body:
+            if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+                target = node.targets[0].id
+                try:
+                    if target == 'DEPENDENCIES':
+                        dependencies = [str(dependency) for dependency in ast.literal_eval(node.value)]
+                    elif target == 'LAZY':
+                        lazy = bool(ast.literal_eval(node.value))
+                except ValueError:
+                    raise ValueError(f"{target} in {path} must be a literal")
+            elif isinstance(node, ast.Import):
+                imports.extend(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                imports.append(node.module)
+
+        # Sibling cogs run their own module code on load, only warm real libraries
+        imports = [module for module in imports if module.split('.')[0] != package]
+        return cls(name, path, f"{package}.{name}", dependencies, lazy, imports)
+
+
+class CogLoader:
+    """
+    Loads every cog in a folder, in dependency order, with isolated failures.
+
+    Cog files are parsed (not imported) to find their DEPENDENCIES, LAZY flag
+    and top-level imports. The third-party modules they import are imported
+    in parallel worker threads first, so each cog's own import mostly hits
+    sys.modules. A broken cog is reported and skipped, together with the cogs
+    that depend on it, and load() prints a per-cog timing breakdown.
+
+    Lazy cogs are loaded in the background once the bot is ready, or earlier
+    through `await loader.ensure_loaded(name)`. Discord needs application
+    commands registered up front, so they are synced after a lazy batch.
+    """
+    def __init__(self, bot, directory: str = "./cogs", package: Optional[str] = None, workers: Optional[int] = None, debug=False):
+        self.bot = bot
+        self.directory = directory
+        self.package = package or os.path.basename(os.path.normpath(directory))
+        self.workers = workers or min(8, (os.cpu_count() or 1) + 4)
+        self.debug = debug
+
+        self.specs: Dict[str, CogSpec] = {}
+        self.timings: Dict[str, Dict[str, float]] = {}  # name -> {"load": seconds}
+        self.errors: Dict[str, str] = {}
+        self.loaded: List[str] = []
+        self.deferred: List[str] = []
+        self._lazy_task = None
+        self._loading: Dict[str, asyncio.Future] = {}
+
+    # Discovery
+
+    def discover(self) -> Dict[str, CogSpec]:
+        """Parse every .py file in the cog folder, sorted by name"""
+        self.specs = {}
+        for filename in sorted(os.listdir(self.directory)):
+            if not filename.endswith(".py") or filename.startswith("_"):
+                continue
+            path = os.path.join(self.directory, filename)
+            try:
+                spec = CogSpec.parse(path, self.package)
+                self.specs[spec.name] = spec
+            except (SyntaxError, ValueError, OSError) as e:
+                self.errors[filename[:-3]] = f"Failed to parse: {e}"
+        return self.specs
+
+    def order(self, names=None) -> List[str]:
+        """
+        Topologically sort cogs so dependencies load first, alphabetical otherwise.
+
+        Cogs with unknown or circular dependencies are left out and recorded in errors.
+        """
+        names = set(names if names is not None else self.specs)
+        for name in list(names):
+            missing = [dependency for dependency in self.specs[name].dependencies if dependency not in self.specs]
+            if missing:
+                self.errors[name] = f"Unknown dependency: {', '.join(missing)}"
+                names.discard(name)
+
+        ordered, placed = [], set()
+        remaining = {name: set(self.specs[name].dependencies) for name in names}
+        while remaining:
+            ready = sorted(name for name, dependencies in remaining.items() if dependencies <= placed)
+            if not ready:
+                # Everything left waits on a cycle or on a cog that was dropped
+                for name in sorted(remaining):
+                    self.errors.setdefault(name, f"Dependency cycle or failed dependency: {', '.join(sorted(remaining[name] - placed))}")
+                break
+            for name in ready:
+                ordered.append(name)
+                placed.add(name)
+                del remaining[name]
+        return ordered
+
+    # Loading
+
+    def _preimport_module(self, module: str) -> float:
+        started = time.perf_counter()
+        try:
+            with get_profiler().span(f"preimport {module}", "cog"):
+                importlib.import_module(module)
+        except Exception:
+            pass  # The cog's own import reports it properly
+        return time.perf_counter() - started
+
+    def preimport(self, names) -> Dict[str, float]:
+        """Import the libraries the given cogs use in parallel worker threads"""
+        modules = sorted({
+            module for name in names for module in self.specs[name].imports
+            if module not in sys.modules
+        })
+        if not modules:
+            return {}
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="cog-import") as pool:
+            return dict(zip(modules, pool.map(self._preimport_module, modules)))
+
+    def _load_one(self, name: str) -> bool:
+        spec = self.specs[name]
+        failed = [dependency for dependency in spec.dependencies if dependency not in self.loaded]
+        if failed:
+            self.errors[name] = f"Skipped, dependency not loaded: {', '.join(failed)}"
+            return False
+
+        started = time.perf_counter()
+        try:
+            with get_profiler().span(f"cog {name}", "cog"):
+                self.bot.load_extension(spec.extension)
+        except Exception as e:
+            self.errors[name] = str(getattr(e, 'original', None) or e)
+            logger.error("bot.py | Failed to load cog '%s.py'. Error: %s", name, self.errors[name])
+            return False
+        finally:
+            self.timings.setdefault(name, {})["load"] = time.perf_counter() - started
+        self.loaded.append(name)
+        logger.info("> %s.py", name, extra=UNSAMPLED)
+        return True
+
+    def _plan(self) -> List[str]:
+        """Discover and order the cogs, returns the eager ones and sets self.deferred"""
+        if not self.specs:
+            self.discover()
+        order = self.order()
+        eager = [name for name in order if not self.specs[name].lazy or self._needed_by_eager(name, order)]
+        self.deferred = [name for name in order if name not in eager]
+        return eager
+
+    def _print_slowest(self, preimported):
+        if self.debug and preimported:
+            slowest = sorted(preimported.items(), key=lambda item: -item[1])[:5]
+            logger.debug("CogLoader: Slowest imports: %s", ", ".join(f"{module} {seconds * 1000:.0f}ms" for module, seconds in slowest))
+
+    def _finish(self, started, preimport_time) -> Dict:
+        if self.deferred:
+            self.bot.add_listener(self._load_deferred_on_ready, "on_ready")
+        report = self.report(total=time.perf_counter() - started, preimport=preimport_time)
+        self.print_report(report)
+        return report
+
+    def load(self) -> Dict:
+        """
+        Load every eager cog now and defer the lazy ones.
+
+        Returns a report with loaded, deferred and failed cogs and timings.
+        """
+        started = time.perf_counter()
+        eager = self._plan()
+
+        preimport_started = time.perf_counter()
+        self._print_slowest(self.preimport(eager))
+        preimport_time = time.perf_counter() - preimport_started
+
+        for name in eager:
+            self._load_one(name)
+        return self._finish(started, preimport_time)
+
+    async def aload(self) -> Dict:
+        """
+        load() for a running event loop.
+
+        Parsing and the parallel imports run in worker threads; cogs are then
+        set up on the loop one at a time, yielding between them so the
+        gateway and other startup work keep going.
+        """
+        started = time.perf_counter()
+        eager = await asyncio.to_thread(self._plan)
+
+        preimport_started = time.perf_counter()
+        self._print_slowest(await asyncio.to_thread(self.preimport, eager))
+        preimport_time = time.perf_counter() - preimport_started
+
+        for name in eager:
+            self._load_one(name)
+            await asyncio.sleep(0)
+        return self._finish(started, preimport_time)
+
+    def _needed_by_eager(self, name, order) -> bool:
+        """A lazy cog that an eager cog depends on has to load eagerly too"""
+        pending = [other for other in order if not self.specs[other].lazy]
+        seen = set()
+        while pending:
+            other = pending.pop()
+            for dependency in self.specs[other].dependencies:
+                if dependency == name:
+                    return True
+                if dependency not in seen:
+                    seen.add(dependency)
+                    pending.append(dependency)
+        return False
+
+    async def _load_deferred_on_ready(self):
+        if self._lazy_task is None:
+            self._lazy_task = asyncio.get_running_loop().create_task(self.load_deferred())
+
+    async def load_deferred(self):
+        """Load every lazy cog that isn't loaded yet, then sync application commands"""
+        commands_before = len(self.bot.get_all_application_commands())
+        for name in list(self.deferred):
+            await self.ensure_loaded(name, sync=False)
+        if len(self.bot.get_all_application_commands()) != commands_before:
+            await self.bot.sync_all_application_commands()
+        if self.debug:
+            logger.debug("CogLoader: Loaded %s lazy cog(s)", len(self.deferred))
+
+    async def ensure_loaded(self, name: str, sync: bool = True, _chain: tuple = ()) -> bool:
+        """
+        Load a lazy cog (and its lazy dependencies) now if it isn't loaded yet.
+
+        Returns False for unknown cogs, cogs order() rejected, dependency
+        cycles and cogs whose dependencies failed to load.
+        """
+        if name in self.loaded:
+            return True
+        if name not in self.specs or name in self.errors:
+            return False
+        if name in _chain:
+            # Awaiting our own pending future would never finish
+            self.errors[name] = f"Dependency cycle: {' -> '.join((*_chain, name))}"
+            logger.error("CogLoader: Failed to load lazy cog '%s': %s", name, self.errors[name])
+            return False
+        future = self._loading.get(name)
+        if future is not None:
+            return await future
+
+        future = self._loading[name] = asyncio.get_running_loop().create_future()
+        try:
+            for dependency in self.specs[name].dependencies:
+                # _load_one() skips this cog if one of them failed
+                await self.ensure_loaded(dependency, sync=False, _chain=(*_chain, name))
+            if name in self.errors:
+                # A dependency led back to this cog
+                future.set_result(False)
+                return False
+            commands_before = len(self.bot.get_all_application_commands())
+            await asyncio.to_thread(self.preimport, [name])
+            loaded = self._load_one(name)
+            if loaded and sync and len(self.bot.get_all_application_commands()) != commands_before:
+                await self.bot.sync_all_application_commands()
+            future.set_result(loaded)
+            return loaded
+        except Exception as e:
+            future.set_result(False)
+            logger.error("CogLoader: Failed to load lazy cog '%s': %s", name, e)
+            return False
+        finally:
+            self._loading.pop(name, None)
+
+    # Reporting
+
+    def report(self, total=None, preimport=None) -> Dict:
+        return {
+            "loaded": list(self.loaded),
+            "deferred": [name for name in self.deferred if name not in self.loaded],
+            "failed": dict(self.errors),
+            "timings": {name: dict(timing) for name, timing in self.timings.items()},
+            "preimport": preimport,
+            "total": total
+        }
+
+    @staticmethod
+    def print_report(report: Dict):
+        timings = report["timings"]
+        if timings:
+            logger.info("Cog load times:", extra=UNSAMPLED)
+            for name, timing in sorted(timings.items(), key=lambda item: -item[1].get("load", 0)):
+                logger.info("  %-24s %8.1fms", name, timing.get('load', 0) * 1000, extra=UNSAMPLED)
+        if report.get("preimport"):
+            logger.info("  %-24s %8.1fms", '(parallel imports)', report['preimport'] * 1000, extra=UNSAMPLED)
+        if report["deferred"]:
+            logger.info("Deferred until ready: %s", ', '.join(report['deferred']), extra=UNSAMPLED)
+        for name, error in report["failed"].items():
+            logger.error("FAILED: %s - %s", name, error, extra=UNSAMPLED)
+        if report.get("total") is not None:
+            logger.info("Loaded %s cog(s) in %.2fs", len(report['loaded']), report['total'], extra=UNSAMPLED)
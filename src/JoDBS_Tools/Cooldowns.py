@@ -0,0 +1,335 @@
+import abc, contextlib, heapq, itertools, json, logging, sqlite3, threading, time
+from typing import Any, Hashable, Optional, Tuple
+from nextcord.ext.commands import BucketType
+
+logger = logging.getLogger(__name__)
+
+CooldownKey = Tuple[str, Hashable]
+
+
+class CooldownBackend(abc.ABC):
+    """
+    Storage for cooldown entries keyed by (command, bucket_id).
+
+    Each entry has an expiry time on the backend's own clock and an optional
+    small state value. Expired entries are invisible and get swept, so memory
+    stays proportional to the cooldowns that are actually active.
+    """
+    @abc.abstractmethod
+    def clock(self) -> float:
+        pass
+
+    @abc.abstractmethod
+    def get(self, key: CooldownKey) -> Optional[Tuple[float, Any]]:
+        """Return (expires_at, state) for an active entry, or None"""
+
+    @abc.abstractmethod
+    def set(self, key: CooldownKey, expires_at: float, state: Any = None):
+        pass
+
+    @abc.abstractmethod
+    def delete(self, key: CooldownKey):
+        pass
+
+    @abc.abstractmethod
+    def clear(self):
+        pass
+
+    @abc.abstractmethod
+    def sweep(self) -> int:
+        """Drop expired entries, returns how many were removed"""
+
+    @abc.abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    def locked(self, key: CooldownKey):
+        """Context manager making a get() + set() on one key atomic"""
+        return contextlib.nullcontext()
+
+
+class MemoryCooldownBackend(CooldownBackend):
+    """
+    In-process cooldowns on the monotonic clock.
+
+    Expiries sit in a min-heap; every `sweep_every` writes the expired head of
+    the heap is popped, so cleanup is amortised O(log n) per write.
+    """
+    def __init__(self, sweep_every: int = 256):
+        self.sweep_every = sweep_every
+        self._entries = {}
+        self._heap = []
+        self._counter = itertools.count()
+        self._writes = 0
+
+    def clock(self):
+        return time.monotonic()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        return entry
+
+    def set(self, key, expires_at, state=None):
+        self._entries[key] = (expires_at, state)
+        heapq.heappush(self._heap, (expires_at, next(self._counter), key))
+        self._writes += 1
+        if self._writes >= self.sweep_every:
+            self._writes = 0
+            self.sweep()
+
+    def delete(self, key):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+        self._heap.clear()
+
+    def sweep(self):
+        now = time.monotonic()
+        heap, entries = self._heap, self._entries
+        removed = 0
+        while heap and heap[0][0] <= now:
+            expires_at, _, key = heapq.heappop(heap)
+            entry = entries.get(key)
+            # Skip heap entries left behind by a later set() of the same key
+            if entry is not None and entry[0] == expires_at:
+                del entries[key]
+                removed += 1
+
+        # Rebuild if stale heap entries start to outnumber live ones
+        if len(heap) > 2 * len(entries) + 64:
+            self._heap = [(entry[0], next(self._counter), key) for key, entry in entries.items()]
+            heapq.heapify(self._heap)
+        return removed
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCooldownBackend(CooldownBackend):
+    """
+    Cooldowns in a SQLite file, shared by every shard/process on the host and kept across restarts.
+
+    Uses wall-clock time since monotonic clocks are not comparable between processes.
+    Operations are single indexed statements on a local WAL database.
+
+    Calls run on the event loop, so waiting for another process's write lock
+    is capped at `lock_timeout` seconds. When the database stays locked the
+    check goes ahead without the lock and a failed write is skipped, a
+    cooldown may be missed under contention but the bot never stalls.
+    """
+    SCHEMA_VERSION = 1
+
+    def __init__(self, db_path: str = "./data/cooldowns.db", sweep_every: int = 256, lock_timeout: float = 0.05):
+        self.db_path = db_path
+        self.sweep_every = sweep_every
+        self.lock_timeout = lock_timeout
+        self._writes = 0
+        self._lock = threading.RLock()
+        # Setup may wait the usual 5s for other processes, calls afterwards only lock_timeout
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._migrate()
+        self.conn.execute(f"PRAGMA busy_timeout = {int(lock_timeout * 1000)}")
+
+    def _migrate(self):
+        """Bring the table to SCHEMA_VERSION, tracked in PRAGMA user_version"""
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+                if version < 1:
+                    # Version 0 stored buckets as INTEGER and entries without token state;
+                    # cooldowns are short-lived, so start over rather than convert them
+                    self.conn.execute("DROP TABLE IF EXISTS cooldowns")
+                self.conn.execute(
+                    "CREATE TABLE IF NOT EXISTS cooldowns ("
+                    " command TEXT NOT NULL,"
+                    " bucket TEXT NOT NULL,"
+                    " expires_at REAL NOT NULL,"
+                    " state TEXT,"
+                    " PRIMARY KEY (command, bucket))"
+                )
+                self.conn.execute("CREATE INDEX IF NOT EXISTS idx_cooldowns_expires_at ON cooldowns (expires_at)")
+                if version != self.SCHEMA_VERSION:
+                    self.conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def clock(self):
+        return time.time()
+
+    def get(self, key):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT expires_at, state FROM cooldowns WHERE command = ? AND bucket = ? AND expires_at > ?",
+                (key[0], str(key[1]), time.time())
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], (json.loads(row[1]) if row[1] is not None else None)
+
+    def _write(self, query, parameters=()):
+        """Run a write, None instead of waiting when another process holds the lock"""
+        with self._lock:
+            try:
+                return self.conn.execute(query, parameters)
+            except sqlite3.OperationalError as e:
+                if "locked" not in str(e):
+                    raise
+                logger.warning("SQLiteCooldownBackend: %s stayed locked for %ss, skipped %s", self.db_path, self.lock_timeout, query.split()[0])
+                return None
+
+    def set(self, key, expires_at, state=None):
+        self._write(
+            "INSERT OR REPLACE INTO cooldowns (command, bucket, expires_at, state) VALUES (?, ?, ?, ?)",
+            (key[0], str(key[1]), expires_at, json.dumps(state) if state is not None else None)
+        )
+        self._writes += 1
+        if self._writes >= self.sweep_every:
+            self._writes = 0
+            self.sweep()
+
+    def delete(self, key):
+        self._write("DELETE FROM cooldowns WHERE command = ? AND bucket = ?", (key[0], str(key[1])))
+
+    def clear(self):
+        self._write("DELETE FROM cooldowns")
+
+    def sweep(self):
+        cursor = self._write("DELETE FROM cooldowns WHERE expires_at <= ?", (time.time(),))
+        return cursor.rowcount if cursor is not None else 0
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM cooldowns WHERE expires_at > ?", (time.time(),)).fetchone()[0]
+
+    @contextlib.contextmanager
+    def locked(self, key):
+        # BEGIN IMMEDIATE takes the database write lock, so other processes wait for us
+        with self._lock:
+            if self._write("BEGIN IMMEDIATE") is None:
+                # Held elsewhere for longer than lock_timeout, go ahead unlocked
+                yield
+                return
+            try:
+                yield
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            else:
+                self.conn.execute("COMMIT")
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+_default_backend: CooldownBackend = MemoryCooldownBackend()
+
+def get_default_backend() -> CooldownBackend:
+    return _default_backend
+
+def set_default_backend(backend: CooldownBackend):
+    """Backend used by every RateLimiter created without an explicit one"""
+    global _default_backend
+    _default_backend = backend
+
+
+def bucket_id(interaction, type=BucketType.user) -> Hashable:
+    """Bucket key for an interaction, covering every commands.BucketType"""
+    user = interaction.user
+    guild = interaction.guild
+    if type == BucketType.user:
+        return user.id
+    if type == BucketType.guild:
+        return guild.id if guild else user.id
+    if type == BucketType.channel:
+        return interaction.channel_id
+    if type == BucketType.member:
+        return (guild.id if guild else None, user.id)
+    if type == BucketType.category:
+        channel = interaction.channel
+        category_id = getattr(channel, "category_id", None)
+        return category_id or interaction.channel_id
+    if type == BucketType.role:
+        top_role = getattr(user, "top_role", None)
+        return top_role.id if top_role is not None else interaction.channel_id
+    return 0
+
+
+class RateLimiter:
+    """
+    Token bucket allowing `rate` uses per `per` seconds, with up to `burst` uses at once.
+
+    Each bucket stores just (tokens, updated_at) and expires once it would be
+    full again, so a check is O(1) and idle buckets cost nothing.
+
+    Args:
+        name (str): Unique name of the limited command or resource.
+        rate (int): Uses allowed per period.
+        per (float): Period in seconds.
+        burst (int, optional): Bucket capacity. Defaults to rate.
+        type (commands.BucketType): What a bucket is per, used by check().
+        backend (CooldownBackend, optional): Defaults to the shared default backend.
+    """
+    def __init__(self, name: str, rate: int = 1, per: float = 60.0, burst: Optional[int] = None, type=BucketType.user, backend: Optional[CooldownBackend] = None):
+        if rate <= 0 or per <= 0:
+            raise ValueError("rate and per must be positive")
+        self.name = name
+        self.rate = rate
+        self.per = float(per)
+        self.capacity = float(burst if burst is not None else rate)
+        self.refill = rate / self.per  # Tokens per second
+        self.type = type
+        self._backend = backend
+
+    @property
+    def backend(self) -> CooldownBackend:
+        return self._backend if self._backend is not None else _default_backend
+
+    def _tokens(self, entry, now) -> float:
+        if entry is None:
+            return self.capacity
+        tokens, updated_at = entry[1]
+        return min(self.capacity, tokens + (now - updated_at) * self.refill)
+
+    def hit(self, bucket: Hashable = 0, tokens: int = 1) -> float:
+        """
+        Try to take `tokens` from a bucket.
+
+        Returns:
+            float: 0.0 if allowed, otherwise seconds until enough tokens are available.
+        """
+        backend = self.backend
+        key = (self.name, bucket)
+        with backend.locked(key):
+            now = backend.clock()
+            available = self._tokens(backend.get(key), now)
+            if available < tokens:
+                return (tokens - available) / self.refill
+
+            available -= tokens
+            backend.set(key, now + (self.capacity - available) / self.refill, (available, now))
+            return 0.0
+
+    def retry_after(self, bucket: Hashable = 0, tokens: int = 1) -> float:
+        """Seconds until `tokens` could be taken from a bucket, without taking them"""
+        backend = self.backend
+        available = self._tokens(backend.get((self.name, bucket)), backend.clock())
+        return max(0.0, (tokens - available) / self.refill)
+
+    def reset(self, bucket: Hashable = 0):
+        self.backend.delete((self.name, bucket))
+
+    def check(self, interaction, tokens: int = 1) -> float:
+        """hit() on the bucket this interaction belongs to"""
+        return self.hit(bucket_id(interaction, self.type), tokens)
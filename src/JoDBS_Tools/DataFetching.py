@@ -1,9 +1,96 @@
-import os
-from .Database import BotNetworkConnection
-from .utils import save_json, load_json, Load_ENV, Get_ENV, Get_ENV_Bool
+import os, json, asyncio, hashlib, logging
+from datetime import datetime, timezone
+from .Database import BotNetworkConnection, AsyncBotNetworkConnection
+from .ScopeStore import ScopeStore
+from .StartupProfiler import get_profiler
+from .utils import save_json, save_json_atomic, load_json, Load_ENV, Get_ENV, Get_ENV_Bool
+
+logger = logging.getLogger(__name__)
+
+class ScopeCache:
+    """
+    On-disk cache for BNC scope files.
+
+    Each ./data/<scope>.json gets a ./data/<scope>.meta.json next to it holding the
+    ETag/Last-Modified of the document it came from and a hash of the scope data.
+    Files are only rewritten when the data really changed, and never blanked on fetch failures.
+    """
+    def __init__(self, data_folder="./data"):
+        self.data_folder = data_folder
+
+    def data_path(self, scope: str):
+        return f"{self.data_folder}/{scope}.json"
+
+    def meta_path(self, scope: str):
+        return f"{self.data_folder}/{scope}.meta.json"
+
+    @staticmethod
+    def hash_data(data):
+        payload = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def load_meta(self, scope: str):
+        try:
+            return load_json(self.meta_path(scope)) or {}
+        except (OSError, ValueError):
+            return {}
+
+    def validators(self, scopes):
+        """
+        Return (etag, last_modified) for a conditional request, or (None, None)
+        if any scope file or its metadata is missing or they came from different documents.
+        """
+        validators = None
+        for scope in scopes:
+            meta = self.load_meta(scope)
+            if not os.path.exists(self.data_path(scope)) or not (meta.get("etag") or meta.get("last_modified")):
+                return None, None
+            current = (meta.get("etag"), meta.get("last_modified"))
+            if validators is not None and current != validators:
+                return None, None
+            validators = current
+        return validators or (None, None)
+
+    def store(self, scope: str, data, etag=None, last_modified=None):
+        """Save scope data and its metadata, returns True if the data file was rewritten"""
+        data_hash = self.hash_data(data)
+        meta = self.load_meta(scope)
+        written = False
+
+        if meta.get("hash") != data_hash or not os.path.exists(self.data_path(scope)):
+            save_json_atomic({scope: data} if data else {}, self.data_path(scope))
+            written = True
+
+        new_meta = {
+            "etag": etag,
+            "last_modified": last_modified,
+            "hash": data_hash,
+            "fetched_at": datetime.now(tz=timezone.utc).isoformat()
+        }
+        if written or (meta.get("etag"), meta.get("last_modified")) != (etag, last_modified):
+            save_json_atomic(new_meta, self.meta_path(scope))
+        return written
+
+    def load(self, scope: str):
+        """Return the last-known-good data for a scope, or None if nothing is cached"""
+        try:
+            data = load_json(self.data_path(scope))
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict):
+            return None
+        return data.get(scope)
+
+    def ensure_exists(self, scope: str):
+        """Create an empty scope file only if there is no cached copy at all"""
+        if os.path.exists(self.data_path(scope)):
+            return False
+        save_json({}, self.data_path(scope))
+        return True
+
 
 class DataFetching:
-    def __init__(self, debug=False):
+    def __init__(self, debug=False, async_client=None):
         self.debug = debug
         self.file_name = os.path.basename(__file__)
         self.data_folder = "./data"
@@ -13,42 +100,184 @@ class DataFetching:
         self.default_scopes = default_scopes_str.split(",") if default_scopes_str else []
         
         self.__create_data_folder()
+        self.cache = ScopeCache(self.data_folder)
         self.BNC = BotNetworkConnection()
+        self.async_BNC = async_client
 
 
     def __create_data_folder(self):
         try:
             os.makedirs(self.data_folder)
-            print(f"> {self.file_name}: Created data folder.")
+            logger.info("> %s: Created data folder.", self.file_name)
             return
         except FileExistsError:
             return
 
 
+    def _save_scope(self, scope: str, data, etag=None, last_modified=None):
+        """Write a fetched scope to ./data/<scope>.json if it changed"""
+        if self.debug:
+            logger.debug("> %s: Getting %s from BotNetworkConnection", self.file_name, scope)
+            # Only the shape of the payload, whole scopes can be large
+            logger.debug("> %s: %s has %s", self.file_name, scope, f"{len(data)} entries" if isinstance(data, (dict, list)) else type(data).__name__)
+
+        written = self.cache.store(scope, data, etag=etag, last_modified=last_modified)
+        if not written:
+            logger.debug("> %s: %s unchanged, kept cached file.", self.file_name, scope)
+        elif data:
+            logger.info("> %s: Successfully fetched %s from BotNetworkConnection.", self.file_name, scope)
+        else:
+            logger.info("> %s: No data in %s, created empty file for %s", self.file_name, scope, scope)
+
+    def _keep_cached(self, scope: str):
+        """Keep serving the last-known-good file for a scope after a failed fetch"""
+        logger.warning("> %s: Failed to fetch %s from BotNetworkConnection.", self.file_name, scope)
+        if self.cache.ensure_exists(scope):
+            logger.warning("> %s: No cached copy of %s, created empty fallback file for %s", self.file_name, scope, scope)
+        else:
+            logger.info("> %s: Using last-known-good cached copy of %s", self.file_name, scope)
+
+    def _cached_or_current(self, scope: str):
+        """In-memory copy of a scope, loading the cached file only if nothing is in memory yet"""
+        data = ScopeStore.get(scope)
+        return data if data is not None else self.cache.load(scope)
+
+    def _apply_result(self, scopes, result):
+        """
+        Save every requested scope from a fetch_bot_data() result.
+
+        Returns {scope: data} to publish to ScopeStore; scopes that were not
+        downloaded fall back to their in-memory or last-known-good cached copy.
+        """
+        if result is None:
+            for scope in scopes:
+                self._keep_cached(scope)
+            return {scope: self._cached_or_current(scope) or {} for scope in scopes}
+
+        if result["status"] == 304:
+            for scope in scopes:
+                logger.debug("> %s: %s not modified, kept cached file.", self.file_name, scope)
+            return {scope: self._cached_or_current(scope) or {} for scope in scopes}
+
+        scope_data = {}
+        profiler = get_profiler()
+        for scope in scopes:
+            try:
+                data = BotNetworkConnection.extract_scope(result["data"], scope)
+                with profiler.span(f"scope {scope}", "scope"):
+                    self._save_scope(scope, data, etag=result.get("etag"), last_modified=result.get("last_modified"))
+                scope_data[scope] = data or {}
+            except Exception as e:
+                logger.error("> %s: Failed to save %s: %s", self.file_name, scope, e)
+                self._keep_cached(scope)
+                scope_data[scope] = self._cached_or_current(scope) or {}
+        return scope_data
+
     def get_by_scope(self, scope: str):
-        file_path = f"{self.data_folder}/{scope}.json"
+        return self.get_scopes([scope])
+
+    def get_scopes(self, scopes):
+        """
+        Fetch the bot data document once (conditionally) and save every requested scope.
+
+        Returns the list of scopes whose data changed in ScopeStore.
+        """
+        etag, last_modified = self.cache.validators(scopes)
         try:
-            data = self.BNC.get_data(scope=scope)
-
-            if self.debug:
-                print(f"> {self.file_name}: Getting {scope} from BotNetworkConnection")
-                print(f"> {self.file_name}: Data: {data}")
-            
-            if data:
-                data_json = {scope: data}
-                save_json(data_json, file_path)
-                print(f"> {self.file_name}: Successfully fetched {scope} from BotNetworkConnection.")
-            else:
-                # If no data received, create empty file
-                save_json({}, file_path)
-                print(f"> {self.file_name}: No data in {scope}, created empty file for {scope}")
-                
+            with get_profiler().span("bnc.request", "scope"):
+                result = self.BNC.fetch_bot_data(etag=etag, last_modified=last_modified)
         except Exception as e:
-            print(f"> {self.file_name}: Failed to fetch {scope} from BotNetworkConnection: {e}")
-            save_json({}, file_path)
-            print(f"> {self.file_name}: Created empty fallback file for {scope}")
+            logger.error("> %s: %s", self.file_name, e)
+            result = None
+        return ScopeStore.update(self._apply_result(scopes, result))
 
     def get_all_available_scopes(self):
+        return self.get_scopes(self.default_scopes)
+
+    async def async_get_scopes(self, scopes):
+        """Async variant of get_scopes, returns the scopes that changed. Fetches through AsyncBotNetworkConnection without blocking the event loop"""
+        if self.async_BNC is None:
+            self.async_BNC = AsyncBotNetworkConnection()
+        etag, last_modified = await asyncio.to_thread(self.cache.validators, scopes)
+        try:
+            with get_profiler().span("bnc.request", "scope"):
+                result = await self.async_BNC.fetch_bot_data(etag=etag, last_modified=last_modified)
+        except Exception as e:
+            logger.error("> %s: %s", self.file_name, e)
+            result = None
+        scope_data = await asyncio.to_thread(self._apply_result, scopes, result)
+        # Publish on the event loop so subscribers never run in a worker thread
+        return ScopeStore.update(scope_data)
+
+    async def async_get_all_available_scopes(self):
+        return await self.async_get_scopes(self.default_scopes)
+
+
+class ScopeRefresher:
+    """
+    Background task that keeps BNC scopes fresh on the bot's event loop.
+
+    Polls BNC every `interval` seconds (BNC_REFRESH_INTERVAL, 300 when unset), or
+    right away when trigger() is called (e.g. from a push webhook). Changed
+    scopes are swapped into ScopeStore, which notifies its subscribers.
+    """
+    def __init__(self, data_fetching=None, interval=None, scopes=None, debug=False):
+        self.debug = debug
+        self.data_fetching = data_fetching or DataFetching(debug=debug)
+        self.interval = float(interval if interval is not None else Get_ENV("BNC_REFRESH_INTERVAL", default="300"))
+        self.scopes = scopes or self.data_fetching.default_scopes
+        self._task = None
+        self._loop = None
+        self._trigger = None
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self, loop=None):
+        """Start polling on the given (or running) event loop, returns the task"""
+        if self.running:
+            return self._task
+        self._loop = loop or asyncio.get_running_loop()
+        self._trigger = asyncio.Event()
+        self._task = self._loop.create_task(self._run())
+        return self._task
+
+    def trigger(self):
+        """Refresh as soon as possible, safe to call from any thread"""
+        if self._loop is not None and self._trigger is not None:
+            self._loop.call_soon_threadsafe(self._trigger.set)
+
+    async def refresh(self):
+        """Fetch all scopes once, returns the scopes that changed"""
+        changed = await self.data_fetching.async_get_scopes(self.scopes)
+        if changed:
+            logger.info("> ScopeRefresher: Reloaded %s", ', '.join(changed))
+        elif self.debug:
+            logger.debug("> ScopeRefresher: No scope changes")
+        return changed
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._trigger.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._trigger.clear()
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("> ScopeRefresher: Refresh failed: %s", e)
 
-        for scope in self.default_scopes:
-            self.get_by_scope(scope=scope)
\ No newline at end of file
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        if self.data_fetching.async_BNC is not None:
+            await self.data_fetching.async_BNC.close()
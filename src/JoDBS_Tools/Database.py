@@ -1,64 +1,365 @@
-import requests
+import asyncio, inspect, logging, random, threading, time
+import aiohttp, requests
 from pymongo import MongoClient, errors
+from .MongoBulk import BulkWriter
+from .MongoCache import CachedCollection
+from .Metrics import get_metrics
+from .MongoHealth import CommandMetrics, MongoHealth, PoolStats
 from .utils import Get_ENV, save_json
 
+logger = logging.getLogger(__name__)
+
+def conditional_headers(etag=None, last_modified=None):
+    """Build If-None-Match / If-Modified-Since headers from cached validators"""
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    return headers
+
+_mongo_clients = {}  # (connection_string, asynchronous) -> (client, health)
+_mongo_clients_lock = threading.Lock()
+
+
+def _async_mongo_client_class():
+    """pymongo's native asyncio client, or Motor on pymongo versions without it"""
+    try:
+        from pymongo import AsyncMongoClient
+        return AsyncMongoClient
+    except ImportError:
+        pass
+    try:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        return AsyncIOMotorClient
+    except ImportError:
+        raise ImportError("Async MongoDB needs pymongo>=4.9 or the motor package")
+
+
+def pool_options(max_pool_size=None, min_pool_size=None, max_idle_time_ms=None, wait_queue_timeout_ms=None,
+                 connect_timeout_ms=None, server_selection_timeout_ms=None):
+    """MongoClient keyword arguments for the pool settings that were given"""
+    options = {
+        "maxPoolSize": max_pool_size,
+        "minPoolSize": min_pool_size,
+        "maxIdleTimeMS": max_idle_time_ms,
+        "waitQueueTimeoutMS": wait_queue_timeout_ms,
+        "connectTimeoutMS": connect_timeout_ms,
+        "serverSelectionTimeoutMS": server_selection_timeout_ms
+    }
+    return {key: value for key, value in options.items() if value is not None}
+
+
+def get_mongo_client(connection_string, asynchronous=False, **options):
+    """
+    Process-wide Mongo client for a connection string, so every cog shares one pool.
+
+    The client is created on first use with `options` (see pool_options) and
+    does not connect until the first operation. Later calls get the same
+    client and their options are ignored.
+    """
+    return _shared_mongo_client(connection_string, asynchronous, options)[0]
+
+
+def get_mongo_health(connection_string, asynchronous=False):
+    """MongoHealth of the shared client for a connection string, creating the client if needed"""
+    return _shared_mongo_client(connection_string, asynchronous, {})[1]
+
+
+def _create_mongo_client(connection_string, asynchronous, options):
+    pool_stats = PoolStats()
+    listeners = [pool_stats, CommandMetrics()]
+    if asynchronous:
+        client = _async_mongo_client_class()(connection_string, event_listeners=listeners, **options)
+    else:
+        client = MongoClient(connection_string, connect=False, event_listeners=listeners, **options)
+    return client, MongoHealth(client, pool_stats)
+
+
+def _shared_mongo_client(connection_string, asynchronous, options):
+    key = (connection_string, asynchronous)
+    with _mongo_clients_lock:
+        entry = _mongo_clients.get(key)
+        if entry is None:
+            entry = _mongo_clients[key] = _create_mongo_client(connection_string, asynchronous, options)
+        return entry
+
+
+async def close_mongo_clients():
+    """Close every shared Mongo client, call it once on shutdown"""
+    with _mongo_clients_lock:
+        clients = [client for client, _ in _mongo_clients.values()]
+        _mongo_clients.clear()
+    for client in clients:
+        result = client.close()
+        if inspect.isawaitable(result):
+            await result
+
+
 class MongoClientConnection:
-    def __init__(self, connection_string=None, collection=None, database_name=None):
+    def __init__(self, connection_string=None, collection=None, database_name=None, max_pool_size=None, min_pool_size=None,
+                 max_idle_time_ms=None, connect_timeout_ms=None, server_selection_timeout_ms=None, shared=True):
         self.connection_string = connection_string or Get_ENV("CONNECTION_STRING")
         self.collection = collection
         self.database_name = database_name or Get_ENV("DATABASE_NAME")
+        self.client_options = pool_options(max_pool_size, min_pool_size, max_idle_time_ms, None, connect_timeout_ms, server_selection_timeout_ms)
+        self.shared = shared
         self.client = None
+        self.health = None
         self.db = None
+        self.bulk_writers = {}
+        self.cached_collections = {}
+
+    def _ensure_client(self):
+        # Reuse the established client, pymongo reconnects on its own
+        if self.client is None:
+            if self.shared:
+                self.client, self.health = _shared_mongo_client(self.connection_string, False, self.client_options)
+            else:
+                self.client, self.health = _create_mongo_client(self.connection_string, False, self.client_options)
+        return self.client
 
     def connect(self):
         try:
-            self.client = MongoClient(self.connection_string)
+            self._ensure_client()
             if not self.database_name:
                 raise errors.ConfigurationError("No default database defined")
             self.db = self.client[self.database_name]
             self.ensure_collection_exists()
-            print("MongoDB Connection: Successful ✔️")
+            logger.info("MongoDB Connection: Successful ✔️")
         except errors.ServerSelectionTimeoutError as err:
-            print(f"MongoDB Connection: Failed ❌ - {err}")
+            logger.error("MongoDB Connection: Failed ❌ - %s", err)
             raise Exception("MongoDB Connection: Failed ❌")
         except errors.ConfigurationError as err:
-            print(f"MongoDB Configuration Error: ❌ - {err}")
+            logger.error("MongoDB Configuration Error: ❌ - %s", err)
             raise Exception("MongoDB Configuration Error: ❌")
 
     def get_database(self):
-        if not self.db:
+        # pymongo Database objects don't support truth testing
+        if self.db is None:
             self.connect()
         return self.db
     
-    def exists(self):
-        try:
-            self.client.server_info()
-            return True
-        except errors.ServerSelectionTimeoutError:
-            return False
+    def exists(self, max_age=None):
+        """Whether the server is reachable, from a ping cached for max_age seconds (default 5)"""
+        self._ensure_client()
+        return self.health.ping(max_age)
     
     def create_collection(self, collection_name):
         try:
             self.db.create_collection(collection_name)
-            print(f"Collection '{collection_name}' created successfully.")
+            self.health.mark_collection(self.database_name, collection_name)
+            logger.info("Collection '%s' created successfully.", collection_name)
         except errors.CollectionInvalid as err:
-            print(f"Collection '{collection_name}' creation failed. Error: {err}")
+            logger.error("Collection '%s' creation failed. Error: %s", collection_name, err)
             raise Exception(f"Collection '{collection_name}' creation failed. Error: {err}")
         
     def ensure_collection_exists(self):
-        if self.collection not in self.db.list_collection_names():
+        if not self.collection or self.health.has_collection(self.database_name, self.collection):
+            return
+        if self.db.list_collection_names(filter={"name": self.collection}):
+            self.health.mark_collection(self.database_name, self.collection)
+        else:
             self.create_collection(self.collection)
     
-    def check_status(self):
+    def check_status(self, max_age=None):
         try:
-            if not self.db:
+            if self.db is None:
                 self.connect()
-            self.client.server_info()
-            print("MongoDB Connection: Successful ✔️")
+            if not self.health.ping(max_age):
+                raise errors.ServerSelectionTimeoutError(self.health.stats()["error"])
+            logger.info("MongoDB Connection: Successful ✔️")
         except errors.ServerSelectionTimeoutError as err:
-            print(f"MongoDB Connection: Failed ❌ - {err}")
+            logger.error("MongoDB Connection: Failed ❌ - %s", err)
             raise Exception("MongoDB Connection: Failed ❌")
 
+    def stats(self):
+        """Cached ping result, latency and connection pool counters"""
+        self._ensure_client()
+        return self.health.stats()
+
+    def bulk_writer(self, collection_name=None, **options):
+        """
+        Shared BulkWriter for a collection (defaults to this connection's collection).
+
+        Options (flush_interval, flush_threshold, max_batch, max_retries) apply when the writer is first created.
+        """
+        collection_name = collection_name or self.collection
+        writer = self.bulk_writers.get(collection_name)
+        if writer is None:
+            writer = self.bulk_writers[collection_name] = BulkWriter(self.get_database()[collection_name], **options)
+        return writer
+
+    async def flush_writes(self):
+        """Flush every bulk writer of this connection"""
+        for writer in list(self.bulk_writers.values()):
+            await writer.flush()
+
+    def cached_collection(self, collection_name=None, watch=False, **options):
+        """
+        Shared CachedCollection for a collection (defaults to this connection's collection).
+
+        Options (max_size, ttl, negative_ttl) apply when the cache is first created.
+        With watch=True a change stream invalidates entries; call it from the event loop then.
+        """
+        collection_name = collection_name or self.collection
+        cache = self.cached_collections.get(collection_name)
+        if cache is None:
+            cache = self.cached_collections[collection_name] = CachedCollection(self.get_database()[collection_name], **options)
+        if watch:
+            cache.watch()
+        return cache
+
+class AsyncMongoClientConnection:
+    """
+    asyncio MongoDB connection for cogs, so queries never block the event loop.
+
+    Uses pymongo's AsyncMongoClient (Motor on older pymongo) from the shared
+    client registry: every connection with the same connection string uses
+    one client and one pool. Nothing connects until the first query or connect().
+
+    Example:
+        mongo = AsyncMongoClientConnection(collection="guilds", max_pool_size=50)
+        settings = await mongo.get_collection().find_one({"_id": guild.id})
+    """
+    def __init__(self, connection_string=None, collection=None, database_name=None, max_pool_size=None, min_pool_size=None,
+                 max_idle_time_ms=None, wait_queue_timeout_ms=None, connect_timeout_ms=None, server_selection_timeout_ms=None, shared=True):
+        self.connection_string = connection_string or Get_ENV("CONNECTION_STRING")
+        self.collection = collection
+        self.database_name = database_name or Get_ENV("DATABASE_NAME")
+        self.client_options = pool_options(max_pool_size, min_pool_size, max_idle_time_ms, wait_queue_timeout_ms,
+                                           connect_timeout_ms, server_selection_timeout_ms)
+        self.shared = shared
+        self._client = None
+        self._health = None
+        self.bulk_writers = {}
+        self.cached_collections = {}
+
+    def _ensure_client(self):
+        if self._client is None:
+            if self.shared:
+                self._client, self._health = _shared_mongo_client(self.connection_string, True, self.client_options)
+            else:
+                self._client, self._health = _create_mongo_client(self.connection_string, True, self.client_options)
+
+    @property
+    def client(self):
+        self._ensure_client()
+        return self._client
+
+    @property
+    def health(self):
+        self._ensure_client()
+        return self._health
+
+    @property
+    def db(self):
+        if not self.database_name:
+            raise errors.ConfigurationError("No default database defined")
+        return self.client[self.database_name]
+
+    def get_database(self):
+        return self.db
+
+    def get_collection(self, name=None):
+        return self.db[name or self.collection]
+
+    async def connect(self):
+        """Check the server is reachable and the collection exists"""
+        try:
+            if not await self.health.aping(max_age=0):
+                raise errors.ServerSelectionTimeoutError(self.health.stats()["error"])
+            if self.collection:
+                await self.ensure_collection_exists()
+            logger.info("MongoDB Connection: Successful ✔️")
+        except errors.ServerSelectionTimeoutError as err:
+            logger.error("MongoDB Connection: Failed ❌ - %s", err)
+            raise Exception("MongoDB Connection: Failed ❌")
+        except errors.ConfigurationError as err:
+            logger.error("MongoDB Configuration Error: ❌ - %s", err)
+            raise Exception("MongoDB Configuration Error: ❌")
+
+    async def create_collection(self, collection_name):
+        try:
+            await self.db.create_collection(collection_name)
+            self.health.mark_collection(self.database_name, collection_name)
+            logger.info("Collection '%s' created successfully.", collection_name)
+        except errors.CollectionInvalid as err:
+            logger.error("Collection '%s' creation failed. Error: %s", collection_name, err)
+            raise Exception(f"Collection '{collection_name}' creation failed. Error: {err}")
+
+    async def ensure_collection_exists(self):
+        if not self.collection or self.health.has_collection(self.database_name, self.collection):
+            return
+        if await self.db.list_collection_names(filter={"name": self.collection}):
+            self.health.mark_collection(self.database_name, self.collection)
+        else:
+            await self.create_collection(self.collection)
+
+    async def exists(self, max_age=None):
+        """Whether the server is reachable, from a ping cached for max_age seconds (default 5)"""
+        return await self.health.aping(max_age)
+
+    async def check_status(self, max_age=None):
+        try:
+            if not await self.health.aping(max_age):
+                raise errors.ServerSelectionTimeoutError(self.health.stats()["error"])
+            logger.info("MongoDB Connection: Successful ✔️")
+        except errors.ServerSelectionTimeoutError as err:
+            logger.error("MongoDB Connection: Failed ❌ - %s", err)
+            raise Exception("MongoDB Connection: Failed ❌")
+
+    def stats(self):
+        """Cached ping result, latency and connection pool counters"""
+        return self.health.stats()
+
+    def bulk_writer(self, collection_name=None, **options):
+        """
+        Shared BulkWriter for a collection (defaults to this connection's collection).
+
+        Options (flush_interval, flush_threshold, max_batch, max_retries) apply when the writer is first created.
+        """
+        collection_name = collection_name or self.collection
+        writer = self.bulk_writers.get(collection_name)
+        if writer is None:
+            writer = self.bulk_writers[collection_name] = BulkWriter(self.get_collection(collection_name), **options)
+        return writer
+
+    async def flush_writes(self):
+        """Flush every bulk writer of this connection"""
+        for writer in list(self.bulk_writers.values()):
+            await writer.flush()
+
+    def cached_collection(self, collection_name=None, watch=False, **options):
+        """
+        Shared CachedCollection for a collection (defaults to this connection's collection).
+
+        Options (max_size, ttl, negative_ttl) apply when the cache is first created.
+        With watch=True a change stream invalidates entries; call it from the event loop then.
+        """
+        collection_name = collection_name or self.collection
+        cache = self.cached_collections.get(collection_name)
+        if cache is None:
+            cache = self.cached_collections[collection_name] = CachedCollection(self.get_collection(collection_name), **options)
+        if watch:
+            cache.watch()
+        return cache
+
+    async def close(self):
+        """Flush bulk writes and close a private client; shared clients stay open for other cogs (see close_mongo_clients)"""
+        for writer in list(self.bulk_writers.values()):
+            await writer.close()
+        self.bulk_writers.clear()
+        for cache in list(self.cached_collections.values()):
+            await cache.close()
+        self.cached_collections.clear()
+        if self._client is not None and not self.shared:
+            result = self._client.close()
+            if inspect.isawaitable(result):
+                await result
+        self._client = None
+        self._health = None
+
 class BotNetworkConnection:
     def __init__(self, base_url=None, api_key=None, application_id=None):
         self.base_url = base_url or Get_ENV(key="BNC_BASE_URL")
@@ -68,6 +369,9 @@ class BotNetworkConnection:
             "x-api-key": self.token,
             "Content-Type": "application/json"
         }
+        # Reuse one pooled keep-alive session instead of a new TCP/TLS connection per request
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
 
 
     def _handle_response(self, response):
@@ -77,47 +381,86 @@ class BotNetworkConnection:
             else:
                 response.raise_for_status()
         except Exception as e:
-            print(f"Error handling response: {e}")
+            logger.error("Error handling response: %s", e)
+            return None
+
+    @staticmethod
+    def extract_scope(data, scope):
+        """Pick a single scope out of the bot data document"""
+        if not isinstance(data, dict):
             return None
+        return (data.get('data') or {}).get(scope)
         
 
+    def _get(self, path, headers=None):
+        started = time.perf_counter()
+        status = "error"
+        try:
+            response = self.session.get(f"{self.base_url}{path}", headers=headers)
+            status = response.status_code
+            return response
+        finally:
+            get_metrics().observe("bnc_request_seconds", time.perf_counter() - started, method="GET", path=path, status=status)
+
     def check_status(self):
-        url = f"{self.base_url}/api/status"
         try:
-            response = requests.get(url, headers=self.headers)
+            response = self._get("/api/status")
             response.raise_for_status()
-            print("BotNetworkConnection: ✔️")
+            logger.info("BotNetworkConnection: ✔️")
             return response.json()
         except requests.exceptions.ConnectionError:
-            print("BotNetworkConnection: Connection Error ❌ - Please check if the BotNetworkConnection server is running.")
+            logger.error("BotNetworkConnection: Connection Error ❌ - Please check if the BotNetworkConnection server is running.")
             return None
         except requests.exceptions.HTTPError as err:
-            print(f"BotNetworkConnection: Failed ❌ - {err}")
+            logger.error("BotNetworkConnection: Failed ❌ - %s", err)
             raise Exception("BotNetworkConnection: Failed ❌")
 
-    def get_data(self, scope="none"):
+    def fetch_bot_data(self, etag=None, last_modified=None):
+        """
+        Fetch the bot data document, sending conditional headers when validators are given.
+
+        Returns a dict with status, data, etag and last_modified, or None if the request failed.
+        A 304 Not Modified comes back with status 304 and data None.
+        """
         try:
             if self.application_id is None:
                 raise ValueError("BotNetworkConnection: Application ID is required.")
-            
-            url = f"{self.base_url}/api/bots/data/{self.application_id}"
-            response = requests.get(url, headers=self.headers)
+
+            response = self._get(f"/api/bots/data/{self.application_id}", headers=conditional_headers(etag, last_modified))
+            if response.status_code == 304:
+                return {"status": 304, "data": None, "etag": etag, "last_modified": last_modified}
+
             data = self._handle_response(response)
-            
             if data is None:
                 raise Exception("BotNetworkConnection: Failed to fetch data.")
-                
-            match scope:
-                case "version":
-                    return data.get('data', {}).get('version')
-                case "roles":
-                    return data.get('data', {}).get('roles')
-                case _:
-                    return False
-                
+            return {
+                "status": response.status_code,
+                "data": data,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified")
+            }
+
         except Exception as e:
-            print(f"BotNetworkConnection: {e}")
+            logger.error("BotNetworkConnection: %s", e)
+            return None
+
+    def get_bot_data(self):
+        """Fetch the whole bot data document once"""
+        result = self.fetch_bot_data()
+        return result["data"] if result else None
+
+    def get_data(self, scope="none"):
+        data = self.get_bot_data()
+        if data is None:
+            return None
+        return self.extract_scope(data, scope)
+
+    def get_scopes(self, scopes):
+        """Fetch the bot data document once and split it into every requested scope"""
+        data = self.get_bot_data()
+        if data is None:
             return None
+        return {scope: self.extract_scope(data, scope) for scope in scopes}
             
 
     # def create_data(self, data):
@@ -140,4 +483,149 @@ class BotNetworkConnection:
     # def delete_data(self):
     #     url = f"{self.base_url}/data/{self.application_id}"
     #     response = requests.delete(url, headers=self.headers)
-    #     return self._handle_response(response)
\ No newline at end of file
+    #     return self._handle_response(response)
+
+
+class AsyncBotNetworkConnection:
+    """
+    asyncio-native BotNetworkConnection client.
+
+    Keeps one pooled aiohttp session with keep-alive for its whole lifetime,
+    applies timeouts and retries failed requests with exponential backoff.
+    Use it from the bot's event loop, and close() it on shutdown.
+    """
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self, base_url=None, api_key=None, application_id=None, timeout=10.0, retries=3, backoff=0.5, pool_size=10):
+        self.base_url = base_url or Get_ENV(key="BNC_BASE_URL")
+        self.token = api_key or Get_ENV(key="BNC_API_KEY")
+        self.application_id = application_id or Get_ENV(key="APPLICATION_ID")
+        self.headers = {
+            "x-api-key": self.token,
+            "Content-Type": "application/json"
+        }
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.pool_size = pool_size
+        self.session = None
+        self._inflight = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def _get_session(self):
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60)
+            self.session = aiohttp.ClientSession(headers=self.headers, timeout=self.timeout, connector=connector)
+        return self.session
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    async def _request(self, method, path, headers=None):
+        """
+        Send a request, retrying connection errors, timeouts and 429/5xx responses with backoff.
+
+        Returns (status, headers, json body). The body is None for 304 Not Modified.
+        """
+        url = f"{self.base_url}{path}"
+        metrics = get_metrics()
+        for attempt in range(self.retries + 1):
+            started = time.perf_counter()
+            status = "error"
+            try:
+                async with self._get_session().request(method, url, headers=headers) as response:
+                    status = response.status
+                    if response.status in self.RETRY_STATUSES and attempt < self.retries:
+                        reason = f"HTTP {response.status}"
+                    elif response.status == 304:
+                        return response.status, response.headers, None
+                    else:
+                        response.raise_for_status()
+                        return response.status, response.headers, await response.json(content_type=None)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as err:
+                if attempt >= self.retries:
+                    raise
+                reason = repr(err)
+            finally:
+                metrics.observe("bnc_request_seconds", time.perf_counter() - started, method=method, path=path, status=status)
+
+            metrics.inc("bnc_retries_total", method=method, path=path)
+            delay = self.backoff * (2 ** attempt) + random.uniform(0, self.backoff)
+            logger.warning("BotNetworkConnection: %s %s failed (%s), retrying in %.1fs", method, path, reason, delay)
+            await asyncio.sleep(delay)
+
+    async def check_status(self):
+        try:
+            _, _, data = await self._request("GET", "/api/status")
+            logger.info("BotNetworkConnection: ✔️")
+            return data
+        except aiohttp.ClientConnectionError:
+            logger.error("BotNetworkConnection: Connection Error ❌ - Please check if the BotNetworkConnection server is running.")
+            return None
+        except aiohttp.ClientResponseError as err:
+            logger.error("BotNetworkConnection: Failed ❌ - %s", err)
+            raise Exception("BotNetworkConnection: Failed ❌")
+        except asyncio.TimeoutError:
+            logger.error("BotNetworkConnection: Timed out ❌")
+            return None
+
+    async def _fetch_bot_data(self, etag, last_modified):
+        try:
+            if self.application_id is None:
+                raise ValueError("BotNetworkConnection: Application ID is required.")
+            status, headers, data = await self._request(
+                "GET",
+                f"/api/bots/data/{self.application_id}",
+                headers=conditional_headers(etag, last_modified)
+            )
+            if status == 304:
+                return {"status": 304, "data": None, "etag": etag, "last_modified": last_modified}
+            return {
+                "status": status,
+                "data": data,
+                "etag": headers.get("ETag"),
+                "last_modified": headers.get("Last-Modified")
+            }
+        except Exception as e:
+            logger.error("BotNetworkConnection: Failed to fetch data: %s", e)
+            return None
+
+    async def fetch_bot_data(self, etag=None, last_modified=None):
+        """
+        Fetch the bot data document, sending conditional headers when validators are given.
+
+        Returns a dict with status, data, etag and last_modified, or None if the request failed.
+        Concurrent callers with the same validators share one in-flight request.
+        """
+        key = (etag, last_modified)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_bot_data(etag, last_modified))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def get_bot_data(self):
+        """Fetch the whole bot data document once"""
+        result = await self.fetch_bot_data()
+        return result["data"] if result else None
+
+    async def get_data(self, scope="none"):
+        data = await self.get_bot_data()
+        if data is None:
+            return None
+        return BotNetworkConnection.extract_scope(data, scope)
+
+    async def get_scopes(self, scopes):
+        """Fetch the bot data document once and split it into every requested scope"""
+        data = await self.get_bot_data()
+        if data is None:
+            return None
+        return {scope: BotNetworkConnection.extract_scope(data, scope) for scope in scopes}
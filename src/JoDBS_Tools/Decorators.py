@@ -1,8 +1,19 @@
-import functools
+import functools, logging, time
 from nextcord.ext import commands
 from nextcord import Interaction, Member
-from .utils import load_json
-from datetime import datetime, timedelta
+from .Metrics import get_metrics
+from .RoleIndex import RoleIndex
+from .Cooldowns import CooldownBackend, RateLimiter, set_default_backend
+
+logger = logging.getLogger(__name__)
+
+def _record_check(check, command, started, allowed):
+    """Time spent deciding whether a command may run, and how often it may not"""
+    metrics = get_metrics()
+    if metrics.enabled:
+        metrics.observe("check_seconds", time.perf_counter() - started, check=check, command=command)
+        if not allowed:
+            metrics.inc("check_denied_total", check=check, command=command)
 
 class Permission_Checks:
     @staticmethod
@@ -16,9 +27,12 @@ class Permission_Checks:
         Returns:
             function: The wrapped function which includes the role check.
         """
+        required_names = (role_name,)
+
         def decorator(func):
             @functools.wraps(func)
             async def wrapper(*args, **kwargs):
+                started = time.perf_counter()
                 # Find the Interaction object in the arguments
                 interaction = next((arg for arg in args if isinstance(arg, Interaction)), None)
 
@@ -26,14 +40,10 @@ class Permission_Checks:
                     raise TypeError("Interaction object not found in arguments")
 
                 try:
-                    roles_data = load_json(file_path="./data/roles.json") or {}
                     if isinstance(interaction.user, Member):
-                        server_id = str(interaction.guild.id)
-                        member_role_ids = [role.id for role in interaction.user.roles]
-                        server_roles = roles_data.get(server_id, {})
-                        required_role_id = server_roles.get(role_name)
-
-                        if required_role_id and int(required_role_id) in member_role_ids:
+                        allowed = RoleIndex.member_has_any(interaction.user, interaction.guild.id, required_names)
+                        _record_check("has_role", func.__name__, started, allowed)
+                        if allowed:
                             # User has the required role; proceed with the command
                             return await func(*args, **kwargs)
                         else:
@@ -41,17 +51,19 @@ class Permission_Checks:
                                 "You do not have the required role to use this command.",
                                 ephemeral=True
                             )
-                            print(f"[INFO] Missing role for user {interaction.user} in command {interaction.application_command.name}.")
+                            logger.info("Missing role for user %s in command %s.", interaction.user, interaction.application_command.name)
                             return
                     else:
+                        _record_check("has_role", func.__name__, started, False)
                         await interaction.send(
                             "This command cannot be used in DMs.",
                             ephemeral=True
                         )
-                        print(f"[INFO] Command {interaction.application_command.name} attempted in DMs by user {interaction.user}.")
+                        logger.info("Command %s attempted in DMs by user %s.", interaction.application_command.name, interaction.user)
                         return
                 except Exception as e:
-                    print(f"Error in role check: {e}")
+                    get_metrics().inc("command_errors_total", command=func.__name__)
+                    logger.error("Error in role check: %s", e)
                     await interaction.send(
                         "An error occurred while checking this role based command.",
                         ephemeral=True
@@ -70,42 +82,42 @@ class Permission_Checks:
         Returns:
             function: The wrapped function which includes the role check.
         """
+        required_names = tuple(role_names)
+
         def decorator(func):
             @functools.wraps(func)
             async def wrapper(*args, **kwargs):
+                started = time.perf_counter()
                 interaction = next((arg for arg in args if isinstance(arg, Interaction)), None)
                 
                 if interaction is None:
                     raise TypeError("Interaction object not found in arguments")
 
                 try:
-                    roles_data = load_json(file_path="./data/roles.json") or {}
                     if isinstance(interaction.user, Member):
-                        server_id = str(interaction.guild.id)
-                        member_role_ids = [role.id for role in interaction.user.roles]
-                        server_roles = roles_data.get(server_id, {})
-                        
                         # Check if user has any of the required roles
-                        for role_name in role_names:
-                            required_role_id = server_roles.get(role_name)
-                            if required_role_id and int(required_role_id) in member_role_ids:
-                                return await func(*args, **kwargs)
+                        allowed = RoleIndex.member_has_any(interaction.user, interaction.guild.id, required_names)
+                        _record_check("has_any_roles", func.__name__, started, allowed)
+                        if allowed:
+                            return await func(*args, **kwargs)
                         
                         await interaction.send(
                             f"You need one of these roles to use this command: {', '.join(role_names)}",
                             ephemeral=True
                         )
-                        print(f"[INFO] Missing roles for user {interaction.user} in command {interaction.application_command.name}.")
+                        logger.info("Missing roles for user %s in command %s.", interaction.user, interaction.application_command.name)
                         return
                     else:
+                        _record_check("has_any_roles", func.__name__, started, False)
                         await interaction.send(
                             "This command cannot be used in DMs.",
                             ephemeral=True
                         )
-                        print(f"[INFO] Command {interaction.application_command.name} attempted in DMs by user {interaction.user}.")
+                        logger.info("Command %s attempted in DMs by user %s.", interaction.application_command.name, interaction.user)
                         return
                 except Exception as e:
-                    print(f"Error in role check: {e}")
+                    get_metrics().inc("command_errors_total", command=func.__name__)
+                    logger.error("Error in role check: %s", e)
                     await interaction.send(
                         "An error occurred while checking this role based command.",
                         ephemeral=True
@@ -114,53 +126,66 @@ class Permission_Checks:
         return decorator
 
 class Cooldown_Checks:
-    _cooldowns = {}
+    @classmethod
+    def set_backend(cls, backend: CooldownBackend):
+        """
+        Use another cooldown store, e.g. SQLiteCooldownBackend to share cooldowns across shards and restarts.
+        """
+        set_default_backend(backend)
+
+    @staticmethod
+    def limiter(name, rate=1, per=60.0, burst=None, type=commands.BucketType.user, backend=None) -> RateLimiter:
+        """
+        Create a RateLimiter for programmatic throttling outside of the decorator.
+
+        Example:
+            limiter = Cooldown_Checks.limiter("export", rate=3, per=60, type=commands.BucketType.guild)
+            retry_after = limiter.check(interaction)
+        """
+        return RateLimiter(name, rate=rate, per=per, burst=burst, type=type, backend=backend)
 
     @classmethod
-    def protected_command(cls, rate=1, per=60.0, type=commands.BucketType.user):
+    def protected_command(cls, rate=1, per=60.0, type=commands.BucketType.user, burst=None):
         """
-        A decorator to add cooldown to slash commands.
+        A decorator to add a rate limit to slash commands.
+
+        Uses a token bucket: `rate` uses per `per` seconds, with up to `burst` uses at once.
         
         Args:
             rate (int): Number of uses allowed
             per (float): Cooldown period in seconds
-            type (commands.BucketType): The type of cooldown (user, guild, etc.)
+            type (commands.BucketType): The type of cooldown (user, guild, channel, member, category, role or default)
+            burst (int, optional): Max uses at once, defaults to rate
         """
         def decorator(func):
+            limiter = RateLimiter(f"{func.__module__}.{func.__qualname__}", rate=rate, per=per, burst=burst, type=type)
+
             @functools.wraps(func)
             async def wrapper(*args, **kwargs):
+                started = time.perf_counter()
                 interaction = next((arg for arg in args if isinstance(arg, Interaction)), None)
                 if not interaction:
                     raise TypeError("Interaction object not found in arguments")
 
-                # Create cooldown key based on type
-                if type == commands.BucketType.user:
-                    key = f"{func.__name__}:{interaction.user.id}"
-                elif type == commands.BucketType.guild:
-                    key = f"{func.__name__}:{interaction.guild.id}"
-                else:
-                    key = f"{func.__name__}:global"
-
-                current_time = datetime.now()
-                if key in cls._cooldowns:
-                    remaining = (cls._cooldowns[key] - current_time).total_seconds()
-                    if remaining > 0:
-                        await interaction.response.send_message(
-                            f"Please wait {round(remaining, 1)} seconds before using this command again.",
-                            ephemeral=True
-                        )
-                        return
+                remaining = limiter.check(interaction)
+                _record_check("cooldown", func.__name__, started, remaining <= 0)
+                if remaining > 0:
+                    await interaction.response.send_message(
+                        f"Please wait {round(remaining, 1)} seconds before using this command again.",
+                        ephemeral=True
+                    )
+                    return
 
-                # Execute command and set cooldown
                 try:
                     await func(*args, **kwargs)
-                    cls._cooldowns[key] = current_time + timedelta(seconds=per)
                 except Exception as e:
-                    print(f"Error in cooldown protected command: {e}")
+                    get_metrics().inc("command_errors_total", command=func.__name__)
+                    logger.error("Error in cooldown protected command: %s", e)
                     await interaction.response.send_message(
                         "An error occurred while processing the command.",
                         ephemeral=True
                     )
 
+            wrapper.limiter = limiter
             return wrapper
-        return decorator
\ No newline at end of file
+        return decorator
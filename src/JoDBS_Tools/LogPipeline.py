@@ -0,0 +1,197 @@
+import atexit, json, logging, os, queue, sys, threading, time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Optional, Union
+
+ROOT_LOGGER = "JoDBS_Tools"
+
+# LogRecord attributes that aren't user supplied `extra` fields
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "sample"}
+
+# extra= for records SamplingFilter must never drop, like startup reports
+UNSAMPLED = {"sample": False}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, `extra` fields and the traceback"""
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class ConsoleFormatter(logging.Formatter):
+    """The library's old console look: plain INFO lines, other levels prefixed like [DEBUG]"""
+    def format(self, record):
+        message = super().format(record)
+        if record.levelno == logging.INFO:
+            return message
+        return f"[{record.levelname}] {message}"
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Let at most `burst` records through per `per` seconds for each message template.
+
+    Records are keyed by logger, level and the unformatted message, so
+    `logger.debug("Handling %s", custom_id)` is one stream however many IDs it
+    logs. The next record let through after a suppressed stretch carries a
+    `suppressed` count. Only records up to `max_level` (DEBUG) are sampled,
+    or up to INFO for the loggers named in `loggers` and their children.
+    Records logged with `extra=UNSAMPLED` always pass.
+    """
+    def __init__(self, burst: int = 20, per: float = 60.0, max_level: int = logging.DEBUG, loggers=()):
+        super().__init__()
+        self.burst = burst
+        self.per = per
+        self.max_level = max_level
+        self.loggers = tuple(loggers)
+        self._windows: Dict[tuple, list] = {}  # key -> [window start, count, suppressed]
+        self._lock = threading.Lock()
+
+    def _sampled(self, record):
+        if getattr(record, "sample", True) is False or record.levelno > max(self.max_level, logging.INFO):
+            return False
+        if record.levelno <= self.max_level:
+            return True
+        return any(record.name == name or record.name.startswith(f"{name}.") for name in self.loggers)
+
+    def filter(self, record):
+        if not self._sampled(record):
+            return True
+        key = (record.name, record.levelno, record.msg if isinstance(record.msg, str) else type(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.per:
+                suppressed = window[2] if window is not None else 0
+                if len(self._windows) > 10000:
+                    self._windows.clear()
+                self._windows[key] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                    record.msg = f"{record.msg} ({suppressed} similar suppressed)"
+                return True
+            if window[1] < self.burst:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+
+class _QueueHandler(QueueHandler):
+    def prepare(self, record):
+        # Render the message now, arguments may change before the writer thread gets to it.
+        # The record stays in-process, so the traceback is formatted by the writer thread
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+
+
+def _parse_levels(levels: Union[str, Dict[str, Union[str, int]], None]) -> Dict[str, Union[str, int]]:
+    """'Database=DEBUG,UI.CustomUI=WARNING' or a dict, relative to the library logger"""
+    if not levels:
+        return {}
+    if isinstance(levels, dict):
+        return levels
+    parsed = {}
+    for item in levels.split(","):
+        if "=" in item:
+            name, level = item.split("=", 1)
+            parsed[name.strip()] = level.strip().upper()
+    return parsed
+
+
+def setup_logging(level: Union[str, int] = "INFO", file_path: Optional[str] = None, format: str = "text",
+                  console: bool = True, levels=None, max_bytes: int = 5 * 1024 * 1024, backups: int = 3,
+                  sample_burst: Optional[int] = None, sample_per: float = 60.0, sample_loggers=()) -> QueueListener:
+    """
+    Send the library's logs through a queue to a background writer thread.
+
+    Logging calls only put the record on a queue, so the event loop never
+    waits on a console or disk write. The writer thread prints to stdout and,
+    when `file_path` is given, appends to a rotating log file. Calling it
+    again replaces the previous setup.
+
+    Args:
+        level: Level of the JoDBS_Tools logger, e.g. 'INFO' or 'DEBUG'.
+        file_path (str, optional): Rotating log file, None (default) to log to the console only.
+        format (str): 'text' or 'json' (one JSON object per line) for the log file.
+        console (bool): Also write to stdout.
+        levels: Per-module levels, e.g. {'Database': 'DEBUG'} or 'Database=DEBUG,UI.CustomUI=WARNING'.
+        max_bytes (int): Size at which the log file is rotated.
+        backups (int): Number of rotated files to keep (<file>.1, <file>.2, ...).
+        sample_burst (int, optional): Records per DEBUG message template per `sample_per` seconds,
+            None (default) to keep everything. See SamplingFilter.
+        sample_loggers: Modules whose INFO records are sampled too, e.g. ['UI.InteractionRouter'].
+
+    Returns:
+        The running QueueListener.
+    """
+    global _listener, _queue_handler
+    if format not in ("text", "json"):
+        raise ValueError(f"Unknown log format '{format}', expected 'text' or 'json'")
+    shutdown_logging()
+
+    handlers = []
+    if console:
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(ConsoleFormatter("%(message)s"))
+        handlers.append(stream)
+    if file_path:
+        folder = os.path.dirname(os.path.abspath(file_path))
+        os.makedirs(folder, exist_ok=True)
+        file_handler = RotatingFileHandler(file_path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8", delay=True)
+        if format == "json":
+            file_handler.setFormatter(JSONFormatter())
+        else:
+            file_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)-8s %(name)s: %(message)s"))
+        handlers.append(file_handler)
+
+    queue_handler = _QueueHandler(queue.SimpleQueue())
+    if sample_burst:
+        loggers = [f"{ROOT_LOGGER}.{name}" for name in sample_loggers]
+        queue_handler.addFilter(SamplingFilter(sample_burst, sample_per, loggers=loggers))
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(level if isinstance(level, int) else str(level).upper())
+    root.addHandler(queue_handler)
+    root.propagate = False
+    for name, module_level in _parse_levels(levels).items():
+        logging.getLogger(f"{ROOT_LOGGER}.{name}").setLevel(module_level)
+
+    listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    listener.start()
+    _listener, _queue_handler = listener, queue_handler
+    return listener
+
+
+def shutdown_logging():
+    """Write out queued records and stop the writer thread, runs on interpreter exit too"""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        root = logging.getLogger(ROOT_LOGGER)
+        root.removeHandler(_queue_handler)
+        root.propagate = True
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+atexit.register(shutdown_logging)
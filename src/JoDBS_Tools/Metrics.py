@@ -0,0 +1,312 @@
+import asyncio, contextlib, functools, logging, math, os, threading, time
+from typing import Dict, Optional, Tuple
+from aiohttp import web
+from .utils import save_json_atomic
+
+logger = logging.getLogger(__name__)
+
+_NULL_TIMER = contextlib.nullcontext()
+QUANTILES = {0.5: "p50", 0.9: "p90", 0.99: "p99", 0.999: "p999"}
+
+
+class Counter:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    """
+    Latency histogram with HDR-style log-linear buckets.
+
+    Values are kept in microseconds. Below 2**(precision + 1) µs every value
+    has its own bucket; above that each power of two is split into
+    2**precision buckets, so a bucket is at most ~6% wide at the default
+    precision. Recording is O(1) and a histogram spanning microseconds to
+    minutes needs only a few hundred buckets.
+    """
+    __slots__ = ('precision', '_linear', 'counts', 'count', 'sum', 'min', 'max', '_lock')
+
+    def __init__(self, precision: int = 4):
+        self.precision = precision
+        self._linear = 1 << (precision + 1)
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+        self._lock = threading.Lock()
+
+    def _index(self, micros: int) -> int:
+        if micros < self._linear:
+            return micros
+        shift = micros.bit_length() - self.precision - 1
+        return (shift << self.precision) + (micros >> shift)
+
+    def _bounds(self, index: int) -> Tuple[int, int]:
+        """Lowest and first excluded microsecond value of a bucket"""
+        if index < self._linear:
+            return index, index + 1
+        shift = (index >> self.precision) - 1
+        mantissa = index - (shift << self.precision)
+        return mantissa << shift, (mantissa + 1) << shift
+
+    def record(self, seconds: float):
+        seconds = max(seconds, 0.0)
+        index = self._index(int(seconds * 1e6))
+        with self._lock:
+            self.counts[index] = self.counts.get(index, 0) + 1
+            self.count += 1
+            self.sum += seconds
+            if self.min is None or seconds < self.min:
+                self.min = seconds
+            if self.max is None or seconds > self.max:
+                self.max = seconds
+
+    def percentiles(self, quantiles=QUANTILES) -> Dict[float, Optional[float]]:
+        """Value in seconds at each quantile, the middle of its bucket clamped to min/max"""
+        with self._lock:
+            counts = sorted(self.counts.items())
+            total, low, high = self.count, self.min, self.max
+        if not total:
+            return {quantile: None for quantile in quantiles}
+
+        results = {}
+        targets = sorted((max(1, math.ceil(quantile * total)), quantile) for quantile in quantiles)
+        seen, position = 0, 0
+        for target, quantile in targets:
+            while seen < target:
+                seen += counts[position][1]
+                position += 1
+            bucket_low, bucket_high = self._bounds(counts[position - 1][0])
+            value = (bucket_low + bucket_high) / 2e6
+            results[quantile] = min(max(value, low), high)
+        return results
+
+    def snapshot(self) -> Dict:
+        percentiles = self.percentiles()
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max,
+            "mean": self.sum / self.count if self.count else None,
+            **{QUANTILES[quantile]: value for quantile, value in percentiles.items()}
+        }
+
+
+class _Timer:
+    __slots__ = ('histogram', 'errors', 'started')
+
+    def __init__(self, histogram, errors):
+        self.histogram = histogram
+        self.errors = errors
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.histogram.record(time.perf_counter() - self.started)
+        if self.errors is not None and exc_type is not None and issubclass(exc_type, Exception):
+            self.errors.inc()
+        return False
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Metrics:
+    """
+    Counters and latency histograms for commands, actions, BNC and Mongo calls.
+
+    A disabled registry costs one attribute check per hook: timer() hands out
+    a shared no-op context manager and inc()/observe() return immediately.
+    Series are identified by name and labels, keep label values low-cardinality
+    (command names, action types, status codes, not user IDs).
+
+    Expose them as Prometheus text with serve(), or write them to a JSON file
+    every few seconds with start_json_dump().
+
+    Example:
+        metrics = get_metrics()
+        with metrics.timer("export_seconds", guild=guild.name):
+            ...
+        metrics.inc("exports_total")
+    """
+    def __init__(self, enabled: bool = True, namespace: str = "jodbs"):
+        self.enabled = enabled
+        self.namespace = namespace
+        self.started_at = time.time()
+        self._counters: Dict[tuple, Counter] = {}
+        self._histograms: Dict[tuple, Histogram] = {}
+        self._lock = threading.Lock()
+        self._runner = None
+        self._dump_task = None
+
+    # Recording
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((label, str(value)) for label, value in labels.items()))
+
+    def counter(self, name: str, **labels) -> Counter:
+        key = self._key(name, labels)
+        counter = self._counters.get(key)
+        if counter is None:
+            with self._lock:
+                counter = self._counters.setdefault(key, Counter())
+        return counter
+
+    def histogram(self, name: str, **labels) -> Histogram:
+        key = self._key(name, labels)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram())
+        return histogram
+
+    def inc(self, name: str, amount=1, **labels):
+        if self.enabled:
+            self.counter(name, **labels).inc(amount)
+
+    def observe(self, name: str, seconds: float, **labels):
+        if self.enabled:
+            self.histogram(name, **labels).record(seconds)
+
+    def timer(self, name: str, errors: Optional[str] = None, **labels):
+        """
+        Context manager recording how long a block takes, works in threads and coroutines.
+
+        Args:
+            name (str): Histogram name, by convention ending in _seconds.
+            errors (str, optional): Counter incremented when the block raises.
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self.histogram(name, **labels), self.counter(errors, **labels) if errors else None)
+
+    def timed(self, name: Optional[str] = None, errors: Optional[str] = None, **labels):
+        """Decorator timing every call of a coroutine function"""
+        def decorator(func):
+            histogram_name = name or f"{func.__name__}_seconds"
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with self.timer(histogram_name, errors, **labels):
+                    return await func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    # Exporting
+
+    def snapshot(self) -> Dict:
+        def series(items, value):
+            return [{"name": name, "labels": dict(labels), **value(metric)} for (name, labels), metric in sorted(items, key=lambda item: item[0])]
+
+        return {
+            "started_at": self.started_at,
+            "time": time.time(),
+            "counters": series(list(self._counters.items()), lambda counter: {"value": counter.value}),
+            "histograms": series(list(self._histograms.items()), Histogram.snapshot)
+        }
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format; histograms are exported as summaries in seconds"""
+        prefix = f"{self.namespace}_" if self.namespace else ""
+        lines = []
+
+        counters: Dict[str, list] = {}
+        for (name, labels), counter in sorted(self._counters.items(), key=lambda item: item[0]):
+            counters.setdefault(name, []).append((labels, counter.value))
+        for name, samples in counters.items():
+            lines.append(f"# TYPE {prefix}{name} counter")
+            lines.extend(f"{prefix}{name}{_format_labels(labels)} {value}" for labels, value in samples)
+
+        histograms: Dict[str, list] = {}
+        for (name, labels), histogram in sorted(self._histograms.items(), key=lambda item: item[0]):
+            histograms.setdefault(name, []).append((labels, histogram))
+        for name, samples in histograms.items():
+            lines.append(f"# TYPE {prefix}{name} summary")
+            for labels, histogram in samples:
+                for quantile, value in histogram.percentiles().items():
+                    if value is not None:
+                        lines.append(f"{prefix}{name}{_format_labels(labels, ('quantile', quantile))} {value:.6f}")
+                lines.append(f"{prefix}{name}_sum{_format_labels(labels)} {histogram.sum:.6f}")
+                lines.append(f"{prefix}{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    async def _handle_metrics(self, request):
+        return web.Response(text=self.render_prometheus(), content_type="text/plain", charset="utf-8",
+                            headers={"Cache-Control": "no-store"})
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 9100, path: str = "/metrics"):
+        """Serve the Prometheus text format over HTTP, only on localhost unless another host is given"""
+        if self._runner is None:
+            app = web.Application()
+            app.router.add_get(path, self._handle_metrics)
+            self._runner = web.AppRunner(app)
+            await self._runner.setup()
+            await web.TCPSite(self._runner, host, port).start()
+            logger.info("Metrics: Serving Prometheus metrics on %s:%s%s", host, port, path)
+
+    def dump_json(self, file_path: str):
+        folder = os.path.dirname(os.path.abspath(file_path))
+        os.makedirs(folder, exist_ok=True)
+        save_json_atomic(self.snapshot(), file_path)
+
+    async def _dump_loop(self, file_path, interval):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.dump_json, file_path)
+            except Exception as e:
+                logger.error("Metrics: Failed to write %s: %s", file_path, e)
+
+    def start_json_dump(self, file_path: str = "./data/metrics.json", interval: float = 60.0):
+        """Write a snapshot to a JSON file every `interval` seconds, returns the task"""
+        if self._dump_task is None or self._dump_task.done():
+            self._dump_task = asyncio.get_running_loop().create_task(self._dump_loop(file_path, interval))
+        return self._dump_task
+
+    async def close(self):
+        if self._dump_task is not None:
+            self._dump_task.cancel()
+            try:
+                await self._dump_task
+            except asyncio.CancelledError:
+                pass
+            self._dump_task = None
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+_metrics = Metrics(enabled=False)
+
+def get_metrics() -> Metrics:
+    """Registry library hooks record into, disabled until enabled or replaced"""
+    return _metrics
+
+def set_metrics(metrics: Metrics):
+    global _metrics
+    _metrics = metrics
@@ -0,0 +1,296 @@
+import asyncio, atexit, logging, threading
+from typing import Any, Dict, Hashable, Optional
+from pymongo import UpdateOne
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+# Write errors worth another try: a concurrent upsert of the same document loses with a duplicate key
+RETRYABLE_WRITE_ERRORS = frozenset({11000})
+
+
+class BulkWriter:
+    """
+    Buffered upserts and increments for one Mongo collection.
+
+    Updates are gathered in memory and merged per document, so a thousand
+    `inc(member_id, xp=5)` calls between flushes become one update with
+    `$inc: {xp: 5000}`. Pending documents are written as unordered
+    bulk_write batches of up to `max_batch` operations, after
+    `flush_interval` seconds or once `flush_threshold` documents are pending.
+    Works with sync (pymongo) and async (AsyncMongoClient/Motor) collections;
+    sync writes run in a worker thread.
+
+    When part of a batch fails, only the failed updates are buffered again,
+    the rest were applied. Updates Mongo rejects outright (e.g. a `$inc` on a
+    string) are logged and dropped instead of being retried forever, and so
+    are retryable failures once they failed `max_retries` flushes in a row.
+
+    Example:
+        writer = mongo.bulk_writer("members")
+        writer.inc(member.id, messages=1, xp=5)
+        writer.set(member.id, name=member.display_name)
+        await writer.flush()  # Optional, happens on its own
+    """
+    def __init__(self, collection, flush_interval: float = 5.0, flush_threshold: int = 1000, max_batch: int = 1000, max_retries: int = 3, debug=False):
+        self.collection = collection
+        self.asynchronous = not isinstance(collection, Collection)
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.max_batch = max_batch
+        self.max_retries = max_retries
+        self.debug = debug
+
+        self._pending: Dict[Hashable, tuple] = {}  # key -> (filter, {operator: {field: value}})
+        self._retries: Dict[Hashable, int] = {}  # key -> failed flushes in a row
+        self._lock = threading.Lock()
+        self._flush_handle = None
+        self._flush_task = None
+        self._flush_lock = asyncio.Lock()
+        self.buffered = 0  # Update calls received
+        self.written = 0  # Documents written
+        self.dropped = 0  # Updates Mongo rejected for good
+        self.round_trips = 0
+        if not self.asynchronous:
+            # An async client can't be used once the loop is gone
+            atexit.register(self.flush_sync)
+
+    # Buffering
+
+    @staticmethod
+    def _key(filter):
+        if isinstance(filter, dict):
+            return tuple(sorted(filter.items())), filter
+        return filter, {"_id": filter}
+
+    def update(self, filter, set: Optional[Dict[str, Any]] = None, inc: Optional[Dict[str, Any]] = None,
+               set_on_insert: Optional[Dict[str, Any]] = None):
+        """
+        Buffer an upsert of one document.
+
+        Args:
+            filter: The document's _id, or a filter dict with hashable values.
+            set (dict): Fields to $set, overriding earlier buffered values.
+            inc (dict): Fields to $inc, added to earlier buffered increments and numeric $set values.
+            set_on_insert (dict): Fields to $setOnInsert, for defaults of new documents.
+
+        Raises:
+            TypeError: If `inc` targets a field with a buffered non-numeric $set value.
+        """
+        key, filter = self._key(filter)
+        with self._lock:
+            entry = self._pending.get(key)
+            if inc:
+                self._check_inc(entry[1] if entry is not None else {}, set or {}, inc)
+            if entry is None:
+                entry = self._pending[key] = (filter, {})
+            operators = entry[1]
+            if set:
+                self._merge_set(operators, set)
+            if inc:
+                self._merge_inc(operators, inc)
+            if set_on_insert:
+                self._merge_set_on_insert(operators, set_on_insert)
+            self.buffered += 1
+            pending = len(self._pending)
+        self._schedule_flush(pending)
+
+    def set(self, filter, **fields):
+        self.update(filter, set=fields)
+
+    def inc(self, filter, **fields):
+        self.update(filter, inc=fields)
+
+    # Mongo rejects one path in two operators, so fold them together here
+    @staticmethod
+    def _merge_set(operators, fields):
+        sets = operators.setdefault("$set", {})
+        for field, value in fields.items():
+            sets[field] = value
+            operators.get("$inc", {}).pop(field, None)
+            operators.get("$setOnInsert", {}).pop(field, None)
+
+    @staticmethod
+    def _numeric(value):
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+    @classmethod
+    def _check_inc(cls, operators, sets, fields):
+        sets = {**operators.get("$set", {}), **sets}
+        for field in fields:
+            if field in sets and not cls._numeric(sets[field]):
+                raise TypeError(f"Can't $inc '{field}', it has a buffered non-numeric $set value {sets[field]!r}")
+
+    @classmethod
+    def _merge_inc(cls, operators, fields):
+        sets = operators.get("$set", {})
+        incs = operators.setdefault("$inc", {})
+        for field, value in fields.items():
+            if field in sets and cls._numeric(sets[field]):
+                sets[field] += value
+            else:
+                # A non-numeric $set only gets here from _restore, the newer $inc wins
+                sets.pop(field, None)
+                incs[field] = incs.get(field, 0) + value
+                operators.get("$setOnInsert", {}).pop(field, None)
+
+    @staticmethod
+    def _merge_set_on_insert(operators, fields):
+        set_on_insert = operators.setdefault("$setOnInsert", {})
+        for field, value in fields.items():
+            if field not in operators.get("$set", {}) and field not in operators.get("$inc", {}):
+                set_on_insert[field] = value
+
+    def __len__(self):
+        return len(self._pending)
+
+    # Flushing
+
+    def _schedule_flush(self, pending):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            if pending >= self.flush_threshold and not self.asynchronous:
+                self.flush_sync()
+            return
+
+        if pending >= self.flush_threshold:
+            if self._flush_task is None or self._flush_task.done():
+                self._flush_task = loop.create_task(self.flush())
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.flush_interval, lambda: loop.create_task(self.flush()))
+
+    def _take(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+    def _restore(self, pending):
+        # Keep updates buffered while the failed flush ran, they are newer
+        with self._lock:
+            for key, (filter, operators) in pending.items():
+                entry = self._pending.get(key)
+                if entry is None:
+                    self._pending[key] = (filter, operators)
+                else:
+                    newer = entry[1]
+                    self._pending[key] = (filter, operators)
+                    self._merge_set(operators, newer.get("$set", {}))
+                    self._merge_inc(operators, newer.get("$inc", {}))
+                    self._merge_set_on_insert(operators, newer.get("$setOnInsert", {}))
+
+    def _batches(self, pending):
+        """Chunks of (key, UpdateOne), so failed operations map back to their buffered document"""
+        operations = [
+            (key, UpdateOne(filter, {operator: fields for operator, fields in operators.items() if fields}, upsert=True))
+            for key, (filter, operators) in pending.items() if any(operators.values())
+        ]
+        for i in range(0, len(operations), self.max_batch):
+            yield operations[i:i + self.max_batch]
+
+    def _written(self, batch, failed=()):
+        if self._retries:
+            for key, _ in batch:
+                if key not in failed:
+                    self._retries.pop(key, None)
+
+    def _partly_failed(self, pending, batch, error, retry):
+        """Handle a BulkWriteError: the batch's other operations were applied, returns how many"""
+        write_errors = error.details.get("writeErrors", [])
+        failed = set()
+        for write_error in write_errors:
+            key = batch[write_error["index"]][0]
+            failed.add(key)
+            tries = self._retries.pop(key, 0) + 1
+            if write_error.get("code") in RETRYABLE_WRITE_ERRORS and tries <= self.max_retries:
+                self._retries[key] = tries
+                retry[key] = pending[key]
+            else:
+                self.dropped += 1
+                logger.error("BulkWriter: Dropped update of %s in %s after %s tries: %s", pending[key][0], self.collection.name, tries, write_error.get("errmsg"))
+        self._written(batch, failed)
+        return len(batch) - len(write_errors)
+
+    @staticmethod
+    def _unwritten(pending, batches, retry):
+        for batch in batches:
+            for key, _ in batch:
+                retry[key] = pending[key]
+
+    def _write_sync(self, pending):
+        """Write every batch, returns the entries to buffer again and the error that stopped writing, if any"""
+        batches, retry = list(self._batches(pending)), {}
+        for position, batch in enumerate(batches):
+            try:
+                self.collection.bulk_write([operation for _, operation in batch], ordered=False)
+                self.written += len(batch)
+                self._written(batch)
+            except BulkWriteError as e:
+                self.written += self._partly_failed(pending, batch, e, retry)
+            except Exception as e:
+                self._unwritten(pending, batches[position:], retry)
+                return retry, e
+            self.round_trips += 1
+        return retry, None
+
+    async def _write_async(self, pending):
+        batches, retry = list(self._batches(pending)), {}
+        for position, batch in enumerate(batches):
+            try:
+                await self.collection.bulk_write([operation for _, operation in batch], ordered=False)
+                self.written += len(batch)
+                self._written(batch)
+            except BulkWriteError as e:
+                self.written += self._partly_failed(pending, batch, e, retry)
+            except Exception as e:
+                self._unwritten(pending, batches[position:], retry)
+                return retry, e
+            self.round_trips += 1
+        return retry, None
+
+    def _finish_flush(self, pending, retry, error):
+        if retry:
+            self._restore(retry)
+        if error is not None:
+            logger.error("BulkWriter: Failed to write to %s: %s", self.collection.name, error)
+        elif self.debug:
+            logger.debug("BulkWriter: Flushed %s document(s) to %s", len(pending) - len(retry), self.collection.name)
+
+    async def flush(self):
+        """Write every pending document, awaitable"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        async with self._flush_lock:
+            pending = self._take()
+            if not pending:
+                return
+            if self.asynchronous:
+                retry, error = await self._write_async(pending)
+            else:
+                retry, error = await asyncio.to_thread(self._write_sync, pending)
+            self._finish_flush(pending, retry, error)
+        if retry:
+            self._schedule_flush(len(self._pending))
+
+    def flush_sync(self):
+        """Flush synchronously, used on interpreter shutdown (sync collections only)"""
+        pending = self._take()
+        if pending:
+            self._finish_flush(pending, *self._write_sync(pending))
+
+    async def close(self):
+        await self.flush()
+        if not self.asynchronous:
+            atexit.unregister(self.flush_sync)
+
+    def stats(self):
+        return {
+            "pending": len(self._pending),
+            "buffered": self.buffered,
+            "written": self.written,
+            "dropped": self.dropped,
+            "round_trips": self.round_trips
+        }
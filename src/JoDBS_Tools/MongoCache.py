@@ -0,0 +1,232 @@
+import asyncio, inspect, logging, random, threading, time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+from pymongo import errors
+from pymongo.collection import Collection
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+def _retrieve_exception(task):
+    """Mark a shared query's exception as retrieved when every waiter was cancelled"""
+    if not task.cancelled():
+        task.exception()
+
+
+class CachedCollection:
+    """
+    Read-through LRU + TTL cache of one collection's documents by _id.
+
+    get() serves documents from memory for `ttl` seconds, remembers missing
+    documents for `negative_ttl` seconds and coalesces concurrent misses for
+    the same _id into a single query. Writes made through this helper
+    invalidate the entry; with watch() running, a change stream also
+    invalidates entries for writes made anywhere else (replica sets only).
+    Cached documents are shared, treat them as read-only.
+
+    Example:
+        settings = mongo.cached_collection("guild_settings", ttl=600)
+        config = await settings.get(guild.id)
+        await settings.update_one(guild.id, {"$set": {"prefix": "!"}})
+    """
+    def __init__(self, collection, max_size: int = 1024, ttl: float = 300.0, negative_ttl: float = 30.0):
+        self.collection = collection
+        self.asynchronous = not isinstance(collection, Collection)
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # _id -> (expires_at, document or None)
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._watch_task = None
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    async def _call(self, method, *args, **kwargs):
+        if self.asynchronous:
+            return await getattr(self.collection, method)(*args, **kwargs)
+        return await asyncio.to_thread(getattr(self.collection, method), *args, **kwargs)
+
+    # Reads
+
+    def peek(self, _id) -> Any:
+        """Cached document without querying: the document, None if known missing, or _MISSING"""
+        entry = self._entries.get(_id)
+        if entry is None:
+            return _MISSING
+        if entry[0] <= time.monotonic():
+            del self._entries[_id]
+            return _MISSING
+        self._entries.move_to_end(_id)
+        return entry[1]
+
+    async def get(self, _id) -> Optional[Dict]:
+        """The document with this _id, or None if it doesn't exist"""
+        document = self.peek(_id)
+        if document is not _MISSING:
+            if document is None:
+                self.negative_hits += 1
+            else:
+                self.hits += 1
+            return document
+
+        task = self._inflight.get(_id)
+        if task is not None:
+            self.coalesced += 1
+            return await asyncio.shield(task)
+
+        # The query runs as its own task, a cancelled caller doesn't take it down for the others
+        self.misses += 1
+        task = asyncio.get_running_loop().create_task(self._load(_id))
+        task.add_done_callback(_retrieve_exception)
+        self._inflight[_id] = task
+        return await asyncio.shield(task)
+
+    async def _load(self, _id):
+        try:
+            document = await self._call("find_one", {"_id": _id})
+        except BaseException:
+            if self._inflight.get(_id) is asyncio.current_task():
+                del self._inflight[_id]
+            raise
+        # An invalidation while the query ran drops our task, don't cache the stale result
+        if self._inflight.get(_id) is asyncio.current_task():
+            del self._inflight[_id]
+            self._store(_id, document)
+        return document
+
+    def _store(self, _id, document):
+        ttl = self.ttl if document is not None else self.negative_ttl
+        if ttl <= 0:
+            return
+        self._entries[_id] = (time.monotonic() + ttl, document)
+        self._entries.move_to_end(_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    # Invalidation
+
+    def invalidate(self, _id):
+        self._entries.pop(_id, None)
+        self._inflight.pop(_id, None)
+        self.invalidations += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._inflight.clear()
+
+    # Writes
+
+    async def update_one(self, _id, update, upsert: bool = False):
+        try:
+            return await self._call("update_one", {"_id": _id}, update, upsert=upsert)
+        finally:
+            self.invalidate(_id)
+
+    async def replace_one(self, _id, document, upsert: bool = False):
+        try:
+            return await self._call("replace_one", {"_id": _id}, document, upsert=upsert)
+        finally:
+            self.invalidate(_id)
+
+    async def delete_one(self, _id):
+        try:
+            return await self._call("delete_one", {"_id": _id})
+        finally:
+            self.invalidate(_id)
+
+    async def set(self, _id, upsert: bool = True, **fields):
+        return await self.update_one(_id, {"$set": fields}, upsert=upsert)
+
+    # Change streams
+
+    def _watch_sync(self, loop, stop):
+        with self.collection.watch() as stream:
+            while not stop.is_set():
+                change = stream.try_next()
+                if change is not None:
+                    loop.call_soon_threadsafe(self._on_change, change)
+                elif stop.wait(0.5):
+                    break
+
+    async def _watch_async(self):
+        # Motor's watch() returns the stream itself, PyMongo's AsyncCollection a coroutine
+        stream = self.collection.watch()
+        if inspect.isawaitable(stream):
+            stream = await stream
+        async with stream:
+            async for change in stream:
+                self._on_change(change)
+
+    def _on_change(self, change):
+        operation = change.get("operationType")
+        if operation in ("drop", "rename", "dropDatabase", "invalidate"):
+            self.clear()
+            return
+        key = change.get("documentKey") or {}
+        if "_id" in key:
+            self.invalidate(key["_id"])
+
+    async def _watch(self):
+        delay = 1.0
+        while True:
+            stop = None
+            try:
+                if self.asynchronous:
+                    await self._watch_async()
+                else:
+                    stop = threading.Event()
+                    await asyncio.to_thread(self._watch_sync, asyncio.get_running_loop(), stop)
+                delay = 1.0
+            except asyncio.CancelledError:
+                if stop is not None:
+                    stop.set()
+                raise
+            except errors.OperationFailure as e:
+                # Change streams need a replica set or sharded cluster, TTL is all we get
+                logger.warning("CachedCollection: Change streams unavailable for %s: %s", self.collection.name, e)
+                return
+            except Exception as e:
+                logger.warning("CachedCollection: Change stream for %s failed: %s", self.collection.name, e)
+            # Anything may have changed while the stream was down
+            self.clear()
+            await asyncio.sleep(delay + random.uniform(0, delay))
+            delay = min(delay * 2, 60.0)
+
+    def watch(self):
+        """Start invalidating entries from a change stream, returns the task"""
+        if self._watch_task is None or self._watch_task.done():
+            self._watch_task = asyncio.get_running_loop().create_task(self._watch())
+        return self._watch_task
+
+    async def close(self):
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+
+    # Metrics
+
+    def stats(self):
+        lookups = self.hits + self.negative_hits + self.misses + self.coalesced
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_ratio": round((self.hits + self.negative_hits) / lookups, 4) if lookups else None,
+            "watching": self._watch_task is not None and not self._watch_task.done()
+        }
@@ -0,0 +1,169 @@
+import asyncio, threading, time
+from pymongo import monitoring
+from .Metrics import get_metrics
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Connection pool counters collected from pymongo's monitoring events"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open = 0
+        self.checked_out = 0
+        self.created = 0
+        self.closed = 0
+        self.checkout_failures = 0
+        self.pool_clears = 0
+
+    def _add(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+    def connection_created(self, event):
+        self._add(open=1, created=1)
+
+    def connection_closed(self, event):
+        self._add(open=-1, closed=1)
+
+    def connection_checked_out(self, event):
+        self._add(checked_out=1)
+
+    def connection_checked_in(self, event):
+        self._add(checked_out=-1)
+
+    def connection_check_out_failed(self, event):
+        self._add(checkout_failures=1)
+
+    def pool_cleared(self, event):
+        self._add(pool_clears=1)
+
+    # Events we don't count
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_ready(self, event): pass
+    def connection_check_out_started(self, event): pass
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "open": self.open,
+                "checked_out": self.checked_out,
+                "idle": self.open - self.checked_out,
+                "created": self.created,
+                "closed": self.closed,
+                "checkout_failures": self.checkout_failures,
+                "pool_clears": self.pool_clears
+            }
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Records every Mongo command's server round trip into the metrics registry"""
+    def command_started(self, event): pass
+
+    def command_succeeded(self, event):
+        metrics = get_metrics()
+        if metrics.enabled:
+            metrics.observe("mongo_command_seconds", event.duration_micros / 1e6, command=event.command_name)
+
+    def command_failed(self, event):
+        metrics = get_metrics()
+        if metrics.enabled:
+            metrics.observe("mongo_command_seconds", event.duration_micros / 1e6, command=event.command_name)
+            metrics.inc("mongo_command_failures_total", command=event.command_name)
+
+
+class MongoHealth:
+    """
+    Cheap health checks for one Mongo client.
+
+    ping() runs the lightweight `ping` command at most once per `max_age`
+    seconds and serves the cached result in between, so liveness probes are
+    nearly free. Collection existence is remembered once seen, and pool and
+    latency stats are exposed through stats().
+    """
+    def __init__(self, client, pool_stats=None, max_age=5.0):
+        self.client = client
+        self.pool_stats = pool_stats
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._last = None  # (checked_at, ok, latency_ms, error)
+        self._aping_task = None  # Ping shared by concurrent aping() callers
+        self._latency_avg = None
+        self._collections = set()  # (database, collection) known to exist
+
+    # Ping
+
+    def _fresh(self, max_age):
+        last = self._last
+        if last is not None and time.monotonic() - last[0] < (self.max_age if max_age is None else max_age):
+            return last
+        return None
+
+    def _record(self, ok, latency_ms, error=None):
+        if ok:
+            # Smoothed latency so one slow ping doesn't dominate
+            self._latency_avg = latency_ms if self._latency_avg is None else 0.8 * self._latency_avg + 0.2 * latency_ms
+        self._last = (time.monotonic(), ok, latency_ms, error)
+        return self._last
+
+    def ping(self, max_age=None):
+        """True if the server answered a ping within the last `max_age` seconds (sync clients)"""
+        last = self._fresh(max_age)
+        if last is None:
+            with self._lock:
+                last = self._fresh(max_age)
+                if last is None:
+                    started = time.perf_counter()
+                    try:
+                        self.client.admin.command("ping")
+                        last = self._record(True, (time.perf_counter() - started) * 1000)
+                    except Exception as e:
+                        last = self._record(False, None, str(e))
+        return last[1]
+
+    async def _aping(self):
+        started = time.perf_counter()
+        try:
+            await self.client.admin.command("ping")
+            return self._record(True, (time.perf_counter() - started) * 1000)
+        except Exception as e:
+            return self._record(False, None, str(e))
+
+    async def aping(self, max_age=None):
+        """ping() for async clients, concurrent callers share one in-flight ping"""
+        last = self._fresh(max_age)
+        if last is None:
+            task = self._aping_task
+            if task is None or task.done():
+                task = self._aping_task = asyncio.get_running_loop().create_task(self._aping())
+            # Shielded, a cancelled caller leaves the ping running for the others
+            last = await asyncio.shield(task)
+        return last[1]
+
+    # Collections
+
+    def has_collection(self, database_name, collection_name):
+        return (database_name, collection_name) in self._collections
+
+    def mark_collection(self, database_name, collection_name):
+        self._collections.add((database_name, collection_name))
+
+    def forget_collection(self, database_name, collection_name):
+        self._collections.discard((database_name, collection_name))
+
+    # Stats
+
+    def stats(self):
+        """Last ping result, smoothed latency and pool counters, without touching the server"""
+        last = self._last
+        stats = {
+            "ok": last[1] if last else None,
+            "checked_ago": round(time.monotonic() - last[0], 3) if last else None,
+            "latency_ms": round(last[2], 3) if last and last[2] is not None else None,
+            "latency_avg_ms": round(self._latency_avg, 3) if self._latency_avg is not None else None,
+            "error": last[3] if last else None
+        }
+        if self.pool_stats is not None:
+            stats["pool"] = self.pool_stats.snapshot()
+        return stats
@@ -0,0 +1,143 @@
+import os, json, threading, time, logging
+from typing import Dict, FrozenSet, Iterable, Optional
+from .ScopeStore import ScopeStore
+
+logger = logging.getLogger(__name__)
+
+class RoleIndex:
+    """
+    Process-wide, in-memory index of ./data/roles.json.
+
+    The file is parsed once into {guild_id: {role_name: role_id}} with integer IDs.
+    The index reloads on its own when the file's mtime changes, or when
+    DataFetching pushes a fresh copy through the ScopeStore "roles" scope.
+    """
+    file_path = "./data/roles.json"
+    check_interval = 2.0  # Seconds between mtime checks, keeps os.stat off the hot path
+
+    _index: Dict[int, Dict[str, int]] = {}
+    _required_cache: Dict[tuple, FrozenSet[int]] = {}
+    _mtime: Optional[int] = None
+    _next_check = 0.0
+    _loaded = False
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _build(roles_data) -> Dict[int, Dict[str, int]]:
+        """Turn raw roles data into {guild_id: {role_name: role_id}} with integer IDs"""
+        if not isinstance(roles_data, dict):
+            return {}
+        # DataFetching saves scopes as {scope: data}
+        if isinstance(roles_data.get("roles"), dict):
+            roles_data = roles_data["roles"]
+
+        index = {}
+        for guild_id, guild_roles in roles_data.items():
+            if not isinstance(guild_roles, dict):
+                continue
+            try:
+                guild_key = int(guild_id)
+            except (TypeError, ValueError):
+                continue
+            names = {}
+            for role_name, role_id in guild_roles.items():
+                try:
+                    names[role_name] = int(role_id)
+                except (TypeError, ValueError):
+                    continue
+            index[guild_key] = names
+        return index
+
+    @classmethod
+    def _swap(cls, index, mtime):
+        cls._index = index
+        cls._required_cache = {}
+        cls._mtime = mtime
+        cls._loaded = True
+
+    @classmethod
+    def _refresh(cls):
+        """Reload the index if roles.json changed since the last load"""
+        now = time.monotonic()
+        if cls._loaded and now < cls._next_check:
+            return
+
+        with cls._lock:
+            if cls._loaded and now < cls._next_check:
+                return
+            cls._next_check = now + cls.check_interval
+            try:
+                mtime = os.stat(cls.file_path).st_mtime_ns
+            except OSError:
+                if not cls._loaded:
+                    cls._swap({}, None)
+                return
+
+            if cls._loaded and mtime == cls._mtime:
+                return
+
+            try:
+                with open(cls.file_path, 'r') as json_file:
+                    roles_data = json.load(json_file)
+            except (OSError, ValueError) as e:
+                logger.error("RoleIndex: Failed to load %s: %s", cls.file_path, e)
+                if not cls._loaded:
+                    cls._swap({}, None)
+                return
+            cls._swap(cls._build(roles_data), mtime)
+
+    @classmethod
+    def update(cls, roles_data):
+        """Replace the index with freshly fetched roles data (skips the next disk read)"""
+        index = cls._build(roles_data)
+        with cls._lock:
+            try:
+                mtime = os.stat(cls.file_path).st_mtime_ns
+            except OSError:
+                mtime = None
+            cls._swap(index, mtime)
+            cls._next_check = time.monotonic() + cls.check_interval
+
+    @classmethod
+    def invalidate(cls):
+        """Force a reload from disk on the next lookup"""
+        with cls._lock:
+            cls._loaded = False
+            cls._next_check = 0.0
+
+    @classmethod
+    def get_role_id(cls, guild_id, role_name: str) -> Optional[int]:
+        cls._refresh()
+        return cls._index.get(int(guild_id), {}).get(role_name)
+
+    @classmethod
+    def get_guild_roles(cls, guild_id) -> Dict[str, int]:
+        cls._refresh()
+        return cls._index.get(int(guild_id), {})
+
+    @classmethod
+    def required_ids(cls, guild_id, role_names: Iterable[str]) -> FrozenSet[int]:
+        """Resolve role names to a frozenset of role IDs for a guild, cached per index version"""
+        cls._refresh()
+        key = (int(guild_id), tuple(role_names))
+        required = cls._required_cache.get(key)
+        if required is None:
+            guild_roles = cls._index.get(key[0], {})
+            required = frozenset(guild_roles[name] for name in key[1] if name in guild_roles)
+            cls._required_cache[key] = required
+        return required
+
+    @classmethod
+    def member_has_any(cls, member, guild_id, role_names: Iterable[str]) -> bool:
+        """Check if a member holds any of the named roles using set intersection"""
+        required = cls.required_ids(guild_id, role_names)
+        if not required:
+            return False
+        return not required.isdisjoint(role.id for role in member.roles)
+
+    @classmethod
+    def _on_roles_update(cls, scope, roles_data):
+        cls.update(roles_data)
+
+
+ScopeStore.subscribe("roles", RoleIndex._on_roles_update)
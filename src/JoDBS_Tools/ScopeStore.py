@@ -0,0 +1,97 @@
+import logging, threading, weakref
+from .utils import load_json
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+class ScopeStore:
+    """
+    Process-wide, in-memory copy of BNC scope data.
+
+    DataFetching pushes every fetched scope in here. Consumers read from memory
+    and subscribe to be told when a scope changes, so hot-reloaded data reaches
+    them without a restart or extra disk reads. The data dict is swapped as a
+    whole on every change, so readers always see a consistent snapshot.
+    """
+    data_folder = "./data"
+
+    _data = {}
+    _subscribers = {}
+    _lock = threading.RLock()
+
+    @classmethod
+    def get(cls, scope: str, default=None):
+        return cls._data.get(scope, default)
+
+    @classmethod
+    def snapshot(cls):
+        return cls._data
+
+    @classmethod
+    def load(cls, scope: str, file_path=None):
+        """Return a scope from memory, falling back once to ./data/<scope>.json"""
+        data = cls._data.get(scope, _MISSING)
+        if data is not _MISSING:
+            return data
+
+        data = load_json(file_path or f"{cls.data_folder}/{scope}.json") or {}
+        # DataFetching saves scopes as {scope: data}
+        if isinstance(data, dict) and len(data) == 1 and scope in data:
+            data = data[scope]
+        with cls._lock:
+            if scope not in cls._data:
+                cls._data = {**cls._data, scope: data}
+        return cls._data[scope]
+
+    @classmethod
+    def set(cls, scope: str, data) -> bool:
+        """Swap in new data for a scope and notify subscribers, returns True if it changed"""
+        with cls._lock:
+            if cls._data.get(scope, _MISSING) == data:
+                return False
+            cls._data = {**cls._data, scope: data}
+        cls._notify(scope, data)
+        return True
+
+    @classmethod
+    def update(cls, scopes: dict):
+        """Set several scopes at once, returns the list of scopes that changed"""
+        return [scope for scope, data in scopes.items() if cls.set(scope, data)]
+
+    @classmethod
+    def subscribe(cls, scope: str, callback):
+        """
+        Call callback(scope, data) whenever a scope changes.
+
+        Bound methods are held weakly, so subscribing an object does not keep it alive.
+        """
+        ref = weakref.WeakMethod(callback) if hasattr(callback, "__self__") else (lambda: callback)
+        with cls._lock:
+            cls._subscribers.setdefault(scope, []).append(ref)
+        return callback
+
+    @classmethod
+    def unsubscribe(cls, scope: str, callback):
+        with cls._lock:
+            cls._subscribers[scope] = [ref for ref in cls._subscribers.get(scope, []) if ref() not in (None, callback)]
+
+    @classmethod
+    def _notify(cls, scope: str, data):
+        with cls._lock:
+            refs = list(cls._subscribers.get(scope, []))
+
+        dead = False
+        for ref in refs:
+            callback = ref()
+            if callback is None:
+                dead = True
+                continue
+            try:
+                callback(scope, data)
+            except Exception as e:
+                logger.error("ScopeStore: Subscriber for %s failed: %s", scope, e)
+
+        if dead:
+            with cls._lock:
+                cls._subscribers[scope] = [ref for ref in cls._subscribers.get(scope, []) if ref() is not None]
@@ -0,0 +1,266 @@
+import contextlib, cProfile, io, logging, os, pstats, sys, threading, time
+from importlib.abc import MetaPathFinder
+from typing import Dict, List, Optional
+from .LogPipeline import UNSAMPLED
+from .utils import save_json_atomic
+
+logger = logging.getLogger(__name__)
+
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class _TimedLoader:
+    """Loader proxy that records how long a module takes to execute"""
+    def __init__(self, loader, profiler, name):
+        self._loader = loader
+        self._profiler = profiler
+        self._name = name
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        with self._profiler.span(f"import {self._name}", "import"):
+            self._loader.exec_module(module)
+        # Hand the module its real loader so nothing else ever sees the proxy
+        module.__loader__ = self._loader
+        if getattr(module, "__spec__", None) is not None:
+            module.__spec__.loader = self._loader
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+class _ImportTimer(MetaPathFinder):
+    """Meta path hook timing every module imported while it is installed"""
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self._local = threading.local()
+
+    def find_spec(self, fullname, path, target=None):
+        if getattr(self._local, "finding", False):
+            return None
+        self._local.finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._local.finding = False
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, self.profiler, fullname)
+        return spec
+
+
+class StartupProfiler:
+    """
+    Named spans for bot startup, exportable as JSON or a Chrome trace.
+
+    Spans are cheap (two perf_counter calls and a list append) and recording
+    stops at finish(), so nothing accumulates after startup. Optionally runs
+    cProfile over the whole startup (`profile=True`) and times every module
+    import (`imports=True`), similar to `python -X importtime`.
+
+    Load a Chrome trace in chrome://tracing or https://ui.perfetto.dev.
+
+    Args:
+        enabled (bool): Record spans. Defaults to True.
+        profile (bool): Run cProfile from start() to finish().
+        imports (bool): Record a span per imported module from start() to finish().
+    """
+    def __init__(self, enabled: bool = True, profile: bool = False, imports: bool = False):
+        self.enabled = enabled
+        self.profile = profile
+        self.imports = imports
+        self.origin = time.perf_counter()
+        self.origin_wall = time.time()
+        self.spans: List[Dict] = []
+        self.marks: List[Dict] = []
+        self._open: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self._profiler = None
+        self._import_timer = None
+        self.profile_stats = None
+        self.finished = False
+
+    # Lifecycle
+
+    def start(self):
+        """Start cProfile / import timing if enabled"""
+        if self.profile and self._profiler is None:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        if self.imports and self._import_timer is None:
+            self._import_timer = _ImportTimer(self)
+            sys.meta_path.insert(0, self._import_timer)
+        return self
+
+    def finish(self):
+        """Stop recording; spans that are still open are closed now"""
+        if self.finished:
+            return
+        for name in list(self._open):
+            self.end(name)
+        if self._import_timer is not None:
+            sys.meta_path.remove(self._import_timer)
+            self._import_timer = None
+        if self._profiler is not None:
+            self._profiler.disable()
+            self.profile_stats = pstats.Stats(self._profiler)
+            self._profiler = None
+        self.enabled = False
+        self.finished = True
+
+    # Recording
+
+    def _now(self):
+        return time.perf_counter() - self.origin
+
+    def _record(self, name, category, start, end, args):
+        span = {
+            "name": name,
+            "category": category,
+            "start": start,
+            "end": end,
+            "thread": threading.current_thread().name,
+            "tid": threading.get_ident()
+        }
+        if args:
+            span["args"] = args
+        with self._lock:
+            self.spans.append(span)
+
+    @contextlib.contextmanager
+    def _span(self, name, category, args):
+        start = self._now()
+        try:
+            yield
+        finally:
+            self._record(name, category, start, self._now(), args)
+
+    def span(self, name: str, category: str = "startup", **args):
+        """Context manager timing a block, works in threads and coroutines"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return self._span(name, category, args)
+
+    def begin(self, name: str, category: str = "startup", **args):
+        """Open a span that ends in another callback, see end()"""
+        if self.enabled:
+            self._open[name] = (self._now(), category, args)
+
+    def end(self, name: str):
+        opened = self._open.pop(name, None)
+        if opened is not None:
+            start, category, args = opened
+            self._record(name, category, start, self._now(), args)
+
+    def mark(self, name: str, **args):
+        """Record an instant event"""
+        if self.enabled:
+            with self._lock:
+                self.marks.append({"name": name, "time": self._now(), "args": args})
+
+    # Reports
+
+    def duration(self, name: str) -> Optional[float]:
+        for span in self.spans:
+            if span["name"] == name:
+                return span["end"] - span["start"]
+        return None
+
+    def summary(self, category: Optional[str] = None) -> List[Dict]:
+        """Spans sorted by start time, optionally of one category"""
+        spans = [span for span in self.spans if category is None or span["category"] == category]
+        return sorted(spans, key=lambda span: span["start"])
+
+    def print_summary(self, category: str = "startup"):
+        logger.info("Startup timeline:", extra=UNSAMPLED)
+        for span in self.summary(category):
+            logger.info("  %-24s %6.2fs -> %6.2fs  (%.2fs)", span['name'], span['start'], span['end'], span['end'] - span['start'], extra=UNSAMPLED)
+        if self.imports:
+            slowest = sorted(self.summary("import"), key=lambda span: span["start"] - span["end"])[:10]
+            if slowest:
+                logger.info("Slowest imports (cumulative):", extra=UNSAMPLED)
+                for span in slowest:
+                    logger.info("  %-40s %8.1fms", span['name'][7:], (span['end'] - span['start']) * 1000, extra=UNSAMPLED)
+
+    def profile_report(self, limit: int = 30, sort: str = "cumulative") -> Optional[str]:
+        """Top cProfile entries as text, None if profiling was off"""
+        if self.profile_stats is None:
+            return None
+        stream = io.StringIO()
+        self.profile_stats.stream = stream
+        try:
+            self.profile_stats.sort_stats(sort).print_stats(limit)
+        finally:
+            self.profile_stats.stream = sys.stdout
+        return stream.getvalue()
+
+    def to_dict(self) -> Dict:
+        return {
+            "started_at": self.origin_wall,
+            "spans": self.summary(),
+            "marks": list(self.marks)
+        }
+
+    def to_chrome_trace(self) -> Dict:
+        """Trace Event Format: complete ("X") events per span and instant ("i") events per mark"""
+        pid = os.getpid()
+        events = [
+            {
+                "name": span["name"],
+                "cat": span["category"],
+                "ph": "X",
+                "ts": round(span["start"] * 1e6, 3),
+                "dur": round((span["end"] - span["start"]) * 1e6, 3),
+                "pid": pid,
+                "tid": span["tid"],
+                "args": span.get("args", {})
+            }
+            for span in self.spans
+        ]
+        events.extend(
+            {"name": mark["name"], "cat": "mark", "ph": "i", "s": "p", "ts": round(mark["time"] * 1e6, 3), "pid": pid, "tid": 0, "args": mark["args"]}
+            for mark in self.marks
+        )
+        names = {span["tid"]: span["thread"] for span in self.spans}
+        events.extend(
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in names.items()
+        )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export(self, file_path: str, format: str = "chrome"):
+        """
+        Write the profile to a file.
+
+        Args:
+            file_path (str): Target path.
+            format (str): 'chrome' for a Chrome trace or 'json' for the plain span list.
+                With profiling enabled, cProfile stats are written next to it as <file>.prof.
+        """
+        if format not in ("chrome", "json"):
+            raise ValueError(f"Unknown profile format '{format}', expected 'chrome' or 'json'")
+        data = self.to_chrome_trace() if format == "chrome" else self.to_dict()
+        folder = os.path.dirname(os.path.abspath(file_path))
+        os.makedirs(folder, exist_ok=True)
+        save_json_atomic(data, file_path, indent=None)
+        if self.profile_stats is not None:
+            self.profile_stats.dump_stats(f"{os.path.splitext(file_path)[0]}.prof")
+
+
+_profiler = StartupProfiler(enabled=False)
+
+def get_profiler() -> StartupProfiler:
+    """Profiler library code records startup spans into, disabled until BotSetup installs one"""
+    return _profiler
+
+def set_profiler(profiler: StartupProfiler):
+    global _profiler
+    _profiler = profiler
@@ -1,50 +1,76 @@
-from typing import Dict, Any, Optional
+import logging
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Optional, Callable, Awaitable
 from nextcord import Interaction, Member, Message
-import json
+from ..Metrics import get_metrics
+from .PersistenceManager import PersistenceManager
+
+logger = logging.getLogger(__name__)
+
+ActionCallback = Callable[["ActionHandler", Interaction, Dict[str, Any]], Awaitable[None]]
 
 class ActionHandler:
-    def __init__(self, bot):
+    # action type -> handler(action_handler, interaction, action), shared by every instance
+    _action_types: Dict[str, ActionCallback] = {}
+
+    @classmethod
+    def register_action_type(cls, action_type: str, handler: Optional[ActionCallback] = None):
+        """
+        Register a handler for an action type, usable as a decorator.
+
+        The handler is awaited as handler(action_handler, interaction, action).
+        Registering an existing type replaces it, so built-in types can be overridden.
+        """
+        def decorator(func: ActionCallback) -> ActionCallback:
+            cls._action_types[action_type] = func
+            return func
+        return decorator(handler) if handler is not None else decorator
+
+    def __init__(self, bot, persistence: Optional[PersistenceManager] = None):
         self.bot = bot
-        self.persistent_messages: Dict[str, Dict[str, Any]] = {}
         self.debug = False  # Will be set by CustomUI
-        self._load_persistent_messages()
+        # Write-behind store for persistent messages, backend picked by PERSISTENCE_BACKEND (json/sqlite)
+        self.store = persistence or PersistenceManager()
 
     def set_debug(self, debug: bool):
         """Set debug mode"""
         self.debug = debug
+        self.store.debug = debug
 
-    def _load_persistent_messages(self):
-        try:
-            with open('./data/persistent_messages.json', 'r') as f:
-                self.persistent_messages = json.load(f)
-        except FileNotFoundError:
-            self.persistent_messages = {}
+    @property
+    def persistent_messages(self) -> Mapping[str, Dict[str, Any]]:
+        """
+        Read-only snapshot of all registered messages. Loads the whole registry, prefer store.iter_messages().
+        Changes go through store.register() and store.remove().
+        """
+        return MappingProxyType(dict(self.store.iter_messages()))
 
-    def _save_persistent_messages(self):
-        with open('./data/persistent_messages.json', 'w') as f:
-            json.dump(self.persistent_messages, f, indent=4)
+    async def flush(self):
+        """Write pending registrations to disk off the event loop"""
+        await self.store.flush()
+
+    async def close(self):
+        """Flush pending registrations, call this on bot shutdown"""
+        await self.store.close()
 
     async def handle_action(self, interaction: Interaction, action: Dict[str, Any]):
         """Handle different types of actions"""
         if self.debug:
-            print(f"\n[DEBUG] Handling action:")
-            print(f"  Type: {action.get('type')}")
-            print(f"  Custom ID: {action.get('custom_id')}")
-        
-        action_type = action.get('type')
+            logger.debug("Handling action: type %s, custom_id %s", action.get('type'), action.get('custom_id'))
         
-        if action_type == 'add_role':
-            await self._handle_add_role(interaction, action)
-        elif action_type == 'remove_role':
-            await self._handle_remove_role(interaction, action)
-        elif action_type == 'message':
-            await self._handle_message(interaction, action)
-        elif action_type == 'modal':
-            await self._handle_modal(interaction, action)
+        metrics = get_metrics()
+        handler = self._action_types.get(action.get('type'))
+        if handler is None:
+            metrics.inc("action_unhandled_total", type=action.get('type'))
+            if self.debug:
+                logger.debug("No handler registered for action type: %s", action.get('type'))
+            return
+        with metrics.timer("action_seconds", errors="action_errors_total", type=action.get('type')):
+            await handler(self, interaction, action)
 
     async def _handle_add_role(self, interaction: Interaction, action: Dict[str, Any]):
         if self.debug:
-            print(f"[DEBUG] Adding role {action['role_id']} to user {interaction.user.id}")
+            logger.debug("Adding role %s to user %s", action['role_id'], interaction.user.id)
         
         role = interaction.guild.get_role(int(action['role_id']))
         if role:
@@ -70,21 +96,21 @@ class ActionHandler:
     async def register_message(self, message: Message, ui_element_id: str, element_data: Dict):
         """Register a message for persistence"""
         if self.debug:
-            print(f"\n[DEBUG] Registering message for persistence:")
-            print(f"  Message ID: {message.id}")
-            print(f"  Element: {element_data.get('name')}")
-            print(f"  Channel: {message.channel.id}")
+            logger.debug("Registering message %s (%s) in channel %s for persistence", message.id, element_data.get('name'), message.channel.id)
 
-        self.persistent_messages[str(message.id)] = {
+        self.store.register(message.id, {
             'channel_id': str(message.channel.id),
             'guild_id': str(message.guild.id),
             'ui_element_id': ui_element_id,
             'element_name': element_data.get('name'),
             'timestamp': str(message.created_at),
-            'author_id': str(message.author.id)
-        }
-        self._save_persistent_messages()
-        print(f"Registered persistent message: {message.id} for element: {ui_element_id}")
+            'author_id': str(message.author.id),
+            'content_hash': element_data.get('content_hash')
+        })
+        logger.info("Registered persistent message: %s for element: %s", message.id, ui_element_id)
 
-        if self.debug:
-            print("  Message registered successfully")
+
+ActionHandler.register_action_type('add_role', ActionHandler._handle_add_role)
+ActionHandler.register_action_type('remove_role', ActionHandler._handle_remove_role)
+ActionHandler.register_action_type('message', ActionHandler._handle_message)
+ActionHandler.register_action_type('modal', ActionHandler._handle_modal)
@@ -1,27 +1,106 @@
-from nextcord import Embed, ButtonStyle, Interaction
+from nextcord import Embed, Interaction, NotFound
 from nextcord.ui import View, Button
-from ..utils import load_json
+from ..Metrics import get_metrics
+from ..ScopeStore import ScopeStore
 from typing import Dict, List, Optional, Union
 from .ActionHandler import ActionHandler
+from .UITemplate import UITemplate, BUTTON_STYLES, content_hash
+from .InteractionRouter import InteractionRouter
+import asyncio, logging, time
+
+logger = logging.getLogger(__name__)
 
 class CustomUI:
     def __init__(self, bot, debug=False):
         self.bot = bot
-        self.ui_elements = load_json(file_path="./data/ui_elements.json") or {}
-        self.button_style_map = {
-            1: ButtonStyle.primary,
-            2: ButtonStyle.secondary,
-            3: ButtonStyle.success,
-            4: ButtonStyle.danger
-        }
+        self.ui_elements = ScopeStore.load("ui_elements") or {}
+        self.button_style_map = BUTTON_STYLES
+        # Compiled templates keyed by (guild_id, element_name), dropped when ui_elements changes
+        self._templates: Dict[tuple, Optional[UITemplate]] = {}
+        self._guild_actions: Dict[str, Dict[str, Dict]] = {}
+        self.router: Optional[InteractionRouter] = None
         self.action_handler = ActionHandler(bot)
         self.debug = debug
+        ScopeStore.subscribe("ui_elements", self._on_ui_elements_update)
+
+    def _on_ui_elements_update(self, scope, ui_elements):
+        """Swap in hot-reloaded UI element definitions"""
+        self.ui_elements = ui_elements or {}
+        self._templates = {}
+        self._guild_actions = {}
+        if self.debug:
+            logger.debug("UI elements reloaded for %s guilds", len(self.ui_elements))
         
+    def use_router(self, handle_legacy: bool = True) -> InteractionRouter:
+        """
+        Serve every element's buttons from one global interaction listener.
+
+        Elements sent afterwards use routed custom_ids and no per-message views.
+        With handle_legacy, buttons on older messages are routed by their plain
+        custom_id too, so register_persistent_views() is no longer needed.
+        """
+        if self.router is None:
+            self.router = InteractionRouter(self, handle_legacy=handle_legacy)
+        self.router.attach()
+        return self.router
+
+    @property
+    def routed(self) -> bool:
+        return self.router is not None and self.router.attached
+
+    async def close(self):
+        """Flush pending persistent message registrations"""
+        await self.action_handler.close()
+
     def get_ui_element(self, guild_id: str, element_name: str) -> Optional[Dict]:
         """Retrieve a UI element configuration for a specific guild"""
         guild_elements = self.ui_elements.get(str(guild_id), {})
         return guild_elements.get(element_name)
     
+    def get_template(self, guild_id: str, element_name: str) -> Optional[UITemplate]:
+        """Return the compiled template for an element, compiling it on first use"""
+        key = (str(guild_id), element_name)
+        if key in self._templates:
+            return self._templates[key]
+
+        element = self.get_ui_element(guild_id, element_name)
+        template = None
+        if element:
+            try:
+                template = UITemplate.compile(str(guild_id), element_name, element)
+            except ValueError as e:
+                logger.error("Failed to compile UI element %s: %s", element_name, e)
+        self._templates[key] = template
+        return template
+
+    def get_guild_actions(self, guild_id) -> Dict[str, Dict]:
+        """
+        custom_id -> action table for every element of a guild.
+
+        custom_ids used by more than one element are left out and logged, a
+        plain custom_id can't tell which element's action a click meant.
+        """
+        guild_id = str(guild_id)
+        actions = self._guild_actions.get(guild_id)
+        if actions is None:
+            actions, ambiguous = {}, set()
+            for element_name in self.ui_elements.get(guild_id, {}):
+                template = self.get_template(guild_id, element_name)
+                if template is None:
+                    continue
+                for custom_id, action in template.actions.items():
+                    if custom_id in actions:
+                        ambiguous.add(custom_id)
+                    else:
+                        actions[custom_id] = action
+            for custom_id in ambiguous:
+                del actions[custom_id]
+            if ambiguous:
+                logger.warning("Legacy custom_id(s) %s are shared by several UI elements in guild %s and won't be routed, resend those messages",
+                               ', '.join(sorted(ambiguous)), guild_id)
+            self._guild_actions[guild_id] = actions
+        return actions
+
     def create_embed(self, embed_data: Dict) -> Embed:
         """Create an Embed object from configuration data"""
         embed = Embed(
@@ -66,7 +145,7 @@ class CustomUI:
                             ephemeral=True
                         )
                 except Exception as e:
-                    print(f"Error in button callback: {e}")
+                    logger.error("Error in button callback: %s", e)
                     await interaction.response.send_message(
                         "An error occurred while processing your request.",
                         ephemeral=True
@@ -76,113 +155,211 @@ class CustomUI:
     
     async def load_ui_element(self, guild_id: str, element_name: str) -> Union[Dict, None]:
         """Load a UI element with all its components"""
-        element = self.get_ui_element(guild_id, element_name)
-        if not element:
+        template = self.get_template(guild_id, element_name)
+        if not template:
             return None
-            
-        result = {
-            'id': f"{guild_id}_{element_name}",
-            'name': element_name,
-            'persistent': element.get('persistent', True),  # Default to True for persistence
-            'embeds': [],
-            'view': None,
-            'config': element  # Store original config for reference
+
+        return {
+            'id': template.id,
+            'name': template.name,
+            'persistent': template.persistent,
+            'embeds': template.build_embeds(),
+            'view': template.build_view(self.action_handler, routed=self.routed),
+            'config': template.config,  # Store original config for reference
+            'content_hash': template.content_hash
         }
-        
-        # Create embeds
-        for embed_data in element.get('embeds', []):
-            result['embeds'].append(self.create_embed(embed_data))
-        
-        # Create view with components and actions
-        if 'components' in element:
-            result['view'] = await self.create_view(
-                element['components'],
-                element.get('actions', [])
-            )
-            
-        return result
 
     async def send_ui_element(self, channel, guild_id: str, element_name: str):
         """Send a UI element to a channel and register it if persistent"""
         if self.debug:
-            print(f"[DEBUG] Attempting to send UI element: {element_name} for guild: {guild_id}")
+            logger.debug("Attempting to send UI element: %s for guild: %s", element_name, guild_id)
         
         element = await self.load_ui_element(guild_id, element_name)
         if not element:
             if self.debug:
-                print(f"[DEBUG] UI element not found: {element_name}")
+                logger.debug("UI element not found: %s", element_name)
             return None
 
         try:
             if self.debug:
-                print(f"[DEBUG] Sending element with {len(element['embeds'])} embeds and view: {element['view'] is not None}")
+                logger.debug("Sending element with %s embeds and view: %s", len(element['embeds']), element['view'] is not None)
             
-            message = await channel.send(
-                embeds=element['embeds'],
-                view=element['view']
-            )
+            with get_metrics().timer("discord_request_seconds", errors="discord_request_errors_total", route="channel.send"):
+                message = await channel.send(
+                    embeds=element['embeds'],
+                    view=element['view']
+                )
 
             if element.get('persistent', True):
                 if self.debug:
-                    print(f"[DEBUG] Registering message {message.id} for persistence")
+                    logger.debug("Registering message %s for persistence", message.id)
                 await self.action_handler.register_message(
                     message=message,
                     ui_element_id=element['id'],
                     element_data={
                         'name': element['name'],
-                        'config': element['config']
+                        'config': element['config'],
+                        'content_hash': element['content_hash']
                     }
                 )
 
             return message
         except Exception as e:
             if self.debug:
-                print(f"[DEBUG] Error sending UI element: {str(e)}")
+                logger.debug("Error sending UI element: %s", e)
             return None
 
-    async def reload_persistent_messages(self):
-        """Reload all persistent messages"""
+    @staticmethod
+    def content_hash(element_config: Dict) -> str:
+        """Hash of the rendered parts of an element (embeds and components)"""
+        return content_hash(element_config)
+
+    async def _reload_message(self, message_id: str, data: Dict, element: Dict, report: Dict):
+        """Edit one stored message in place, one REST call and no fetch"""
+        channel = self.bot.get_channel(int(data['channel_id']))
+        if channel is None:
+            report['failed'][message_id] = f"Channel not found: {data['channel_id']}"
+            return
+
+        try:
+            with get_metrics().timer("discord_request_seconds", errors="discord_request_errors_total", route="message.edit"):
+                await channel.get_partial_message(int(message_id)).edit(embeds=element['embeds'], view=element['view'])
+            self.action_handler.store.register(message_id, {**data, 'content_hash': element['content_hash']})
+            report['edited'] += 1
+            if self.debug:
+                logger.debug("Updated message %s (%s)", message_id, data.get('element_name', 'unknown'))
+        except NotFound:
+            # Message was deleted, stop tracking it
+            self.action_handler.store.remove(message_id)
+            report['failed'][message_id] = "Message not found, removed from registry"
+        except Exception as e:
+            report['failed'][message_id] = str(e)
+
+    async def _reload_channel(self, items: List, semaphore: asyncio.Semaphore, report: Dict, progress):
+        """Edit a channel's messages one after another, they share a Discord rate-limit bucket"""
+        for message_id, data, element in items:
+            async with semaphore:
+                await self._reload_message(message_id, data, element, report)
+            report['done'] += 1
+            if progress is not None:
+                progress(report['done'], report['total'])
+
+    async def reload_persistent_messages(self, concurrency: int = 5, progress=None, elements: Optional[Dict[str, Dict]] = None) -> Dict:
+        """
+        Reload all persistent messages.
+
+        Messages whose rendered element did not change since they were sent only get
+        their view re-attached (no REST calls). Changed messages are edited with up to
+        `concurrency` channels in flight, one message at a time per channel, so each
+        channel's rate-limit bucket is respected.
+
+        Args:
+            concurrency (int): Max number of channels edited in parallel.
+            progress (callable, optional): Called with (done, total) after every message.
+            elements (dict, optional): Already loaded elements keyed by ui_element_id.
+
+        Returns:
+            dict: Report with total, edited, unchanged, elapsed and failed {message_id: error}.
+        """
+        started = time.monotonic()
+        report = {'total': 0, 'done': 0, 'edited': 0, 'unchanged': 0, 'failed': {}, 'elapsed': 0.0}
         if self.debug:
-            print("\n=== Starting Persistent Messages Reload ===")
-            print(f"Found {len(self.action_handler.persistent_messages)} messages to reload")
+            logger.debug("=== Starting Persistent Messages Reload ===")
 
-        for message_id, data in self.action_handler.persistent_messages.items():
+        # Group changed messages per channel, unchanged ones just get their view back.
+        # Elements are loaded once and their view is shared by every message showing them.
+        by_channel: Dict[str, List] = {}
+        elements = dict(elements or {})
+        async for message_id, data in self.action_handler.store.aiter_messages():
+            report['total'] += 1
             try:
-                if self.debug:
-                    print(f"\n[DEBUG] Processing message {message_id}:")
-                    print(f"  Channel ID: {data['channel_id']}")
-                    print(f"  Element Name: {data.get('element_name', 'unknown')}")
+                ui_element_id = data['ui_element_id']
+                guild_id, element_name = ui_element_id.split('_', 1)
+                if ui_element_id not in elements:
+                    elements[ui_element_id] = await self.load_ui_element(guild_id, element_name)
+                element = elements[ui_element_id]
+                if not element:
+                    report['failed'][message_id] = f"UI element not found: {element_name}"
+                    report['done'] += 1
+                    continue
 
-                channel = self.bot.get_channel(int(data['channel_id']))
-                if not channel and self.debug:
-                    print(f"  [ERROR] Channel not found: {data['channel_id']}")
+                if data.get('content_hash') == element['content_hash']:
+                    # Routed buttons need no view, the InteractionRouter serves them
+                    if element['view'] is not None and not self.routed:
+                        self.bot.add_view(element['view'], message_id=int(message_id))
+                    report['unchanged'] += 1
+                    report['done'] += 1
                     continue
 
-                if self.debug:
-                    print("  Channel found, fetching message...")
+                by_channel.setdefault(data['channel_id'], []).append((message_id, data, element))
+            except Exception as e:
+                report['failed'][message_id] = str(e)
+                report['done'] += 1
 
-                message = await channel.fetch_message(int(message_id))
-                guild_id, element_name = data['ui_element_id'].split('_', 1)
-                
-                if self.debug:
-                    print(f"  Loading UI element: {element_name}")
-
-                element = await self.load_ui_element(guild_id, element_name)
-                if element:
-                    if self.debug:
-                        print("  Updating message with new content...")
-                    await message.edit(embeds=element['embeds'], view=element['view'])
-                    if self.debug:
-                        print("  Message updated successfully")
-                else:
-                    print(f"  [ERROR] Failed to load UI element: {element_name}")
+        if self.debug:
+            pending = sum(len(items) for items in by_channel.values())
+            logger.debug("Found %s messages, %s unchanged, %s to update in %s channels", report['total'], report['unchanged'], pending, len(by_channel))
 
-            except Exception as e:
-                if self.debug:
-                    print(f"  [ERROR] Failed to reload message {message_id}:")
-                    print(f"  Error details: {str(e)}")
-                else:
-                    print(f"Failed to reload message {message_id}: {e}")
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        await asyncio.gather(*(
+            self._reload_channel(items, semaphore, report, progress)
+            for items in by_channel.values()
+        ))
+
+        report['elapsed'] = round(time.monotonic() - started, 2)
+        for message_id, error in report['failed'].items():
+            logger.warning("Failed to reload message %s: %s", message_id, error)
+        logger.info("Persistent messages reloaded: %s updated, %s unchanged, %s failed in %ss", report['edited'], report['unchanged'], len(report['failed']), report['elapsed'])
+
+        if self.debug:
+            logger.debug("=== Persistent Messages Reload Complete ===")
+        return report
+
+    async def register_persistent_views(self, edit_changed: bool = True, concurrency: int = 5, progress=None) -> Dict:
+        """
+        Startup mode: re-attach button callbacks without fetching or editing messages.
+
+        Builds one view per persistent element definition and registers it with the
+        library's persistent view store, so buttons work right away with zero REST
+        calls. Views whose custom_ids are unique across all elements are registered
+        for any message; the rest rely on message_id hints from the registry.
+        Only messages whose rendered content changed are edited.
 
+        Args:
+            edit_changed (bool): Edit messages whose element changed since they were sent.
+            concurrency (int): Max number of channels edited in parallel.
+            progress (callable, optional): Called with (done, total) after every message.
+
+        Returns:
+            dict: The reload report, see reload_persistent_messages().
+        """
+        definitions = [
+            (guild_id, element_name, element)
+            for guild_id, guild_elements in self.ui_elements.items()
+            for element_name, element in guild_elements.items()
+            if element.get('persistent', True) and element.get('components')
+        ]
+        custom_id_counts: Dict[str, int] = {}
+        for _, _, element in definitions:
+            for component in element['components']:
+                custom_id = component.get('custom_id')
+                custom_id_counts[custom_id] = custom_id_counts.get(custom_id, 0) + 1
+
+        registered = 0
+        elements: Dict[str, Dict] = {}
+        for guild_id, element_name, element in definitions:
+            loaded = await self.load_ui_element(guild_id, element_name)
+            if not loaded:
+                continue
+            elements[loaded['id']] = loaded
+            if loaded['view'] is not None and not self.routed and all(custom_id_counts.get(component.get('custom_id')) == 1 for component in element['components']):
+                self.bot.add_view(loaded['view'])
+                registered += 1
         if self.debug:
-            print("\n=== Persistent Messages Reload Complete ===\n")
\ No newline at end of file
+            logger.debug("Registered %s/%s persistent views by custom_id", registered, len(definitions))
+
+        if not edit_changed:
+            return {'registered': registered}
+        report = await self.reload_persistent_messages(concurrency=concurrency, progress=progress, elements=elements)
+        report['registered'] = registered
+        return report
@@ -1,4 +1,5 @@
-from ..utils import load_json, Get_Datetime_UTC
+from ..utils import Get_Datetime_UTC
+from ..ScopeStore import ScopeStore
 from .ui_utils import get_highest_role_without_color
 from nextcord import Embed, Colour, File
 from io import BytesIO
@@ -8,7 +9,11 @@ class GeneralEmbeds:
     def __init__(self, bot):
         self.bot = bot
         self.default_colour = Colour.darker_grey()
-        self.roles = load_json(file_path="./data/roles.json") or {}
+        self.roles = ScopeStore.load("roles") or {}
+        ScopeStore.subscribe("roles", self._on_roles_update)
+
+    def _on_roles_update(self, scope, roles):
+        self.roles = roles or {}
 
 
     async def ping_embed(self, ctx):
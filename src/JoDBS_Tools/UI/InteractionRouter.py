@@ -0,0 +1,116 @@
+import logging
+from nextcord import Interaction, InteractionType
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ROUTE_PREFIX = "jd"
+MAX_CUSTOM_ID_LENGTH = 100
+
+
+def encode_custom_id(guild_id, element_name: str, index: int) -> str:
+    """
+    Build a compact routable custom_id: jd:<guild_id>:<element_name>:<component index>
+
+    Raises:
+        ValueError: If the result exceeds Discord's 100 character custom_id limit.
+    """
+    custom_id = f"{ROUTE_PREFIX}:{guild_id}:{element_name}:{index}"
+    if len(custom_id) > MAX_CUSTOM_ID_LENGTH:
+        raise ValueError(f"Routed custom_id for element '{element_name}' is longer than {MAX_CUSTOM_ID_LENGTH} characters")
+    return custom_id
+
+
+def decode_custom_id(custom_id: Optional[str]) -> Optional[Tuple[str, str, int]]:
+    """Split a routed custom_id into (guild_id, element_name, index), None if it is not one"""
+    if not custom_id or not custom_id.startswith(f"{ROUTE_PREFIX}:"):
+        return None
+    try:
+        _, guild_id, rest = custom_id.split(':', 2)
+        element_name, index = rest.rsplit(':', 1)
+        return guild_id, element_name, int(index)
+    except ValueError:
+        return None
+
+
+class InteractionRouter:
+    """
+    One listener that serves every component interaction of CustomUI elements.
+
+    Routed custom_ids are decoded and looked up in the element's prebuilt
+    action table; plain custom_ids from older messages fall back to a
+    per-guild custom_id -> action table, unless a TemplateView registered
+    with bot.add_view() still serves that button. custom_ids shared by
+    several elements of a guild are ambiguous and never routed that way. Messages sent while the
+    router is attached carry no per-message View objects at all.
+    """
+    def __init__(self, custom_ui, handle_legacy: bool = True):
+        self.custom_ui = custom_ui
+        self.bot = custom_ui.bot
+        self.handle_legacy = handle_legacy
+        self.attached = False
+
+    def attach(self):
+        if not self.attached:
+            self.bot.add_listener(self.on_interaction, "on_interaction")
+            self.attached = True
+
+    def detach(self):
+        if self.attached:
+            self.bot.remove_listener(self.on_interaction, "on_interaction")
+            self.attached = False
+
+    def resolve(self, guild_id, custom_id: Optional[str]) -> Optional[Dict]:
+        """Find the action for a custom_id, or None if it is not a CustomUI component"""
+        decoded = decode_custom_id(custom_id)
+        if decoded is not None:
+            element_guild_id, element_name, index = decoded
+            template = self.custom_ui.get_template(element_guild_id, element_name)
+            if template is None or not 0 <= index < len(template.action_list):
+                return None
+            return template.action_list[index]
+
+        if self.handle_legacy and guild_id is not None:
+            return self.custom_ui.get_guild_actions(guild_id).get(custom_id)
+        return None
+
+    def _served_by_view(self, interaction: Interaction, custom_id: Optional[str]) -> bool:
+        """Whether a TemplateView in nextcord's view store will handle this click itself"""
+        from .UITemplate import TemplateView  # UITemplate imports this module
+        views = getattr(getattr(self.bot._connection, '_view_store', None), '_views', None)
+        if not views:
+            return False
+        component_type = (interaction.data or {}).get('component_type')
+        message_id = interaction.message.id if interaction.message else None
+        entry = views.get((component_type, message_id, custom_id)) or views.get((component_type, None, custom_id))
+        return entry is not None and isinstance(entry[0], TemplateView) and not entry[0].is_finished()
+
+    async def on_interaction(self, interaction: Interaction):
+        if interaction.type != InteractionType.component:
+            return
+
+        custom_id = (interaction.data or {}).get('custom_id')
+        action = self.resolve(interaction.guild_id, custom_id)
+        if action is None:
+            return
+        if decode_custom_id(custom_id) is None and self._served_by_view(interaction, custom_id):
+            return
+
+        try:
+            await self.custom_ui.action_handler.handle_action(interaction, action)
+        except Exception as e:
+            logger.error("Error in routed interaction %s: %s", custom_id, e)
+            if not interaction.response.is_done():
+                await interaction.response.send_message(
+                    "An error occurred while processing your request.",
+                    ephemeral=True
+                )
+            return
+
+        # Unknown action types and handlers that bail out early leave the click unanswered
+        if not interaction.response.is_done():
+            logger.warning("Routed interaction %s got no response (action type %s)", custom_id, action.get('type'))
+            await interaction.response.send_message(
+                "This button couldn't be handled.",
+                ephemeral=True
+            )
@@ -0,0 +1,466 @@
+from typing import Any, Dict, Iterator, Optional, Tuple
+from ..utils import save_json_atomic, Get_ENV
+import abc, asyncio, atexit, bisect, json, logging, os, sqlite3, threading, weakref
+
+logger = logging.getLogger(__name__)
+
+Record = Dict[str, Any]
+
+INDEXED_FIELDS = ('guild_id', 'channel_id', 'ui_element_id')
+
+
+class PersistenceBackend(abc.ABC):
+    """
+    Base class for persistent message stores.
+
+    Records are dicts keyed by message ID with at least channel_id, guild_id
+    and ui_element_id. Backends are synchronous; PersistenceManager calls
+    them from a worker thread.
+    """
+    @abc.abstractmethod
+    def get(self, message_id: str) -> Optional[Record]:
+        pass
+
+    @abc.abstractmethod
+    def upsert_many(self, records: Dict[str, Record]):
+        pass
+
+    @abc.abstractmethod
+    def delete_many(self, message_ids):
+        pass
+
+    @abc.abstractmethod
+    def iter_messages(self, **filters) -> Iterator[Tuple[str, Record]]:
+        pass
+
+    @abc.abstractmethod
+    def page(self, after: Optional[str], limit: int, **filters) -> list:
+        """Return up to `limit` (message_id, record) pairs with message_id > after, ordered by message_id"""
+
+    @abc.abstractmethod
+    def count(self) -> int:
+        pass
+
+    def existing(self, message_ids) -> set:
+        """The given IDs that are stored, override with a batched lookup"""
+        return {message_id for message_id in message_ids if self.get(message_id) is not None}
+
+    def close(self):
+        pass
+
+
+class JSONBackend(PersistenceBackend):
+    """
+    Keeps the registry in memory and rewrites ./data/persistent_messages.json on flush.
+
+    Compatible with the original file format. Fine for small bots; use
+    SQLiteBackend when the registry grows large.
+    """
+    def __init__(self, file_path='./data/persistent_messages.json'):
+        self.file_path = file_path
+        self.messages: Dict[str, Record] = {}
+        self._indexes = {field: {} for field in INDEXED_FIELDS}
+        self._sorted_ids = None
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.file_path, 'r') as f:
+                messages = json.load(f)
+        except FileNotFoundError:
+            messages = {}
+        except json.JSONDecodeError as e:
+            logger.error("Failed to parse %s, starting with an empty registry: %s", self.file_path, e)
+            messages = {}
+        for message_id, record in messages.items():
+            self._index(str(message_id), record)
+        self.messages = {str(message_id): record for message_id, record in messages.items()}
+
+    def _index(self, message_id, record):
+        for field in INDEXED_FIELDS:
+            value = record.get(field)
+            if value is not None:
+                self._indexes[field].setdefault(str(value), set()).add(message_id)
+
+    def _unindex(self, message_id, record):
+        for field in INDEXED_FIELDS:
+            ids = self._indexes[field].get(str(record.get(field)))
+            if ids:
+                ids.discard(message_id)
+
+    def get(self, message_id):
+        return self.messages.get(str(message_id))
+
+    def upsert_many(self, records):
+        with self._lock:
+            for message_id, record in records.items():
+                old = self.messages.get(message_id)
+                if old is not None:
+                    self._unindex(message_id, old)
+                self.messages[message_id] = record
+                self._index(message_id, record)
+            self._sorted_ids = None
+            snapshot = dict(self.messages)
+        save_json_atomic(snapshot, self.file_path, indent=None)
+
+    def delete_many(self, message_ids):
+        with self._lock:
+            for message_id in message_ids:
+                old = self.messages.pop(message_id, None)
+                if old is not None:
+                    self._unindex(message_id, old)
+            self._sorted_ids = None
+            snapshot = dict(self.messages)
+        save_json_atomic(snapshot, self.file_path, indent=None)
+
+    def _matching_ids(self, filters):
+        ids = None
+        for field, value in filters.items():
+            if value is None:
+                continue
+            matches = self._indexes[field].get(str(value), set())
+            ids = set(matches) if ids is None else ids & matches
+        return ids
+
+    def iter_messages(self, **filters):
+        ids = self._matching_ids(filters)
+        if ids is None:
+            yield from list(self.messages.items())
+            return
+        for message_id in ids:
+            record = self.messages.get(message_id)
+            if record is not None:
+                yield message_id, record
+
+    def page(self, after, limit, **filters):
+        ids = self._matching_ids(filters)
+        if ids is None:
+            if self._sorted_ids is None:
+                self._sorted_ids = sorted(self.messages)
+            ids = self._sorted_ids
+        else:
+            ids = sorted(ids)
+        start = bisect.bisect_right(ids, after) if after is not None else 0
+        messages = self.messages
+        return [(message_id, messages[message_id]) for message_id in ids[start:start + limit] if message_id in messages]
+
+    def count(self):
+        return len(self.messages)
+
+    def existing(self, message_ids):
+        return {message_id for message_id in message_ids if message_id in self.messages}
+
+
+class SQLiteBackend(PersistenceBackend):
+    """
+    Indexed SQLite store for large registries.
+
+    Inserts and deletes are incremental, lookups by guild, channel and
+    ui_element_id use indexes, and iteration streams rows instead of loading
+    the whole registry. An existing persistent_messages.json is imported on first use.
+    """
+    def __init__(self, db_path='./data/persistent_messages.db', import_json='./data/persistent_messages.json'):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS persistent_messages ("
+            " message_id TEXT PRIMARY KEY,"
+            " guild_id TEXT,"
+            " channel_id TEXT,"
+            " ui_element_id TEXT,"
+            " data TEXT NOT NULL)"
+        )
+        for field in INDEXED_FIELDS:
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_pm_{field} ON persistent_messages ({field})")
+        self.conn.commit()
+
+        if import_json and self.count() == 0 and os.path.exists(import_json):
+            self._import_json(import_json)
+
+    def _import_json(self, file_path):
+        try:
+            with open(file_path, 'r') as f:
+                messages = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error("Failed to import %s into SQLite: %s", file_path, e)
+            return
+        self.upsert_many({str(message_id): record for message_id, record in messages.items()})
+        logger.info("Imported %s persistent messages from %s", len(messages), file_path)
+
+    @staticmethod
+    def _row(message_id, record):
+        return (
+            message_id,
+            _str_or_none(record.get('guild_id')),
+            _str_or_none(record.get('channel_id')),
+            _str_or_none(record.get('ui_element_id')),
+            json.dumps(record, separators=(',', ':'))
+        )
+
+    @staticmethod
+    def _where(filters):
+        clauses, params = [], []
+        for field, value in filters.items():
+            if value is None:
+                continue
+            if field not in INDEXED_FIELDS:
+                raise ValueError(f"Cannot filter persistent messages by '{field}'")
+            clauses.append(f"{field} = ?")
+            params.append(str(value))
+        return clauses, params
+
+    def get(self, message_id):
+        with self._lock:
+            row = self.conn.execute("SELECT data FROM persistent_messages WHERE message_id = ?", (str(message_id),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def upsert_many(self, records):
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO persistent_messages (message_id, guild_id, channel_id, ui_element_id, data) VALUES (?, ?, ?, ?, ?)",
+                [self._row(message_id, record) for message_id, record in records.items()]
+            )
+
+    def delete_many(self, message_ids):
+        with self._lock, self.conn:
+            self.conn.executemany("DELETE FROM persistent_messages WHERE message_id = ?", [(message_id,) for message_id in message_ids])
+
+    def page(self, after, limit, **filters):
+        clauses, params = self._where(filters)
+        if after is not None:
+            clauses.append("message_id > ?")
+            params.append(after)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT message_id, data FROM persistent_messages {where} ORDER BY message_id LIMIT ?",
+                (*params, limit)
+            ).fetchall()
+        return [(message_id, json.loads(data)) for message_id, data in rows]
+
+    def iter_messages(self, batch_size=500, **filters):
+        after = None
+        while True:
+            rows = self.page(after, batch_size, **filters)
+            if not rows:
+                return
+            yield from rows
+            after = rows[-1][0]
+
+    def count(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM persistent_messages").fetchone()[0]
+
+    def existing(self, message_ids):
+        message_ids = list(message_ids)
+        found = set()
+        with self._lock:
+            # Stay below SQLite's bound parameter limit
+            for start in range(0, len(message_ids), 500):
+                chunk = message_ids[start:start + 500]
+                rows = self.conn.execute(
+                    f"SELECT message_id FROM persistent_messages WHERE message_id IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                found.update(row[0] for row in rows)
+        return found
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+def _str_or_none(value):
+    return None if value is None else str(value)
+
+
+BACKENDS = {
+    'json': JSONBackend,
+    'sqlite': SQLiteBackend,
+}
+
+# Backend path -> managers writing to it, flushed by one atexit hook per path
+_exit_flushes: Dict[str, weakref.WeakSet] = {}
+
+def _flush_on_exit(path):
+    for manager in list(_exit_flushes.get(path, ())):
+        manager.flush_sync()
+
+
+class PersistenceManager:
+    """
+    Write-behind front-end for a PersistenceBackend.
+
+    Registrations and removals are buffered, coalesced per message and flushed
+    to the backend in batches, either after flush_interval seconds or once
+    flush_threshold changes are pending. Backend I/O runs off the event loop.
+
+    Args:
+        backend (str | PersistenceBackend): 'json', 'sqlite' or a backend instance.
+            Defaults to the PERSISTENCE_BACKEND environment variable, or 'json'.
+    """
+    def __init__(self, backend=None, flush_interval: float = 2.0, flush_threshold: int = 100, debug=False):
+        if backend is None:
+            backend = Get_ENV("PERSISTENCE_BACKEND", default="json")
+        if isinstance(backend, str):
+            if backend not in BACKENDS:
+                raise ValueError(f"Unknown persistence backend '{backend}', expected one of {', '.join(BACKENDS)}")
+            backend = BACKENDS[backend]()
+        self.backend: PersistenceBackend = backend
+        self.debug = debug
+
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self._pending: Dict[str, Optional[Record]] = {}  # None marks a delete
+        self._stored: Dict[str, bool] = {}  # Pending message_id -> whether the backend has it
+        self._flush_handle = None
+        self._flush_task = None
+        self._flush_lock = asyncio.Lock()
+        self._write_lock = threading.Lock()
+
+        path = getattr(backend, 'file_path', None) or getattr(backend, 'db_path', None)
+        self._exit_key = os.path.abspath(path) if path else f"{type(backend).__name__}:{id(backend)}"
+        managers = _exit_flushes.get(self._exit_key)
+        if managers is None:
+            managers = _exit_flushes[self._exit_key] = weakref.WeakSet()
+            atexit.register(_flush_on_exit, self._exit_key)
+        managers.add(self)
+
+    # Writes
+
+    def register(self, message_id, record: Record):
+        self._pending[str(message_id)] = record
+        self._schedule_flush()
+
+    def remove(self, message_id):
+        self._pending[str(message_id)] = None
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush_sync()
+            return
+
+        if len(self._pending) >= self.flush_threshold:
+            if self._flush_task is None or self._flush_task.done():
+                self._flush_task = loop.create_task(self.flush())
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.flush_interval, lambda: loop.create_task(self.flush()))
+
+    def _write(self, pending):
+        upserts = {message_id: record for message_id, record in pending.items() if record is not None}
+        deletes = [message_id for message_id, record in pending.items() if record is None]
+        with self._write_lock:
+            if upserts:
+                self.backend.upsert_many(upserts)
+            if deletes:
+                self.backend.delete_many(deletes)
+
+    def _written(self, pending, ok=True):
+        """Keep the stored state of flushed IDs that were queued again meanwhile"""
+        for message_id, record in pending.items():
+            if ok and message_id in self._pending:
+                self._stored[message_id] = record is not None
+            else:
+                self._stored.pop(message_id, None)
+
+    async def flush(self):
+        """Write pending changes to the backend off the event loop"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            try:
+                await asyncio.to_thread(self._write, pending)
+                self._written(pending)
+                if self.debug:
+                    logger.debug("Flushed %s persistent message change(s)", len(pending))
+            except Exception as e:
+                # Keep newer changes made while flushing, part of the batch may have been written
+                self._written(pending, ok=False)
+                self._pending = {**pending, **self._pending}
+                logger.error("Failed to save persistent messages: %s", e)
+
+    def flush_sync(self):
+        """Flush pending changes synchronously, used on interpreter shutdown"""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        try:
+            self._write(pending)
+            self._written(pending)
+        except Exception as e:
+            self._written(pending, ok=False)
+            self._pending = {**pending, **self._pending}
+            logger.error("Failed to save persistent messages: %s", e)
+
+    async def close(self):
+        await self.flush()
+        await asyncio.to_thread(self.backend.close)
+        _exit_flushes.get(self._exit_key, set()).discard(self)
+
+    # Reads
+
+    def get(self, message_id) -> Optional[Record]:
+        message_id = str(message_id)
+        if message_id in self._pending:
+            return self._pending[message_id]
+        return self.backend.get(message_id)
+
+    def count(self) -> int:
+        """Number of stored messages, including pending registrations"""
+        pending = dict(self._pending)
+        # Look up whether newly queued IDs are stored in one batch, then remember it until they are flushed
+        unknown = [message_id for message_id in pending if message_id not in self._stored]
+        if unknown:
+            existing = self.backend.existing(unknown)
+            for message_id in unknown:
+                self._stored[message_id] = message_id in existing
+
+        total = self.backend.count()
+        for message_id, record in pending.items():
+            stored = self._stored.get(message_id, False)
+            if record is None and stored:
+                total -= 1
+            elif record is not None and not stored:
+                total += 1
+        return total
+
+    @staticmethod
+    def _matches(record, filters):
+        return all(value is None or str(record.get(field)) == str(value) for field, value in filters.items())
+
+    def iter_messages(self, **filters) -> Iterator[Tuple[str, Record]]:
+        """Stream (message_id, record) pairs, optionally filtered by guild_id, channel_id or ui_element_id"""
+        pending = dict(self._pending)
+        for message_id, record in self.backend.iter_messages(**filters):
+            if message_id not in pending:
+                yield message_id, record
+        for message_id, record in pending.items():
+            if record is not None and self._matches(record, filters):
+                yield message_id, record
+
+    async def aiter_messages(self, batch_size: int = 500, **filters):
+        """Async variant of iter_messages, pages through the backend in a worker thread"""
+        pending = dict(self._pending)
+        after = None
+        while True:
+            rows = await asyncio.to_thread(self.backend.page, after, batch_size, **filters)
+            if not rows:
+                break
+            for message_id, record in rows:
+                if message_id not in pending:
+                    yield message_id, record
+            after = rows[-1][0]
+        for message_id, record in pending.items():
+            if record is not None and self._matches(record, filters):
+                yield message_id, record
@@ -0,0 +1,177 @@
+from nextcord import Embed, ButtonStyle, Interaction
+from nextcord.ui import View, Button
+from types import MappingProxyType
+from typing import Dict, List, Optional, Tuple
+from .InteractionRouter import encode_custom_id
+import copy, hashlib, json, logging
+
+logger = logging.getLogger(__name__)
+
+BUTTON_STYLES = MappingProxyType({
+    1: ButtonStyle.primary,
+    2: ButtonStyle.secondary,
+    3: ButtonStyle.success,
+    4: ButtonStyle.danger
+})
+
+
+def content_hash(element_config: Dict) -> str:
+    """Hash of the rendered parts of an element (embeds and components)"""
+    payload = {
+        'embeds': element_config.get('embeds', []),
+        'components': element_config.get('components', [])
+    }
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, separators=(',', ':')).encode()).hexdigest()
+
+
+class UITemplate:
+    """
+    A UI element from ui_elements.json, validated and precompiled once.
+
+    Holds ready-made embed payloads, the button layout as
+    (custom_id, label, style, disabled) tuples, a read-only
+    custom_id -> action dispatch table and the same actions by component
+    index for routed custom_ids. Sending a panel only has to instantiate
+    embeds and a lightweight view from it.
+    """
+    __slots__ = ('id', 'guild_id', 'name', 'persistent', 'config', 'embed_payloads', 'components', 'actions', 'action_list', 'content_hash')
+
+    def __init__(self, guild_id: str, name: str, persistent: bool, config: Dict,
+                 embed_payloads: Tuple[Dict, ...], components: Tuple[tuple, ...], actions: MappingProxyType, content_hash: str):
+        self.id = f"{guild_id}_{name}"
+        self.guild_id = guild_id
+        self.name = name
+        self.persistent = persistent
+        self.config = config
+        self.embed_payloads = embed_payloads
+        self.components = components
+        self.actions = actions
+        self.action_list = tuple(actions.get(component[0]) for component in components)
+        self.content_hash = content_hash
+
+    @staticmethod
+    def _compile_embed(embed_data: Dict) -> Dict:
+        """Embed payload with the same keys CustomUI.create_embed() renders: title, description and color"""
+        if not isinstance(embed_data, dict):
+            raise ValueError(f"embed must be an object, got {type(embed_data).__name__}")
+        payload = {'type': 'rich', 'color': embed_data.get('color', 0)}
+        for key in ('title', 'description'):
+            if embed_data.get(key) is not None:
+                payload[key] = embed_data[key]
+        return payload
+
+    @staticmethod
+    def _compile_component(component: Dict) -> Optional[tuple]:
+        if component.get('type') != 'button':
+            return None
+        custom_id = component.get('custom_id')
+        if not custom_id:
+            raise ValueError("button is missing a custom_id")
+        style = component.get('style', 1)
+        if style not in BUTTON_STYLES:
+            raise ValueError(f"button '{custom_id}' has unknown style {style}")
+        return (custom_id, component.get('label'), style, bool(component.get('disabled', False)))
+
+    @classmethod
+    def compile(cls, guild_id: str, name: str, config: Dict) -> "UITemplate":
+        """
+        Validate and precompile an element definition.
+
+        Raises:
+            ValueError: If the definition is malformed.
+        """
+        if not isinstance(config, dict):
+            raise ValueError(f"UI element '{name}' must be an object")
+        try:
+            embed_payloads = tuple(cls._compile_embed(embed_data) for embed_data in config.get('embeds', []))
+            components = tuple(
+                compiled for compiled in (cls._compile_component(component) for component in config.get('components', []))
+                if compiled is not None
+            )
+            actions = {}
+            for action in config.get('actions', []):
+                if 'custom_id' not in action or 'type' not in action:
+                    raise ValueError("action needs a custom_id and a type")
+                actions[action['custom_id']] = MappingProxyType(dict(action))
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid UI element '{name}' for guild {guild_id}: {e}") from e
+
+        return cls(
+            guild_id=str(guild_id),
+            name=name,
+            persistent=config.get('persistent', True),  # Default to True for persistence
+            config=config,
+            embed_payloads=embed_payloads,
+            components=components,
+            actions=MappingProxyType(actions),
+            content_hash=content_hash(config)
+        )
+
+    @property
+    def has_view(self) -> bool:
+        return 'components' in self.config
+
+    def build_embeds(self) -> List[Embed]:
+        """Fresh Embed objects, safe to mutate without touching the template"""
+        return [Embed.from_dict(copy.deepcopy(payload)) for payload in self.embed_payloads]
+
+    def build_view(self, action_handler, routed: bool = False) -> Optional[View]:
+        """
+        Instantiate the element's view.
+
+        Routed views carry compact custom_ids and no callbacks; an attached
+        InteractionRouter handles their clicks and nextcord never stores them.
+        """
+        if not self.has_view:
+            return None
+        if routed:
+            return RoutedView(self)
+        return TemplateView(self, action_handler)
+
+
+class TemplateView(View):
+    """Persistent view instantiated from a UITemplate, dispatching clicks through its action table"""
+    def __init__(self, template: UITemplate, action_handler):
+        super().__init__(timeout=None)
+        self.template = template
+        self.action_handler = action_handler
+
+        for custom_id, label, style, disabled in template.components:
+            button = Button(custom_id=custom_id, label=label, style=BUTTON_STYLES[style], disabled=disabled)
+            button.callback = self.button_callback
+            self.add_item(button)
+
+    @property
+    def actions(self):
+        return self.template.actions
+
+    async def button_callback(self, interaction: Interaction):
+        try:
+            custom_id = interaction.data.get('custom_id')
+            action = self.template.actions.get(custom_id)
+            if action:
+                await self.action_handler.handle_action(interaction, action)
+            else:
+                await interaction.response.send_message(
+                    "No action found for this button.",
+                    ephemeral=True
+                )
+        except Exception as e:
+            logger.error("Error in button callback: %s", e)
+            await interaction.response.send_message(
+                "An error occurred while processing your request.",
+                ephemeral=True
+            )
+
+
+class RoutedView(View):
+    """Callback-free view with routed custom_ids, not kept in nextcord's view store"""
+    def __init__(self, template: UITemplate):
+        super().__init__(timeout=None, prevent_update=False)
+        for index, (custom_id, label, style, disabled) in enumerate(template.components):
+            self.add_item(Button(
+                custom_id=encode_custom_id(template.guild_id, template.name, index),
+                label=label,
+                style=BUTTON_STYLES[style],
+                disabled=disabled
+            ))
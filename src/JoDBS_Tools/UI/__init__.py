@@ -3,7 +3,10 @@
 # UI Packages
 from .GeneralEmbeds import GeneralEmbeds
 from .CustomUI import CustomUI
+from .UITemplate import UITemplate, TemplateView, RoutedView
+from .InteractionRouter import InteractionRouter, encode_custom_id, decode_custom_id
 from .ActionHandler import ActionHandler
+from .PersistenceManager import PersistenceManager, PersistenceBackend, JSONBackend, SQLiteBackend
 
 # Singular Elements
 from .ConfirmView import ConfirmView
@@ -13,7 +16,17 @@ __all__ = [
     # UI Packages
     'GeneralEmbeds',
     'CustomUI',
+    'UITemplate',
+    'TemplateView',
+    'RoutedView',
+    'InteractionRouter',
+    'encode_custom_id',
+    'decode_custom_id',
     'ActionHandler',
+    'PersistenceManager',
+    'PersistenceBackend',
+    'JSONBackend',
+    'SQLiteBackend',
 
     # Singular Elements
     'ConfirmView',
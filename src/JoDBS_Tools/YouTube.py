@@ -1,28 +1,40 @@
-import requests
+import logging, requests
+from .YouTubeState import SeenVideoStore
+from .YouTubeVideo import YouTubeVideo
+
+logger = logging.getLogger(__name__)
 
 class YouTube:
-    def __init__(self, api_key):
+    def __init__(self, api_key, seen_store=None, timeout=10.0):
         self.api_key = api_key
+        self.timeout = timeout  # Seconds per request, a stalled connection would block forever
         self.base_url = 'https://www.googleapis.com/youtube/v3'
+        # Remembers announced videos per channel, pass a JSON/Mongo store to survive restarts
+        self.seen_store = seen_store if seen_store is not None else SeenVideoStore()
 
-    def get_latest_video(self, channel_id):
+    def get_latest_video(self, channel_id, include_raw=False):
         """
         Fetches the latest video from a specified YouTube channel.
         Args:
             channel_id (str): The ID of the YouTube channel.
+            include_raw (bool): Keep the API response, available lazily as video['raw_data'].
         Returns:
-            dict: A dictionary containing the video ID, title, description, and thumbnails of the latest video if found.
+            YouTubeVideo: The latest video, readable like a dict.
               Example:
               {
                   'video_id': 'abc123',
+                  'channel_id': 'UC...',
                   'title': 'Latest Video Title',
                   'description': 'Description of the latest video',
                   'thumbnails': {
-                  'default': {'url': 'https://...'},
-                  'medium': {'url': 'https://...'},
-                  'high': {'url': 'https://...'},
-                  'live_status': {'live, upcoming, or none'},
-                  'raw_data': { ... }
+                      'default': {'url': 'https://...'},
+                      'medium': {'url': 'https://...'},
+                      'high': {'url': 'https://...'}
+                  },
+                  'live_status': 'live, upcoming, or none',
+                  'published_at': '2024-01-01T00:00:00Z',
+                  'raw_data': None  # The response when include_raw is set
+              }
             None: If no video is found.
         """
         url = f'{self.base_url}/search'
@@ -35,26 +47,76 @@ class YouTube:
             'key': self.api_key
         }
         try:
-            response = requests.get(url, params=params)
+            response = requests.get(url, params=params, timeout=self.timeout)
+            response.raise_for_status()
+            videos = YouTubeVideo.from_response(response.json(), response.text, keep_raw=include_raw)
+            return videos[0] if videos else None
+        except requests.exceptions.RequestException as e:
+            logger.error("Error fetching latest video: %s", e)
+            return None
+
+    def _fetch_videos(self, video_ids, include_raw=False):
+        videos = {}
+        for i in range(0, len(video_ids), 50):
+            response = requests.get(f'{self.base_url}/videos', params={
+                'part': 'snippet',
+                'id': ','.join(video_ids[i:i + 50]),
+                'key': self.api_key
+            }, timeout=self.timeout)
+            response.raise_for_status()
+            for video in YouTubeVideo.from_response(response.json(), response.text, keep_raw=include_raw):
+                videos[video.video_id] = video
+        return [videos[video_id] for video_id in video_ids if video_id in videos]
+
+    def get_videos(self, video_ids, include_raw=False):
+        """
+        Fetches many videos at once, 50 per request (1 quota unit each).
+        Args:
+            video_ids (list): The video IDs.
+            include_raw (bool): Keep each response, shared by the videos built from it.
+        Returns:
+            list: YouTubeVideo records in the requested order, missing videos are skipped.
+        """
+        try:
+            return self._fetch_videos(list(video_ids), include_raw)
+        except requests.exceptions.RequestException as e:
+            logger.error("Error fetching videos: %s", e)
+            return []
+
+    def get_new_videos(self, channel_id, max_results=10, announce_first=False):
+        """
+        Fetches every video uploaded since the last check of a channel.
+
+        Reads the channel's uploads playlist (1 quota unit) and looks up only
+        the unseen videos (1 more unit), instead of a 100 unit search call.
+        The first check of a channel only records its current videos unless
+        announce_first is set. Seen IDs are kept in self.seen_store.
+
+        Args:
+            channel_id (str): The ID of the YouTube channel.
+            max_results (int): How many recent uploads to compare, at most 50.
+            announce_first (bool): Return current videos on the first check too.
+        Returns:
+            list: YouTubeVideo records, oldest first.
+        """
+        # A channel's uploads playlist ID is its channel ID with UC replaced by UU
+        playlist_id = f'UU{channel_id[2:]}' if channel_id.startswith('UC') else channel_id
+        try:
+            response = requests.get(f'{self.base_url}/playlistItems', params={
+                'part': 'contentDetails',
+                'playlistId': playlist_id,
+                'maxResults': min(max_results, 50),
+                'key': self.api_key
+            }, timeout=self.timeout)
             response.raise_for_status()
-            data = response.json()
-            if 'items' in data and len(data['items']) > 0:
-                video = data['items'][0]
-                video_id = video['id']['videoId']
-                title = video['snippet']['title']
-                description = video['snippet']['description']
-                thumbnails = video['snippet']['thumbnails'],
-                live_status = video['snippet']['liveBroadcastContent']
-                return {
-                    'video_id': video_id,
-                    'title': title,
-                    'description': description,
-                    'thumbnails': thumbnails,
-                    'live_status': live_status,
-                    'raw_data': data
-                }
-            else:
-                return None
+            video_ids = [item['contentDetails']['videoId'] for item in response.json().get('items', [])]
+
+            new_ids = self.seen_store.unseen(channel_id, video_ids, announce_first=announce_first)
+            videos = self._fetch_videos(new_ids) if new_ids else []
+            # Only remember the videos once they could be returned
+            self.seen_store.record(channel_id, video_ids)
+            self.seen_store.save()
+            return videos
         except requests.exceptions.RequestException as e:
-            print(f"Error fetching latest video: {e}")
-            return None
\ No newline at end of file
+            logger.error("Error fetching new videos: %s", e)
+            return []
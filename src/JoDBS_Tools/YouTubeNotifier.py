@@ -0,0 +1,241 @@
+import asyncio, inspect, logging, time
+from datetime import datetime, timedelta, timezone
+import aiohttp
+from .YouTubeState import SeenVideoStore
+from .YouTubeVideo import YouTubeVideo
+
+logger = logging.getLogger(__name__)
+
+try:
+    from zoneinfo import ZoneInfo
+    _QUOTA_TZ = ZoneInfo("America/Los_Angeles")
+except Exception:  # No tzdata available
+    _QUOTA_TZ = timezone(timedelta(hours=-8))
+
+BATCH_SIZE = 50  # Max IDs per channels/videos request
+
+
+def _chunks(items, size=BATCH_SIZE):
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class YouTubeNotifier:
+    """
+    Async YouTube upload notifier built on the cheap 1-unit API endpoints.
+
+    Each channel's uploads playlist is resolved once (batched, cached), then
+    polled with playlistItems. New video IDs are looked up with batched
+    videos requests (up to 50 IDs each). Polls are spread over an interval
+    chosen so a full day of polling fits in `daily_quota` units, and
+    callbacks only fire for videos that were not seen before. Pass a
+    JSONSeenVideoStore or MongoSeenVideoStore as `seen_store` so restarts
+    don't announce the same videos again.
+
+    Example:
+        notifier = YouTubeNotifier(api_key, ["UC..."])
+
+        @notifier.on_new_video
+        async def announce(video):
+            await channel.send(f"New video: https://youtu.be/{video['video_id']}")
+
+        notifier.start()
+    """
+    base_url = 'https://www.googleapis.com/youtube/v3'
+
+    def __init__(self, api_key, channel_ids=(), daily_quota=10000, min_interval=60.0, max_results=5, announce_existing=False, timeout=10.0, seen_store=None):
+        self.api_key = api_key
+        self.daily_quota = daily_quota
+        self.min_interval = min_interval
+        self.max_results = max_results
+        self.announce_existing = announce_existing
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+
+        self.channel_ids = list(dict.fromkeys(channel_ids))
+        self.uploads_playlists = {}  # channel_id -> uploads playlist id
+        self.seen_store = seen_store if seen_store is not None else SeenVideoStore(max(50, max_results))
+        self._callbacks = []
+
+        self.quota_used = 0
+        self._quota_day = self._quota_date()
+        self.session = None
+        self._task = None
+
+    # Setup
+
+    def add_channel(self, channel_id):
+        if channel_id not in self.channel_ids:
+            self.channel_ids.append(channel_id)
+
+    def remove_channel(self, channel_id):
+        if channel_id in self.channel_ids:
+            self.channel_ids.remove(channel_id)
+        self.uploads_playlists.pop(channel_id, None)
+        self.seen_store.forget(channel_id)
+
+    def on_new_video(self, callback):
+        """Register a callback(video), sync or async, for new uploads. Usable as a decorator"""
+        self._callbacks.append(callback)
+        return callback
+
+    # Quota
+
+    @staticmethod
+    def _quota_date():
+        # YouTube quotas reset at midnight Pacific time
+        return datetime.now(tz=_QUOTA_TZ).date()
+
+    def _spend(self, units):
+        today = self._quota_date()
+        if today != self._quota_day:
+            self._quota_day = today
+            self.quota_used = 0
+        self.quota_used += units
+
+    @property
+    def quota_remaining(self):
+        if self._quota_date() != self._quota_day:
+            return self.daily_quota
+        return self.daily_quota - self.quota_used
+
+    @property
+    def poll_interval(self):
+        """Seconds per full polling cycle so a day of polling fits the quota budget"""
+        # One playlistItems call per channel, plus roughly one batched videos call per cycle
+        cycle_cost = len(self.channel_ids) + 1
+        return max(self.min_interval, 86400 * cycle_cost / max(1, self.daily_quota))
+
+    def _seconds_until_reset(self):
+        now = datetime.now(tz=_QUOTA_TZ)
+        tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=_QUOTA_TZ)
+        return (tomorrow - now).total_seconds()
+
+    # API
+
+    def _get_session(self):
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(timeout=self.timeout)
+        return self.session
+
+    async def _get(self, endpoint, params):
+        self._spend(1)
+        async with self._get_session().get(f'{self.base_url}/{endpoint}', params={**params, 'key': self.api_key}) as response:
+            response.raise_for_status()
+            return await response.json()
+
+    async def resolve_uploads_playlists(self, channel_ids=None):
+        """Resolve and cache uploads playlist IDs, 1 unit per 50 channels"""
+        missing = [channel_id for channel_id in (channel_ids or self.channel_ids) if channel_id not in self.uploads_playlists]
+        for batch in _chunks(missing):
+            data = await self._get('channels', {'part': 'contentDetails', 'id': ','.join(batch)})
+            for item in data.get('items', []):
+                self.uploads_playlists[item['id']] = item['contentDetails']['relatedPlaylists']['uploads']
+        return {channel_id: self.uploads_playlists.get(channel_id) for channel_id in (channel_ids or self.channel_ids)}
+
+    async def fetch_recent_ids(self, channel_id):
+        """Newest video IDs of a channel's uploads playlist, newest first (1 unit)"""
+        playlist_id = self.uploads_playlists.get(channel_id)
+        if playlist_id is None:
+            await self.resolve_uploads_playlists([channel_id])
+            playlist_id = self.uploads_playlists.get(channel_id)
+            if playlist_id is None:
+                raise ValueError(f"YouTube channel {channel_id} not found")
+
+        data = await self._get('playlistItems', {'part': 'contentDetails', 'playlistId': playlist_id, 'maxResults': self.max_results})
+        return [item['contentDetails']['videoId'] for item in data.get('items', [])]
+
+    async def fetch_videos(self, video_ids):
+        """YouTubeVideo records for any number of IDs, 1 unit per 50 videos"""
+        videos = {}
+        for batch in _chunks(video_ids):
+            data = await self._get('videos', {'part': 'snippet', 'id': ','.join(batch)})
+            for video in YouTubeVideo.from_response(data):
+                videos[video.video_id] = video
+        # Keep the requested order
+        return [videos[video_id] for video_id in video_ids if video_id in videos]
+
+    # Polling
+
+    async def _emit(self, video):
+        for callback in self._callbacks:
+            try:
+                result = callback(video)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.error("YouTubeNotifier: Callback failed for video %s: %s", video['video_id'], e)
+
+    async def poll_once(self, spread=0.0):
+        """
+        Poll every channel once, spreading the calls over `spread` seconds.
+
+        Returns the list of new videos, oldest first per channel.
+        """
+        channel_ids = list(self.channel_ids)
+        if not channel_ids:
+            return []
+        await self.resolve_uploads_playlists(channel_ids)
+
+        delay = spread / len(channel_ids)
+        recent = {}
+        new_ids = []
+        for index, channel_id in enumerate(channel_ids):
+            if index and delay:
+                await asyncio.sleep(delay)
+            try:
+                recent[channel_id] = await self.fetch_recent_ids(channel_id)
+                new_ids.extend(self.seen_store.unseen(channel_id, recent[channel_id], self.announce_existing))
+            except Exception as e:
+                logger.error("YouTubeNotifier: Failed to poll channel %s: %s", channel_id, e)
+
+        videos = await self.fetch_videos(new_ids) if new_ids else []
+        # Only remember the videos once their details were fetched
+        for channel_id, video_ids in recent.items():
+            self.seen_store.record(channel_id, video_ids)
+        if self.seen_store.dirty:
+            await asyncio.to_thread(self.seen_store.save)
+
+        for video in videos:
+            await self._emit(video)
+        return videos
+
+    async def _run(self):
+        while True:
+            started = time.monotonic()
+            interval = self.poll_interval
+            if self.quota_remaining < len(self.channel_ids) + 1:
+                wait = self._seconds_until_reset()
+                logger.warning("YouTubeNotifier: Daily quota budget used up, resuming in %ss", round(wait))
+                await asyncio.sleep(wait)
+                continue
+            try:
+                await self.poll_once(spread=interval)
+            except asyncio.CancelledError:
+                raise
+            except aiohttp.ClientResponseError as e:
+                logger.error("YouTubeNotifier: Poll failed: %s", e)
+                if e.status == 403:
+                    # Usually quotaExceeded, back off until the quota resets
+                    await asyncio.sleep(self._seconds_until_reset())
+                    continue
+            except Exception as e:
+                logger.error("YouTubeNotifier: Poll failed: %s", e)
+            await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+    def start(self, loop=None):
+        """Start polling on the given (or running) event loop, returns the task"""
+        if self._task is None or self._task.done():
+            self._task = (loop or asyncio.get_running_loop()).create_task(self._run())
+        return self._task
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
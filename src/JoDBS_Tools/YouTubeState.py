@@ -0,0 +1,193 @@
+import threading
+from collections import deque
+from pymongo import DeleteOne, UpdateOne
+from typing import Dict, Iterable, List
+from .utils import load_json, save_json_atomic
+
+
+class SeenVideoStore:
+    """
+    Remembers the last `size` announced video IDs per channel.
+
+    Each channel keeps a bounded ring buffer (deque) plus a set mirroring it,
+    so membership checks are O(1) and memory is capped per channel. This base
+    class keeps everything in memory; subclasses persist it so restarts don't
+    re-announce videos. `size` should be at least the number of videos fetched
+    per check, otherwise old IDs can drop out while still being returned.
+
+    Whether a channel was checked is tracked apart from its IDs: only record()
+    marks it, so a video added by a push notification doesn't stop the first
+    poll from seeding the channel's back catalogue.
+    """
+    def __init__(self, size: int = 50):
+        self.size = size
+        self._channels: Dict[str, tuple] = {}  # channel_id -> (deque, set)
+        self._checked = set()
+        self._dirty = set()
+        self._lock = threading.RLock()
+
+    def _channel(self, channel_id):
+        entry = self._channels.get(channel_id)
+        if entry is None:
+            entry = self._channels[channel_id] = (deque(maxlen=self.size), set())
+        return entry
+
+    def _fill(self, channel_id, video_ids, checked=True):
+        """Replace a channel's buffer with stored IDs, oldest first"""
+        if checked:
+            self._checked.add(channel_id)
+        else:
+            self._checked.discard(channel_id)
+        ring, members = self._channels[channel_id] = (deque(maxlen=self.size), set())
+        for video_id in video_ids:
+            if len(ring) == ring.maxlen:
+                members.discard(ring[0])
+            ring.append(video_id)
+            members.add(video_id)
+
+    def has_channel(self, channel_id: str) -> bool:
+        """Whether the channel was checked before, even if it had no videos"""
+        return channel_id in self._checked
+
+    def seen(self, channel_id: str, video_id: str) -> bool:
+        entry = self._channels.get(channel_id)
+        return entry is not None and video_id in entry[1]
+
+    def add(self, channel_id: str, video_id: str) -> bool:
+        """Record a video, returns False if it was already seen"""
+        with self._lock:
+            ring, members = self._channel(channel_id)
+            if video_id in members:
+                return False
+            if len(ring) == ring.maxlen:
+                members.discard(ring[0])
+            ring.append(video_id)
+            members.add(video_id)
+            self._dirty.add(channel_id)
+            return True
+
+    def unseen(self, channel_id: str, video_ids: Iterable[str], announce_first: bool = False) -> List[str]:
+        """
+        Unseen IDs from a newest-first list, oldest first, without recording them.
+
+        On the first check of a channel nothing is returned unless `announce_first`
+        is set, so adding a channel doesn't announce its back catalogue.
+        """
+        if channel_id not in self._checked and not announce_first:
+            return []
+        entry = self._channels.get(channel_id)
+        members = entry[1] if entry is not None else ()
+        return [video_id for video_id in reversed(list(video_ids)) if video_id not in members]
+
+    def record(self, channel_id: str, video_ids: Iterable[str]):
+        """Record a newest-first list of IDs, marking the channel as checked"""
+        with self._lock:
+            if channel_id not in self._checked:
+                self._checked.add(channel_id)
+                self._channel(channel_id)
+                self._dirty.add(channel_id)
+            for video_id in reversed(list(video_ids)):
+                self.add(channel_id, video_id)
+
+    def take_new(self, channel_id: str, video_ids: Iterable[str], announce_first: bool = False) -> List[str]:
+        """unseen() followed by record()"""
+        video_ids = list(video_ids)
+        with self._lock:
+            new_ids = self.unseen(channel_id, video_ids, announce_first)
+            self.record(channel_id, video_ids)
+            return new_ids
+
+    def forget(self, channel_id: str):
+        with self._lock:
+            self._checked.discard(channel_id)
+            if self._channels.pop(channel_id, None) is not None:
+                self._dirty.add(channel_id)
+
+    def snapshot(self) -> Dict[str, List[str]]:
+        """All channels as {channel_id: [video ids, oldest first]}"""
+        with self._lock:
+            return {channel_id: list(ring) for channel_id, (ring, _) in self._channels.items()}
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._dirty)
+
+    def load(self):
+        """Load persisted state, no-op for the in-memory store"""
+
+    def save(self):
+        """Persist channels changed since the last save, no-op for the in-memory store"""
+        self._dirty.clear()
+
+
+class JSONSeenVideoStore(SeenVideoStore):
+    """
+    SeenVideoStore persisted to a JSON file as {channel_id: [video ids, oldest first]}.
+    Channels that only got push notifications and were never checked are
+    stored as {"video_ids": [...], "checked": false}.
+    """
+    def __init__(self, file_path: str = "./data/youtube_seen.json", size: int = 50):
+        super().__init__(size)
+        self.file_path = file_path
+        self.load()
+
+    def load(self):
+        data = load_json(self.file_path)
+        if not isinstance(data, dict):
+            return
+        with self._lock:
+            for channel_id, value in data.items():
+                if isinstance(value, dict):
+                    self._fill(channel_id, value.get("video_ids") or [], value.get("checked", True))
+                else:
+                    self._fill(channel_id, value or [])
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {
+                channel_id: video_ids if channel_id in self._checked else {"video_ids": video_ids, "checked": False}
+                for channel_id, video_ids in self.snapshot().items()
+            }
+            dirty, self._dirty = self._dirty, set()
+        try:
+            save_json_atomic(data, self.file_path, indent=None)
+        except Exception:
+            self._dirty |= dirty
+            raise
+
+
+class MongoSeenVideoStore(SeenVideoStore):
+    """
+    SeenVideoStore persisted to a Mongo collection, one document per channel:
+    {"_id": channel_id, "video_ids": [...], "checked": bool}. Only changed
+    channels are written.
+    """
+    def __init__(self, collection, size: int = 50):
+        super().__init__(size)
+        self.collection = collection
+        self.load()
+
+    def load(self):
+        with self._lock:
+            for document in self.collection.find({}, {"video_ids": 1, "checked": 1}):
+                self._fill(document["_id"], document.get("video_ids") or [], document.get("checked", True))
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            operations = []
+            for channel_id in self._dirty:
+                entry = self._channels.get(channel_id)
+                if entry is None:
+                    operations.append(DeleteOne({"_id": channel_id}))
+                else:
+                    operations.append(UpdateOne({"_id": channel_id}, {"$set": {"video_ids": list(entry[0]), "checked": channel_id in self._checked}}, upsert=True))
+            dirty, self._dirty = self._dirty, set()
+        try:
+            self.collection.bulk_write(operations, ordered=False)
+        except Exception:
+            self._dirty |= dirty
+            raise
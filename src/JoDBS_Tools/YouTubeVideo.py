@@ -0,0 +1,122 @@
+import json
+from typing import Any, Dict, List, Optional
+
+
+class RawPayload:
+    """API response text, parsed on first access and shared by every record built from it"""
+    __slots__ = ('text', '_data')
+
+    def __init__(self, text: str):
+        self.text = text
+        self._data = None
+
+    @property
+    def data(self) -> Dict:
+        if self._data is None:
+            self._data = json.loads(self.text)
+        return self._data
+
+
+class YouTubeVideo:
+    """
+    The fields we use from a YouTube video, nothing else.
+
+    Records are slotted, so thousands of cached videos stay small. The raw
+    API response is only kept when asked for (keep_raw) and is parsed lazily
+    through `raw_data`. Records still read like the old result dicts:
+    video['title'], video.get('live_status') and to_dict() all work.
+    """
+    __slots__ = ('video_id', 'channel_id', 'title', 'description', 'thumbnails', 'live_status', 'published_at', '_raw')
+
+    FIELDS = ('video_id', 'channel_id', 'title', 'description', 'thumbnails', 'live_status', 'published_at')
+
+    def __init__(self, video_id: str, channel_id: Optional[str] = None, title: Optional[str] = None,
+                 description: Optional[str] = None, thumbnails: Optional[Dict] = None,
+                 live_status: Optional[str] = None, published_at: Optional[str] = None, raw: Optional[RawPayload] = None):
+        self.video_id = video_id
+        self.channel_id = channel_id
+        self.title = title
+        self.description = description
+        self.thumbnails = thumbnails if thumbnails is not None else {}
+        self.live_status = live_status
+        self.published_at = published_at
+        self._raw = raw
+
+    @staticmethod
+    def _item_video_id(item: Dict) -> Optional[str]:
+        # videos: "id": "..." / search: "id": {"videoId": "..."} / playlistItems: snippet.resourceId.videoId
+        item_id = item.get('id')
+        if isinstance(item_id, dict):
+            return item_id.get('videoId')
+        resource = item.get('snippet', {}).get('resourceId')
+        if resource:
+            return resource.get('videoId')
+        return item_id
+
+    @classmethod
+    def from_item(cls, item: Dict, raw: Optional[RawPayload] = None) -> "YouTubeVideo":
+        """Build a record from one item of a videos, search or playlistItems response"""
+        snippet = item.get('snippet', {})
+        return cls(
+            video_id=cls._item_video_id(item),
+            channel_id=snippet.get('videoOwnerChannelId') or snippet.get('channelId'),
+            title=snippet.get('title'),
+            description=snippet.get('description'),
+            thumbnails=snippet.get('thumbnails'),
+            live_status=snippet.get('liveBroadcastContent'),
+            published_at=snippet.get('publishedAt'),
+            raw=raw
+        )
+
+    @classmethod
+    def from_response(cls, data: Dict, text: Optional[str] = None, keep_raw: bool = False) -> List["YouTubeVideo"]:
+        """
+        Build records for every item of one API response.
+
+        Args:
+            data (dict): The parsed response.
+            text (str, optional): The response body, kept for raw_data when keep_raw is set.
+            keep_raw (bool): Let the records give access to the full response.
+        """
+        raw = RawPayload(text if text is not None else json.dumps(data)) if keep_raw else None
+        return [cls.from_item(item, raw) for item in data.get('items', [])]
+
+    @property
+    def raw_data(self) -> Optional[Dict]:
+        """Full API response the record came from, None unless it was built with keep_raw"""
+        return self._raw.data if self._raw is not None else None
+
+    # Mapping compatibility with the old result dicts
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.FIELDS or key == 'raw_data':
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.FIELDS or (key == 'raw_data' and self._raw is not None)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return self.FIELDS
+
+    def to_dict(self, include_raw: bool = False) -> Dict:
+        data = {field: getattr(self, field) for field in self.FIELDS}
+        if include_raw and self._raw is not None:
+            data['raw_data'] = self.raw_data
+        return data
+
+    def __eq__(self, other):
+        if not isinstance(other, YouTubeVideo):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in self.FIELDS)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"<YouTubeVideo video_id={self.video_id!r} title={self.title!r}>"
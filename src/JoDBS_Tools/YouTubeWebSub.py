@@ -0,0 +1,272 @@
+import asyncio, hashlib, hmac, inspect, logging, time
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, urlparse
+from xml.etree.ElementTree import XMLPullParser
+import aiohttp
+from aiohttp import web
+from .YouTubeState import SeenVideoStore
+
+logger = logging.getLogger(__name__)
+
+HUB_URL = "https://pubsubhubbub.appspot.com/subscribe"
+TOPIC_URL = "https://www.youtube.com/xml/feeds/videos.xml?channel_id={channel_id}"
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+YT = "{http://www.youtube.com/xml/schemas/2015}"
+
+
+def channel_id_from_topic(topic):
+    """Extract the channel_id query parameter from a YouTube feed topic URL"""
+    return parse_qs(urlparse(topic or "").query).get("channel_id", [None])[0]
+
+
+def parse_feed_time(value):
+    """Aware datetime from an Atom timestamp, None if missing or malformed"""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    return parsed if parsed.tzinfo is not None else parsed.replace(tzinfo=timezone.utc)
+
+
+class YouTubeWebSub:
+    """
+    WebSub (PubSubHubbub) receiver for YouTube uploads.
+
+    Runs a small aiohttp endpoint, subscribes to each channel's Atom feed on
+    the hub, answers verification challenges, parses pushed entries as they
+    stream in and dispatches new-video events in near real time with zero
+    API quota. Leases are renewed automatically before they expire, and
+    subscriptions the hub never verifies are requested again.
+    Point `hub_url` at a local stand-in hub for testing.
+
+    Args:
+        callback_url (str): Public URL the hub pushes to, must route to `path` on this server.
+        host (str): Interface to bind. Defaults to 0.0.0.0.
+        port (int): Port to bind. Defaults to 8080.
+        path (str): Route for the endpoint. Defaults to /youtube/websub.
+        secret (str, optional): Shared secret, pushes with a bad X-Hub-Signature are dropped.
+        hub_url (str): Hub subscribe endpoint.
+        lease_seconds (int): Requested lease. Defaults to 5 days.
+        renew_margin (float): Renew this many seconds before a lease expires.
+        verify_timeout (float): Request a subscription again if the hub hasn't verified it after this many seconds.
+        max_age (float): Ignore pushes for videos published more than this many seconds ago,
+            the hub also pushes when an old video's title or description is edited. Defaults to 1 day.
+        seen_store (SeenVideoStore, optional): Announced videos, share it with a YouTubeNotifier
+            or pass a persistent store so restarts and fallback polling don't announce twice.
+    """
+    def __init__(self, callback_url, host="0.0.0.0", port=8080, path="/youtube/websub", secret=None,
+                 hub_url=HUB_URL, lease_seconds=432000, renew_margin=3600.0, verify_timeout=300.0,
+                 max_age=86400.0, seen_store=None):
+        self.callback_url = callback_url
+        self.host = host
+        self.port = port
+        self.path = path
+        self.secret = secret
+        self.hub_url = hub_url
+        self.lease_seconds = lease_seconds
+        self.renew_margin = renew_margin
+        self.verify_timeout = verify_timeout
+        self.max_age = max_age
+
+        self.subscriptions = {}  # channel_id -> lease expiry (monotonic), None while pending
+        self._requested = {}  # channel_id -> last subscribe request (monotonic)
+        self._callbacks = []
+        # Pushes repeat for title/description edits, only announce each video once
+        self.seen_store = seen_store if seen_store is not None else SeenVideoStore()
+
+        self.session = None
+        self._runner = None
+        self._renew_task = None
+
+    def on_new_video(self, callback):
+        """Register a callback(video), sync or async, for pushed uploads. Usable as a decorator"""
+        self._callbacks.append(callback)
+        return callback
+
+    # Server
+
+    def make_app(self):
+        app = web.Application()
+        app.router.add_get(self.path, self._handle_verify)
+        app.router.add_post(self.path, self._handle_push)
+        return app
+
+    async def start(self):
+        """Start the endpoint and the lease renewal task"""
+        if self._runner is None:
+            self._runner = web.AppRunner(self.make_app())
+            await self._runner.setup()
+            await web.TCPSite(self._runner, self.host, self.port).start()
+            logger.info("YouTubeWebSub: Listening on %s:%s%s", self.host, self.port, self.path)
+        if self._renew_task is None or self._renew_task.done():
+            self._renew_task = asyncio.get_running_loop().create_task(self._renew_loop())
+
+    async def stop(self):
+        if self._renew_task is not None:
+            self._renew_task.cancel()
+            try:
+                await self._renew_task
+            except asyncio.CancelledError:
+                pass
+            self._renew_task = None
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+
+    # Hub subscriptions
+
+    async def _request_hub(self, mode, channel_id):
+        data = {
+            "hub.mode": mode,
+            "hub.topic": TOPIC_URL.format(channel_id=channel_id),
+            "hub.callback": self.callback_url,
+            "hub.verify": "async",
+            "hub.lease_seconds": str(self.lease_seconds)
+        }
+        if self.secret:
+            data["hub.secret"] = self.secret
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=15))
+        async with self.session.post(self.hub_url, data=data) as response:
+            if response.status not in (202, 204):
+                raise Exception(f"Hub rejected {mode} for {channel_id}: HTTP {response.status} {await response.text()}")
+
+    async def subscribe(self, channel_id):
+        """Ask the hub for pushes from a channel; the lease starts once the hub verifies it"""
+        self.subscriptions.setdefault(channel_id, None)
+        self._requested[channel_id] = time.monotonic()
+        await self._request_hub("subscribe", channel_id)
+
+    async def unsubscribe(self, channel_id):
+        self.subscriptions.pop(channel_id, None)
+        self._requested.pop(channel_id, None)
+        await self._request_hub("unsubscribe", channel_id)
+
+    async def _renew_loop(self):
+        while True:
+            now = time.monotonic()
+            for channel_id, expires_at in list(self.subscriptions.items()):
+                if expires_at is None:
+                    # Pending, the verification may have been lost or never sent
+                    if now - self._requested.get(channel_id, now) < self.verify_timeout:
+                        continue
+                    logger.warning("YouTubeWebSub: Subscription to %s was never verified, requesting it again", channel_id)
+                elif expires_at - now > self.renew_margin:
+                    continue
+                try:
+                    await self.subscribe(channel_id)
+                    if self.subscriptions.get(channel_id) == expires_at:
+                        # Don't retry on every pass while the hub verifies
+                        self.subscriptions[channel_id] = None
+                except Exception as e:
+                    logger.error("YouTubeWebSub: Lease renewal failed for %s: %s", channel_id, e)
+            await asyncio.sleep(min(60.0, self.renew_margin / 2, self.verify_timeout / 2))
+
+    async def _handle_verify(self, request):
+        """Answer the hub's intent verification by echoing hub.challenge"""
+        mode = request.query.get("hub.mode")
+        channel_id = channel_id_from_topic(request.query.get("hub.topic"))
+        challenge = request.query.get("hub.challenge")
+
+        if mode == "subscribe" and channel_id in self.subscriptions and challenge is not None:
+            try:
+                lease = int(request.query.get("hub.lease_seconds", self.lease_seconds))
+            except ValueError:
+                lease = 0
+            if lease <= 0:
+                lease = self.lease_seconds
+            self.subscriptions[channel_id] = time.monotonic() + lease
+            logger.info("YouTubeWebSub: Subscribed to %s for %ss", channel_id, lease)
+            return web.Response(text=challenge)
+        if mode == "unsubscribe" and channel_id not in self.subscriptions and challenge is not None:
+            return web.Response(text=challenge)
+        if mode == "denied":
+            logger.warning("YouTubeWebSub: Hub denied subscription to %s: %s", channel_id, request.query.get('hub.reason'))
+            self.subscriptions.pop(channel_id, None)
+            self._requested.pop(channel_id, None)
+            return web.Response()
+        return web.Response(status=404)
+
+    # Pushes
+
+    async def _handle_push(self, request):
+        parser = XMLPullParser(events=("end",))
+        digest = hmac.new(self.secret.encode(), digestmod=hashlib.sha1) if self.secret else None
+        videos = []
+
+        try:
+            async for chunk in request.content.iter_chunked(8192):
+                if digest is not None:
+                    digest.update(chunk)
+                parser.feed(chunk)
+                videos.extend(self._read_entries(parser))
+            parser.close()
+            videos.extend(self._read_entries(parser))
+        except Exception as e:
+            logger.warning("YouTubeWebSub: Failed to parse push: %s", e)
+            return web.Response(status=400)
+
+        if digest is not None:
+            signature = request.headers.get("X-Hub-Signature", "")
+            if not hmac.compare_digest(signature, f"sha1={digest.hexdigest()}"):
+                logger.warning("YouTubeWebSub: Dropped push with invalid signature")
+                # Acknowledge anyway so the hub doesn't retry a forged or stale push
+                return web.Response(status=202)
+
+        for video in videos:
+            await self._dispatch(video)
+        return web.Response(status=204)
+
+    @staticmethod
+    def _read_entries(parser):
+        """Yield video dicts for <entry> elements completed so far"""
+        for _, element in parser.read_events():
+            if element.tag != f"{ATOM}entry":
+                continue
+            link = element.find(f"{ATOM}link")
+            yield {
+                "video_id": element.findtext(f"{YT}videoId"),
+                "channel_id": element.findtext(f"{YT}channelId"),
+                "title": element.findtext(f"{ATOM}title"),
+                "link": link.get("href") if link is not None else None,
+                "published_at": element.findtext(f"{ATOM}published"),
+                "updated_at": element.findtext(f"{ATOM}updated")
+            }
+            element.clear()
+
+    def _is_old(self, video):
+        """Whether a push is an edit of an old video rather than an upload"""
+        published_at = parse_feed_time(video.get("published_at"))
+        if published_at is None or self.max_age is None:
+            return False
+        # Edits push entries with a fresh <updated>, uploads are published moments before it
+        latest = datetime.now(timezone.utc)
+        updated_at = parse_feed_time(video.get("updated_at"))
+        if updated_at is not None:
+            latest = max(latest, updated_at)
+        return (latest - published_at).total_seconds() > self.max_age
+
+    async def _dispatch(self, video):
+        video_id = video.get("video_id")
+        if not video_id:
+            return
+        if self._is_old(video):
+            logger.debug("YouTubeWebSub: Ignored push for %s published at %s", video_id, video.get("published_at"))
+            return
+        if not self.seen_store.add(video.get("channel_id"), video_id):
+            return
+        try:
+            await asyncio.to_thread(self.seen_store.save)
+        except Exception as e:
+            logger.error("YouTubeWebSub: Failed to save seen videos: %s", e)
+
+        for callback in self._callbacks:
+            try:
+                result = callback(video)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.error("YouTubeWebSub: Callback failed for video %s: %s", video_id, e)
@@ -1,25 +1,77 @@
 # src/JoDBS_Tools/__init__.py
 
 from .BotSetup import BotSetup
+from .CogLoader import CogLoader, CogSpec
+from .StartupProfiler import StartupProfiler, get_profiler, set_profiler
+from .Metrics import Metrics, Histogram, get_metrics, set_metrics
+from .LogPipeline import setup_logging, shutdown_logging, JSONFormatter, SamplingFilter, UNSAMPLED
 from .YouTube import YouTube
-from .Database import MongoClientConnection, BotNetworkConnection
-from .DataFetching import DataFetching
+from .YouTubeNotifier import YouTubeNotifier
+from .YouTubeWebSub import YouTubeWebSub
+from .YouTubeVideo import YouTubeVideo
+from .YouTubeState import SeenVideoStore, JSONSeenVideoStore, MongoSeenVideoStore
+from .Database import MongoClientConnection, AsyncMongoClientConnection, BotNetworkConnection, AsyncBotNetworkConnection, get_mongo_client, get_mongo_health, close_mongo_clients
+from .MongoHealth import MongoHealth, PoolStats, CommandMetrics
+from .MongoBulk import BulkWriter
+from .MongoCache import CachedCollection
+from .DataFetching import DataFetching, ScopeCache, ScopeRefresher
+from .ScopeStore import ScopeStore
 from .Decorators import Permission_Checks, Cooldown_Checks
-from .utils import Load_ENV, Get_ENV, Get_ENV_Bool, Get_Datetime_UTC, Get_UnixTimestamp_UTC, Get_UnixTime_UTC, save_json, load_json, Intents_ALL
+from .RoleIndex import RoleIndex
+from .Cooldowns import CooldownBackend, MemoryCooldownBackend, SQLiteCooldownBackend, RateLimiter
+from .utils import Load_ENV, Get_ENV, Get_ENV_Bool, Get_Datetime_UTC, Get_UnixTimestamp_UTC, Get_UnixTime_UTC, save_json, save_json_atomic, load_json, Intents_ALL
 
 __all__ = [
     # Core
     'BotSetup',
+    'CogLoader',
+    'CogSpec',
+    'StartupProfiler',
+    'get_profiler',
+    'set_profiler',
+    'Metrics',
+    'Histogram',
+    'get_metrics',
+    'set_metrics',
+    'setup_logging',
+    'shutdown_logging',
+    'JSONFormatter',
+    'SamplingFilter',
+    'UNSAMPLED',
     'YouTube',
+    'YouTubeNotifier',
+    'YouTubeWebSub',
+    'YouTubeVideo',
+    'SeenVideoStore',
+    'JSONSeenVideoStore',
+    'MongoSeenVideoStore',
 
     # Database
     'MongoClientConnection',
+    'AsyncMongoClientConnection',
+    'get_mongo_client',
+    'get_mongo_health',
+    'MongoHealth',
+    'PoolStats',
+    'CommandMetrics',
+    'BulkWriter',
+    'CachedCollection',
+    'close_mongo_clients',
     'BotNetworkConnection',
+    'AsyncBotNetworkConnection',
     'DataFetching',
+    'ScopeCache',
+    'ScopeRefresher',
+    'ScopeStore',
     
     # Decorators
     'Permission_Checks',
     'Cooldown_Checks',
+    'RoleIndex',
+    'CooldownBackend',
+    'MemoryCooldownBackend',
+    'SQLiteCooldownBackend',
+    'RateLimiter',
     
     # Utils
     'Load_ENV',
@@ -29,6 +81,7 @@ __all__ = [
     'Get_UnixTimestamp_UTC',
     'Get_UnixTime_UTC',
     'save_json',
+    'save_json_atomic',
     'load_json',
     'Intents_ALL',
 ]
\ No newline at end of file
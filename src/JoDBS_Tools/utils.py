@@ -1,4 +1,4 @@
-import os, json
+import os, json, tempfile
 from datetime import datetime, timezone
 from dotenv import load_dotenv
 
@@ -118,6 +118,40 @@ def save_json(data, file_path):
     except Exception as e:
         raise IOError(f"Failed to save JSON: {e}")
 
+def save_json_atomic(data, file_path, indent=4):
+    """
+    Save data to a JSON file without ever leaving a truncated file behind.
+
+    The data is written to a temporary file in the same folder, fsynced and
+    then renamed over the target, so readers see either the old or the new file.
+
+    Parameters:
+    data (dict): The data to save.
+    file_path (str): The path to the target file.
+    indent (int, optional): JSON indentation, None for compact output. Defaults to 4.
+
+    Raises:
+    ValueError: If file_path is empty.
+    IOError: If the file could not be written.
+    """
+    if not file_path:
+        raise ValueError("File path is empty.")
+
+    folder = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(file_path)}.", suffix=".tmp", dir=folder)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data if data is not None else {}, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    except Exception as e:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise IOError(f"Failed to save JSON: {e}")
+
 def load_json(file_path=None):
     """
     Load data from a JSON file.
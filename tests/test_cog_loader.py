@@ -0,0 +1,50 @@
+import asyncio
+from JoDBS_Tools.CogLoader import CogLoader, CogSpec
+
+
+class FakeBot:
+    def __init__(self):
+        self.extensions = []
+
+    def load_extension(self, extension):
+        self.extensions.append(extension)
+
+    def get_all_application_commands(self):
+        return []
+
+
+def make_loader(**dependencies):
+    """Lazy cogs named after the keyword arguments, each depending on the listed cogs"""
+    loader = CogLoader(FakeBot(), directory="cogs")
+    loader.specs = {name: CogSpec(name, f"cogs/{name}.py", f"cogs.{name}", deps, lazy=True) for name, deps in dependencies.items()}
+    return loader
+
+
+def ensure_loaded(loader, name):
+    return asyncio.run(asyncio.wait_for(loader.ensure_loaded(name), timeout=1))
+
+
+def test_order_puts_dependencies_first():
+    loader = make_loader(a=["b"], b=["c"], c=[])
+    assert loader.order() == ["c", "b", "a"]
+
+
+def test_ensure_loaded_loads_lazy_dependencies_first():
+    loader = make_loader(a=["b"], b=[])
+    assert ensure_loaded(loader, "a") is True
+    assert loader.bot.extensions == ["cogs.b", "cogs.a"]
+
+
+def test_ensure_loaded_fails_on_cycle_instead_of_hanging():
+    loader = make_loader(a=["b"], b=["a"])
+    assert ensure_loaded(loader, "a") is False
+    assert loader.bot.extensions == []
+    assert "cycle" in loader.errors["a"]
+
+
+def test_ensure_loaded_skips_cogs_order_rejected():
+    loader = make_loader(a=["b"], b=["a"], c=["missing"])
+    loader.order()
+    assert ensure_loaded(loader, "a") is False
+    assert ensure_loaded(loader, "c") is False
+    assert loader.bot.extensions == []
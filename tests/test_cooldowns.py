@@ -0,0 +1,97 @@
+import sqlite3
+import pytest
+from JoDBS_Tools.Cooldowns import MemoryCooldownBackend, SQLiteCooldownBackend, RateLimiter
+
+
+class FakeClock:
+    """Stands in for the time module inside Cooldowns, advanced by hand"""
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr("JoDBS_Tools.Cooldowns.time", clock)
+    return clock
+
+
+def test_burst_then_wait_for_refill(clock):
+    limiter = RateLimiter("cmd", rate=2, per=10, burst=3, backend=MemoryCooldownBackend())
+    assert [limiter.hit("u") for _ in range(3)] == [0.0, 0.0, 0.0]
+    # Empty, one token comes back every 5 seconds
+    assert limiter.hit("u") == pytest.approx(5.0)
+    clock.now += 2
+    assert limiter.retry_after("u") == pytest.approx(3.0)
+    clock.now += 3
+    assert limiter.hit("u") == 0.0
+    assert limiter.hit("u") == pytest.approx(5.0)
+
+
+def test_refill_is_capped_at_burst(clock):
+    limiter = RateLimiter("cmd", rate=1, per=1, burst=2, backend=MemoryCooldownBackend())
+    limiter.hit("u", tokens=2)
+    clock.now += 100
+    assert limiter.hit("u", tokens=2) == 0.0
+    assert limiter.hit("u") == pytest.approx(1.0)
+
+
+def test_bucket_expires_once_full_again(clock):
+    backend = MemoryCooldownBackend()
+    limiter = RateLimiter("cmd", rate=1, per=10, burst=2, backend=backend)
+    limiter.hit("u")
+    clock.now += 9.9
+    assert len(backend) == 1
+    clock.now += 0.1
+    assert backend.get(("cmd", "u")) is None
+    assert len(backend) == 0
+
+
+def test_buckets_are_independent(clock):
+    limiter = RateLimiter("cmd", rate=1, per=10, backend=MemoryCooldownBackend())
+    assert limiter.hit("a") == 0.0
+    assert limiter.hit("b") == 0.0
+    assert limiter.hit("a") > 0
+    limiter.reset("a")
+    assert limiter.hit("a") == 0.0
+
+
+def test_too_many_tokens_wait_for_the_missing_ones(clock):
+    limiter = RateLimiter("cmd", rate=1, per=2, burst=2, backend=MemoryCooldownBackend())
+    assert limiter.hit("u", tokens=3) == pytest.approx(2.0)
+    # A refused hit takes nothing
+    assert limiter.hit("u", tokens=2) == 0.0
+
+
+def test_sqlite_buckets_survive_reopening(clock, tmp_path):
+    path = str(tmp_path / "cooldowns.db")
+    backend = SQLiteCooldownBackend(path)
+    RateLimiter("cmd", rate=1, per=10, backend=backend).hit(42)
+    backend.close()
+
+    backend = SQLiteCooldownBackend(path)
+    limiter = RateLimiter("cmd", rate=1, per=10, backend=backend)
+    assert limiter.hit(42) == pytest.approx(10.0)
+    clock.now += 10
+    assert limiter.hit(42) == 0.0
+    backend.close()
+
+
+def test_sqlite_recreates_pre_token_bucket_table(clock, tmp_path):
+    path = str(tmp_path / "cooldowns.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE cooldowns (command TEXT, bucket INTEGER, expires_at REAL, PRIMARY KEY (command, bucket))")
+    conn.execute("INSERT INTO cooldowns VALUES ('cmd', 42, 99999)")
+    conn.commit()
+    conn.close()
+
+    backend = SQLiteCooldownBackend(path)
+    assert len(backend) == 0
+    assert RateLimiter("cmd", rate=1, per=10, backend=backend).hit(42) == 0.0
+    backend.close()
@@ -0,0 +1,35 @@
+from JoDBS_Tools.UI.CustomUI import CustomUI
+from JoDBS_Tools.UI.InteractionRouter import InteractionRouter, encode_custom_id
+
+
+def make_ui(ui_elements):
+    """CustomUI with the given element definitions, no bot, ScopeStore or registry"""
+    ui = CustomUI.__new__(CustomUI)
+    ui.bot = None
+    ui.ui_elements = ui_elements
+    ui._templates = {}
+    ui._guild_actions = {}
+    return ui
+
+
+def element(*custom_ids, role="1"):
+    return {
+        'components': [{'type': 'button', 'custom_id': custom_id, 'label': custom_id} for custom_id in custom_ids],
+        'actions': [{'custom_id': custom_id, 'type': 'add_role', 'role_id': role} for custom_id in custom_ids]
+    }
+
+
+def test_guild_actions_leave_out_shared_custom_ids(caplog):
+    ui = make_ui({"1": {"colors": element("red", "join", role="10"), "pings": element("news", "join", role="20")}})
+    actions = ui.get_guild_actions(1)
+    assert sorted(actions) == ["news", "red"]
+    assert "join" in caplog.text
+
+
+def test_router_only_resolves_unambiguous_legacy_ids():
+    ui = make_ui({"1": {"colors": element("red", "join", role="10"), "pings": element("join", role="20")}})
+    router = InteractionRouter(ui)
+    assert router.resolve(1, "red")['role_id'] == "10"
+    assert router.resolve(1, "join") is None
+    # Routed custom_ids name their element, so shared plain ids don't matter
+    assert router.resolve(1, encode_custom_id(1, "pings", 0))['role_id'] == "20"
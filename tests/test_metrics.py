@@ -0,0 +1,75 @@
+import pytest
+from JoDBS_Tools.Metrics import Histogram, Metrics
+
+
+def test_small_values_get_their_own_bucket():
+    histogram = Histogram(precision=4)
+    for micros in range(32):
+        assert histogram._index(micros) == micros
+        assert histogram._bounds(micros) == (micros, micros + 1)
+
+
+def test_buckets_cover_every_value_in_order():
+    histogram = Histogram(precision=4)
+    values = list(range(5000)) + [10 ** exponent + offset for exponent in range(4, 9) for offset in (-1, 0, 1)]
+    previous = -1
+    for micros in values:
+        index = histogram._index(micros)
+        low, high = histogram._bounds(index)
+        assert low <= micros < high
+        assert index >= previous
+        # At most 1/16th of the bucket's lower bound wide
+        assert high - low <= max(1, low / 16)
+        previous = index
+
+
+def test_neighbouring_buckets_touch():
+    histogram = Histogram(precision=3)
+    indexes = sorted({histogram._index(micros) for micros in range(1, 100000, 7)})
+    for index, following in zip(indexes, indexes[1:]):
+        if following == index + 1:
+            assert histogram._bounds(index)[1] == histogram._bounds(following)[0]
+
+
+def test_percentiles_within_bucket_precision():
+    histogram = Histogram()
+    for millis in range(1, 1001):
+        histogram.record(millis / 1000)
+    percentiles = histogram.percentiles()
+    for quantile, expected in ((0.5, 0.5), (0.9, 0.9), (0.99, 0.99), (0.999, 0.999)):
+        assert percentiles[quantile] == pytest.approx(expected, rel=1 / 16)
+    assert histogram.count == 1000
+    assert histogram.min == 0.001 and histogram.max == 1.0
+
+
+def test_percentiles_are_clamped_to_recorded_range():
+    histogram = Histogram()
+    histogram.record(0.123456)
+    assert set(histogram.percentiles().values()) == {0.123456}
+    assert Histogram().percentiles() == {0.5: None, 0.9: None, 0.99: None, 0.999: None}
+
+
+def test_negative_values_count_as_zero():
+    histogram = Histogram()
+    histogram.record(-1.0)
+    assert histogram.counts == {0: 1}
+
+
+def test_prometheus_summary():
+    metrics = Metrics(namespace="bot")
+    for _ in range(3):
+        metrics.observe("command_latency_seconds", 0.25, command="ping")
+    metrics.inc("command_errors_total", command="ping")
+    text = metrics.render_prometheus()
+    assert '# TYPE bot_command_latency_seconds summary' in text
+    assert 'bot_command_latency_seconds{command="ping",quantile="0.5"} 0.250000' in text
+    assert 'bot_command_latency_seconds_count{command="ping"} 3' in text
+    assert 'bot_command_errors_total{command="ping"} 1' in text
+
+
+def test_disabled_metrics_record_nothing():
+    metrics = Metrics(enabled=False)
+    metrics.observe("latency_seconds", 1.0)
+    with metrics.timer("latency_seconds"):
+        pass
+    assert metrics.snapshot()["histograms"] == []
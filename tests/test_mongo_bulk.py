@@ -0,0 +1,176 @@
+import asyncio
+import pytest
+from pymongo.errors import AutoReconnect, BulkWriteError
+from JoDBS_Tools.MongoBulk import BulkWriter
+
+
+class FakeCollection:
+    """Async collection stand-in, bulk_write answers with the queued outcomes in order"""
+    name = "members"
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    async def bulk_write(self, operations, ordered=True):
+        self.calls.append([(operation._filter, operation._doc) for operation in operations])
+        outcome = self.outcomes.pop(0) if self.outcomes else None
+        if outcome is not None:
+            raise outcome
+
+
+def make_writer(*outcomes):
+    return BulkWriter(FakeCollection(*outcomes), flush_interval=3600, flush_threshold=10000)
+
+
+def pending(writer):
+    """Buffered operators per _id, without the empty ones merging leaves behind"""
+    return {
+        filter["_id"]: {operator: fields for operator, fields in operators.items() if fields}
+        for filter, operators in writer._pending.values()
+    }
+
+
+# Merging
+
+def test_inc_adds_up():
+    writer = make_writer()
+    writer.inc(1, xp=5)
+    writer.inc(1, xp=5, messages=1)
+    assert pending(writer) == {1: {"$inc": {"xp": 10, "messages": 1}}}
+
+
+def test_inc_folds_into_numeric_set():
+    writer = make_writer()
+    writer.set(1, xp=100)
+    writer.inc(1, xp=5)
+    assert pending(writer) == {1: {"$set": {"xp": 105}}}
+
+
+def test_set_overrides_inc():
+    writer = make_writer()
+    writer.inc(1, xp=5)
+    writer.set(1, xp=0)
+    assert pending(writer) == {1: {"$set": {"xp": 0}}}
+
+
+def test_inc_on_non_numeric_set_raises_and_keeps_buffer():
+    writer = make_writer()
+    writer.set(1, a="x")
+    with pytest.raises(TypeError):
+        writer.inc(1, a=1)
+    with pytest.raises(TypeError):
+        writer.update(2, set={"b": True}, inc={"b": 1})
+    assert pending(writer) == {1: {"$set": {"a": "x"}}}
+
+
+def test_set_on_insert_yields_to_set_and_inc():
+    writer = make_writer()
+    writer.update(1, set_on_insert={"xp": 0, "name": "new"})
+    writer.inc(1, xp=5)
+    writer.set(1, name="known")
+    assert pending(writer) == {1: {"$inc": {"xp": 5}, "$set": {"name": "known"}}}
+
+
+# Restoring
+
+def test_restore_merges_newer_updates_on_top():
+    writer = make_writer()
+    writer.update(1, set={"name": "old"}, inc={"xp": 5})
+    failed = writer._take()
+    writer.inc(1, xp=2)
+    writer.set(1, name="new")
+    writer._restore(failed)
+    assert pending(writer) == {1: {"$set": {"name": "new"}, "$inc": {"xp": 7}}}
+
+
+def test_restore_lets_newer_inc_replace_non_numeric_set():
+    writer = make_writer()
+    writer.set(1, a="x")
+    failed = writer._take()
+    writer.inc(1, a=1)
+    writer._restore(failed)
+    assert pending(writer) == {1: {"$inc": {"a": 1}}}
+
+
+# Flushing
+
+def test_flush_writes_everything():
+    writer = make_writer()
+    writer.inc(1, xp=1)
+    writer.inc(2, xp=1)
+    asyncio.run(writer.flush())
+    assert len(writer) == 0
+    assert writer.stats()["written"] == 2
+    assert writer.collection.calls == [[({"_id": 1}, {"$inc": {"xp": 1}}), ({"_id": 2}, {"$inc": {"xp": 1}})]]
+
+
+def test_partial_failure_only_keeps_retryable_failures():
+    error = BulkWriteError({"writeErrors": [
+        {"index": 1, "code": 11000, "errmsg": "duplicate key"},
+        {"index": 2, "code": 14, "errmsg": "Cannot apply $inc to a value of non-numeric type"}
+    ]})
+    writer = make_writer(error)
+    for _id in (1, 2, 3):
+        writer.inc(_id, xp=5)
+
+    async def flush():
+        await writer.flush()
+        writer._flush_handle.cancel()
+
+    asyncio.run(flush())
+    # 1 was applied, 2 hit an upsert race and is retried, 3 can never succeed
+    assert pending(writer) == {2: {"$inc": {"xp": 5}}}
+    assert writer.stats()["written"] == 1
+    assert writer.stats()["dropped"] == 1
+
+
+def test_connection_error_keeps_unwritten_batches():
+    writer = BulkWriter(FakeCollection(None, AutoReconnect("down")), flush_interval=3600, max_batch=1)
+    writer.inc(1, xp=1)
+    writer.inc(2, xp=1)
+    writer.inc(3, xp=1)
+
+    async def flush():
+        await writer.flush()
+        writer._flush_handle.cancel()
+
+    asyncio.run(flush())
+    assert sorted(pending(writer)) == [2, 3]
+    assert writer.stats()["written"] == 1
+
+
+def test_retryable_failure_is_dropped_after_max_retries():
+    duplicate = BulkWriteError({"writeErrors": [{"index": 0, "code": 11000, "errmsg": "duplicate key"}]})
+    writer = BulkWriter(FakeCollection(duplicate, duplicate, duplicate), flush_interval=3600, max_retries=2)
+    writer.inc(1, xp=5)
+
+    async def flush():
+        await writer.flush()
+        if writer._flush_handle is not None:
+            writer._flush_handle.cancel()
+
+    for _ in range(2):
+        asyncio.run(flush())
+        assert pending(writer) == {1: {"$inc": {"xp": 5}}}
+    asyncio.run(flush())
+    assert len(writer) == 0
+    assert writer.stats()["dropped"] == 1
+    assert writer._retries == {}
+
+
+def test_successful_write_resets_retries():
+    duplicate = BulkWriteError({"writeErrors": [{"index": 0, "code": 11000, "errmsg": "duplicate key"}]})
+    writer = BulkWriter(FakeCollection(duplicate, None), flush_interval=3600, max_retries=1)
+    writer.inc(1, xp=5)
+
+    async def flush():
+        await writer.flush()
+        if writer._flush_handle is not None:
+            writer._flush_handle.cancel()
+
+    asyncio.run(flush())
+    assert writer._retries == {1: 1}
+    asyncio.run(flush())
+    assert writer._retries == {}
+    assert writer.stats()["written"] == 1
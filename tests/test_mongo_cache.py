@@ -0,0 +1,64 @@
+import asyncio
+from JoDBS_Tools.MongoCache import CachedCollection
+
+
+class FakeStream:
+    """Async change stream yielding the given changes"""
+    def __init__(self, changes):
+        self.changes = list(changes)
+        self.closed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.closed = True
+        return False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.changes:
+            raise StopAsyncIteration
+        return self.changes.pop(0)
+
+
+class MotorCollection:
+    """Motor style: watch() returns the stream directly"""
+    name = "motor"
+
+    def __init__(self, changes):
+        self.stream = FakeStream(changes)
+
+    def watch(self):
+        return self.stream
+
+
+class AsyncPyMongoCollection(MotorCollection):
+    """PyMongo AsyncCollection style: watch() is a coroutine"""
+    name = "pymongo"
+
+    async def watch(self):
+        return self.stream
+
+
+def watched(collection_class):
+    changes = [{"operationType": "update", "documentKey": {"_id": 1}}]
+    cache = CachedCollection(collection_class(changes))
+    cache._entries[1] = (float("inf"), {"_id": 1})
+    cache._entries[2] = (float("inf"), {"_id": 2})
+    asyncio.run(cache._watch_async())
+    return cache
+
+
+def test_watch_async_accepts_motor_streams():
+    cache = watched(MotorCollection)
+    assert list(cache._entries) == [2]
+    assert cache.collection.stream.closed
+
+
+def test_watch_async_awaits_pymongo_async_streams():
+    cache = watched(AsyncPyMongoCollection)
+    assert list(cache._entries) == [2]
+    assert cache.collection.stream.closed
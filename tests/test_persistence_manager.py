@@ -0,0 +1,105 @@
+import asyncio, sys
+import pytest
+from JoDBS_Tools.UI.PersistenceManager import JSONBackend, SQLiteBackend, PersistenceManager
+
+# The UI package exports the class under the module's name
+persistence = sys.modules['JoDBS_Tools.UI.PersistenceManager']
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def open_backend(request, tmp_path):
+    """Opens the backend under test on the same file every time it is called"""
+    backends = []
+
+    def open_backend():
+        if request.param == "json":
+            backend = JSONBackend(str(tmp_path / "persistent_messages.json"))
+        else:
+            backend = SQLiteBackend(str(tmp_path / "persistent_messages.db"), import_json=None)
+        backends.append(backend)
+        return backend
+
+    yield open_backend
+    for backend in backends:
+        backend.close()
+
+
+def record(guild_id, channel_id=1, ui_element_id="roles"):
+    return {'guild_id': guild_id, 'channel_id': channel_id, 'ui_element_id': ui_element_id}
+
+
+def test_writes_are_buffered_until_flush(open_backend):
+    manager = PersistenceManager(open_backend(), flush_interval=3600, flush_threshold=100)
+
+    async def run():
+        manager.register(1, record(10))
+        manager.register(2, record(10))
+        # Served from the buffer before the backend has it
+        assert manager.backend.count() == 0
+        assert manager.get(1) == record(10)
+        assert manager.count() == 2
+        await manager.flush()
+
+    asyncio.run(run())
+    assert manager.backend.count() == 2
+    assert manager.backend.get("1") == record(10)
+
+
+def test_threshold_flushes_in_the_background(open_backend):
+    manager = PersistenceManager(open_backend(), flush_interval=3600, flush_threshold=3)
+
+    async def run():
+        for message_id in range(3):
+            manager.register(message_id, record(10))
+        await manager._flush_task
+
+    asyncio.run(run())
+    assert manager.backend.count() == 3
+
+
+def test_changes_coalesce_per_message(open_backend):
+    manager = PersistenceManager(open_backend(), flush_interval=3600)
+
+    async def run():
+        manager.register(1, record(10))
+        await manager.flush()
+        manager.register(1, record(10, ui_element_id="colors"))
+        manager.remove(1)
+        manager.register(2, record(20))
+        assert manager.count() == 1
+        assert len(manager._pending) == 2
+        await manager.flush()
+
+    asyncio.run(run())
+    assert manager.backend.get("1") is None
+    assert manager.count() == 1
+
+
+def test_exit_hook_flushes_pending_changes(open_backend):
+    manager = PersistenceManager(open_backend(), flush_interval=3600)
+
+    async def run():
+        manager.register(1, record(10))
+        manager._flush_handle.cancel()
+
+    asyncio.run(run())
+    assert manager.backend.count() == 0
+    # What the atexit hook runs on interpreter shutdown
+    persistence._flush_on_exit(manager._exit_key)
+    assert manager.backend.get("1") == record(10)
+
+
+def test_flushed_messages_reload_from_disk(open_backend):
+    manager = PersistenceManager(open_backend())
+    # Without a running loop every change is written right away
+    manager.register(1, record(10, channel_id=5))
+    manager.register(2, record(20))
+    manager.register(3, record(10, channel_id=6))
+    manager.remove(3)
+    manager.backend.close()
+
+    reopened = PersistenceManager(open_backend())
+    assert reopened.count() == 2
+    assert reopened.get(1) == record(10, channel_id=5)
+    assert [message_id for message_id, _ in reopened.iter_messages(guild_id=10)] == ["1"]
+    assert reopened.backend.page(None, 10) == [("1", record(10, channel_id=5)), ("2", record(20))]
@@ -0,0 +1,52 @@
+import requests
+from JoDBS_Tools import YouTube
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+        self.text = ""
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+def fake_api(monkeypatch, uploads):
+    """Patch requests.get with a Data API stand-in, returns the list of (endpoint, params, timeout) sent"""
+    sent = []
+
+    def get(url, params, timeout=None):
+        endpoint = url.rsplit('/', 1)[1]
+        sent.append((endpoint, dict(params), timeout))
+        if 'id' in params and 'maxResults' in params:
+            raise requests.exceptions.HTTPError("400 incompatibleParameters")
+        if endpoint == 'playlistItems':
+            return FakeResponse({'items': [{'contentDetails': {'videoId': video_id}} for video_id in uploads]})
+        return FakeResponse({'items': [{'id': video_id, 'snippet': {'title': video_id}} for video_id in params['id'].split(',')]})
+
+    monkeypatch.setattr(requests, "get", get)
+    return sent
+
+
+def test_get_new_videos_looks_up_unseen_ids(monkeypatch):
+    uploads = ['v2', 'v1']
+    sent = fake_api(monkeypatch, uploads)
+    youtube = YouTube("key", timeout=3.0)
+
+    assert youtube.get_new_videos("UCabc") == []
+    uploads.insert(0, 'v3')
+    assert [video.video_id for video in youtube.get_new_videos("UCabc")] == ['v3']
+
+    assert sent[-1] == ('videos', {'part': 'snippet', 'id': 'v3', 'key': 'key'}, 3.0)
+    assert all(timeout == 3.0 for _, _, timeout in sent)
+
+
+def test_get_videos_batches_by_50(monkeypatch):
+    sent = fake_api(monkeypatch, [])
+    video_ids = [f"v{i}" for i in range(120)]
+    videos = YouTube("key").get_videos(video_ids)
+    assert [video.video_id for video in videos] == video_ids
+    assert [len(params['id'].split(',')) for _, params, _ in sent] == [50, 50, 20]
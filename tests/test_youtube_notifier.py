@@ -0,0 +1,95 @@
+import asyncio
+import aiohttp
+from JoDBS_Tools.YouTubeNotifier import YouTubeNotifier
+
+
+class FakeResponse:
+    def __init__(self, status, data):
+        self.status = status
+        self.data = data
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise aiohttp.ClientResponseError(None, (), status=self.status, message="incompatibleParameters")
+
+    async def json(self):
+        return self.data
+
+
+class FakeSession:
+    """aiohttp session stand-in answering like the Data API, including its 400 for id + maxResults"""
+    closed = False
+
+    def __init__(self, uploads):
+        self.uploads = uploads  # channel_id -> newest-first video IDs
+        self.requests = []
+
+    def get(self, url, params):
+        endpoint = url.rsplit('/', 1)[1]
+        self.requests.append((endpoint, params))
+        if 'id' in params and 'maxResults' in params:
+            return FakeResponse(400, {})
+        if endpoint == 'channels':
+            items = [{'id': channel_id, 'contentDetails': {'relatedPlaylists': {'uploads': f"UU{channel_id}"}}}
+                     for channel_id in params['id'].split(',') if channel_id in self.uploads]
+        elif endpoint == 'playlistItems':
+            video_ids = self.uploads[params['playlistId'][2:]][:params['maxResults']]
+            items = [{'contentDetails': {'videoId': video_id}} for video_id in video_ids]
+        else:
+            items = [{'id': video_id, 'snippet': {'title': f"Video {video_id}", 'channelId': 'c1'}}
+                     for video_id in params['id'].split(',')]
+        return FakeResponse(200, {'items': items})
+
+
+def make_notifier(uploads):
+    notifier = YouTubeNotifier("key", list(uploads), max_results=3)
+    notifier.session = FakeSession(uploads)
+    return notifier
+
+
+def test_id_filtered_calls_send_no_max_results():
+    notifier = make_notifier({'c1': ['v1']})
+    asyncio.run(notifier.resolve_uploads_playlists())
+    asyncio.run(notifier.fetch_videos(['v1', 'v2']))
+    requests = notifier.session.requests
+    assert requests == [
+        ('channels', {'part': 'contentDetails', 'id': 'c1', 'key': 'key'}),
+        ('videos', {'part': 'snippet', 'id': 'v1,v2', 'key': 'key'})
+    ]
+    assert notifier.quota_used == 2
+
+
+def test_poll_once_announces_only_new_uploads():
+    uploads = {'c1': ['v2', 'v1']}
+    notifier = make_notifier(uploads)
+    announced = []
+
+    @notifier.on_new_video
+    async def announce(video):
+        announced.append((video['video_id'], video['title']))
+
+    # The first poll seeds the channel without announcing its back catalogue
+    assert asyncio.run(notifier.poll_once()) == []
+    uploads['c1'].insert(0, 'v3')
+    videos = asyncio.run(notifier.poll_once())
+
+    assert [video.video_id for video in videos] == ['v3']
+    assert announced == [('v3', 'Video v3')]
+    endpoints = [endpoint for endpoint, _ in notifier.session.requests]
+    # The uploads playlist is resolved once and cached
+    assert endpoints == ['channels', 'playlistItems', 'playlistItems', 'videos']
+
+
+def test_announce_existing_sends_back_catalogue_oldest_first():
+    notifier = make_notifier({'c1': ['v2', 'v1']})
+    notifier.announce_existing = True
+    announced = []
+    notifier.on_new_video(lambda video: announced.append(video['video_id']))
+    asyncio.run(notifier.poll_once())
+    assert announced == ['v1', 'v2']
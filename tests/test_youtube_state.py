@@ -0,0 +1,85 @@
+import json
+from pymongo import DeleteOne
+from JoDBS_Tools.YouTubeState import SeenVideoStore, JSONSeenVideoStore, MongoSeenVideoStore
+
+
+class FakeCollection:
+    """Sync collection stand-in applying bulk_write operations to a dict"""
+    def __init__(self, documents=()):
+        self.documents = {document["_id"]: dict(document) for document in documents}
+        self.writes = []
+
+    def find(self, filter, projection):
+        return [dict(document) for document in self.documents.values()]
+
+    def bulk_write(self, operations, ordered=True):
+        self.writes.append(len(operations))
+        for operation in operations:
+            _id = operation._filter["_id"]
+            if isinstance(operation, DeleteOne):
+                self.documents.pop(_id, None)
+            else:
+                self.documents[_id] = {"_id": _id, **operation._doc["$set"]}
+
+
+def test_first_check_seeds_without_announcing():
+    store = SeenVideoStore()
+    assert store.take_new("c1", ["v2", "v1"]) == []
+    assert store.take_new("c1", ["v4", "v3", "v2"]) == ["v3", "v4"]
+    assert store.take_new("c2", ["v9"], announce_first=True) == ["v9"]
+
+
+def test_ring_buffer_keeps_the_newest_ids():
+    store = SeenVideoStore(size=3)
+    store.record("c1", ["v5", "v4", "v3", "v2", "v1"])
+    assert store.snapshot() == {"c1": ["v3", "v4", "v5"]}
+    assert not store.seen("c1", "v2")
+    assert store.add("c1", "v2")
+    assert store.snapshot() == {"c1": ["v4", "v5", "v2"]}
+
+
+def test_json_store_round_trip(tmp_path):
+    path = str(tmp_path / "youtube_seen.json")
+    store = JSONSeenVideoStore(path, size=10)
+    store.record("c1", ["v2", "v1"])
+    store.record("empty", [])
+    store.add("pushed", "v9")  # Push notification for a channel never polled
+    store.save()
+    assert not store.dirty
+
+    with open(path) as f:
+        assert json.load(f) == {"c1": ["v1", "v2"], "empty": [], "pushed": {"video_ids": ["v9"], "checked": False}}
+
+    reloaded = JSONSeenVideoStore(path, size=10)
+    assert reloaded.snapshot() == store.snapshot()
+    assert reloaded.has_channel("c1") and reloaded.has_channel("empty")
+    assert not reloaded.has_channel("pushed")
+    # The pushed channel still gets seeded by its first poll
+    assert reloaded.unseen("pushed", ["v10", "v9"]) == []
+    assert reloaded.unseen("c1", ["v3", "v2"]) == ["v3"]
+
+
+def test_json_store_saves_forgotten_channels(tmp_path):
+    path = str(tmp_path / "youtube_seen.json")
+    store = JSONSeenVideoStore(path)
+    store.record("c1", ["v1"])
+    store.record("c2", ["v2"])
+    store.save()
+    store.forget("c1")
+    store.save()
+    assert JSONSeenVideoStore(path).snapshot() == {"c2": ["v2"]}
+
+
+def test_mongo_store_writes_only_changed_channels():
+    collection = FakeCollection([{"_id": "c1", "video_ids": ["v1"], "checked": True}])
+    store = MongoSeenVideoStore(collection)
+    assert store.unseen("c1", ["v2", "v1"]) == ["v2"]
+
+    store.record("c2", ["v5"])
+    store.save()
+    store.save()  # Nothing changed since
+    store.forget("c1")
+    store.save()
+
+    assert collection.writes == [1, 1]
+    assert collection.documents == {"c2": {"_id": "c2", "video_ids": ["v5"], "checked": True}}